@@ -2,9 +2,15 @@
 A2A Protocol - Agent-to-Agent Communication Schema
 """
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import List, Dict, Optional, Mapping, Tuple, Deque
 from enum import Enum
+import json
+import uuid
+
+from agents.session_events import SessionEventLog
 
 
 class AgentRole(Enum):
@@ -21,26 +27,186 @@ class AgentMessage:
     """Standard message format for inter-agent communication"""
     from_agent: AgentRole
     to_agent: AgentRole
-    message_type: str  # "request", "response", "broadcast"
+    message_type: str  # "request", "response", "error", "broadcast"
     content: Dict
     context: Optional[Dict] = None
+    message_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # For responses: message_id of the request being answered
+    correlation_id: Optional[str] = None
+
+    def to_json(self) -> str:
+        """Serialize for transports that cross process boundaries"""
+        return json.dumps({
+            "from_agent": self.from_agent.value,
+            "to_agent": self.to_agent.value,
+            "message_type": self.message_type,
+            "content": self.content,
+            "context": self.context,
+            "message_id": self.message_id,
+            "correlation_id": self.correlation_id
+        }, default=_json_default)
+
+    @classmethod
+    def from_json(cls, data: str) -> "AgentMessage":
+        fields = json.loads(data)
+        fields["from_agent"] = AgentRole(fields["from_agent"])
+        fields["to_agent"] = AgentRole(fields["to_agent"])
+        return cls(**fields)
+
+
+def _json_default(value):
+    """Encode read-only mappings and sets found in agent payloads"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
 
 
 class AgentContext:
-    """Shared context across all agents"""
+    """
+    Shared context across all agents.
+
+    Memory per session is bounded: session_history keeps the last
+    HISTORY_LIMIT turns and folds older ones into history_summary, and
+    identified_gaps keeps the last GAPS_LIMIT gaps. Agents receive
+    snapshot(), a read-only view that is rebuilt only after the context
+    changes.
+
+    Turns, replies, concepts and gaps are appended to events, the
+    session's event log; attempt_count, concepts_covered and
+    identified_gaps are read from its views.
+    """
+    HISTORY_LIMIT = 20
+    GAPS_LIMIT = SessionEventLog.GAPS_LIMIT
+
+    __slots__ = (
+        "student_code", "current_problem", "events", "session_history",
+        "history_summary", "hint_prefetches", "_version", "_snapshot", "_snapshot_key"
+    )
+
     def __init__(self):
         self.student_code = ""
         self.current_problem = ""
-        self.attempt_count = 0
-        self.concepts_covered = []
-        self.identified_gaps = []
-        self.session_history = []
-        
-    def to_dict(self):
+        self.events = SessionEventLog()
+        self.session_history = deque(maxlen=self.HISTORY_LIMIT)
+        # Aggregates of turns that fell out of session_history
+        self.history_summary = {"turns": 0, "last_attempt": 0, "with_code": 0, "reviewed": 0, "issues": 0}
+        # Speculative hints started for this session
+        self.hint_prefetches = 0
+        self._version = 0
+        self._snapshot = None
+        self._snapshot_key = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            object.__setattr__(self, "_version", getattr(self, "_version", 0) + 1)
+
+    @property
+    def attempt_count(self) -> int:
+        return self.events.turns
+
+    @property
+    def concepts_covered(self) -> Tuple[str, ...]:
+        return self.events.concepts
+
+    @property
+    def identified_gaps(self) -> Deque[str]:
+        return self.events.gaps
+
+    def begin_turn(self, message: str, code: str = "") -> Dict:
+        """Log a student turn and add it to session_history"""
+        self.student_code = code
+        event = self.events.append("turn", message=message, code=code)
+        entry = {"message": message, "code": code, "attempt": event["attempt"]}
+        self.record_turn(entry)
+        return entry
+
+    def record_response(self, agent: str, text: str):
+        """Log the reply that ended the current turn"""
+        self.events.append("response", agent=agent, text=text)
+
+    def record_turn(self, entry: Dict):
+        """Append a history entry, summarizing the turn it pushes out"""
+        if len(self.session_history) == self.session_history.maxlen:
+            evicted = self.session_history[0]
+            summary = self.history_summary
+            summary["turns"] += 1
+            summary["last_attempt"] = evicted.get("attempt", summary["last_attempt"])
+            summary["with_code"] += bool(evicted.get("code", "").strip())
+            if "review" in evicted:
+                summary["reviewed"] += 1
+                summary["issues"] += len(evicted["review"].get("issues", []))
+        self.session_history.append(entry)
+
+    def add_concept(self, concept: str) -> bool:
+        """Mark concept as covered; False if it already was"""
+        if self.events.has_concept(concept):
+            return False
+        self.events.append("concept", concept=concept, attempt=self.attempt_count)
+        return True
+
+    def add_gap(self, gap: str):
+        self.events.append("gap", concept=gap)
+
+    @property
+    def total_turns(self) -> int:
+        """Turns recorded, including those folded into history_summary"""
+        return self.history_summary["turns"] + len(self.session_history)
+
+    def snapshot(self) -> Mapping:
+        """
+        Read-only view of the fields agents use. Lists are frozen into
+        tuples; the same object is returned until the context changes.
+        """
+        key = (self._version, self.events.seq)
+        if self._snapshot is None or self._snapshot_key != key:
+            self._snapshot = MappingProxyType({
+                "student_code": self.student_code,
+                "current_problem": self.current_problem,
+                "attempt_count": self.attempt_count,
+                "concepts_covered": tuple(self.concepts_covered),
+                "identified_gaps": tuple(self.identified_gaps)
+            })
+            self._snapshot_key = key
+        return self._snapshot
+
+    def to_state(self) -> Dict:
+        """Everything needed to rebuild this context, as plain JSON types"""
         return {
             "student_code": self.student_code,
             "current_problem": self.current_problem,
-            "attempt_count": self.attempt_count,
-            "concepts_covered": self.concepts_covered,
-            "identified_gaps": self.identified_gaps
+            "events": self.events.to_state(),
+            "session_history": list(self.session_history),
+            "history_summary": dict(self.history_summary),
+            "hint_prefetches": self.hint_prefetches
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "AgentContext":
+        context = cls()
+        context.student_code = state.get("student_code", "")
+        context.current_problem = state.get("current_problem", "")
+        if "events" in state:
+            context.events = SessionEventLog.from_state(state["events"])
+        else:
+            # Snapshots saved before the event log: rebuild its views
+            context.events.turns = state.get("attempt_count", 0)
+            for concept in state.get("concepts_covered", []):
+                context.add_concept(concept)
+            for gap in state.get("identified_gaps", []):
+                context.add_gap(gap)
+        context.session_history.extend(state.get("session_history", []))
+        context.history_summary.update(state.get("history_summary", {}))
+        context.hint_prefetches = state.get("hint_prefetches", 0)
+        return context
+
+    def to_dict(self):
+        """Plain-dict copy of snapshot(), safe to mutate or serialize"""
+        snapshot = self.snapshot()
+        return {
+            **snapshot,
+            "concepts_covered": list(snapshot["concepts_covered"]),
+            "identified_gaps": list(snapshot["identified_gaps"])
         }
@@ -3,10 +3,13 @@ Concept Explainer Agent
 Teaches fundamental concepts when gaps are identified.
 """
 
-import google.generativeai as genai
 from typing import Dict
 import os
+import sys
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.telemetry import model_call_span
+from agents.lazy_model import LazyModel
 
 load_dotenv()
 
@@ -16,12 +19,10 @@ class ConceptExplainerAgent:
     Explains programming concepts in simple terms with examples.
     Activated when student demonstrates conceptual gap.
     """
+    MODEL_NAME = 'gemini-1.5-pro'
+    
     def __init__(self):
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel(
-            'gemini-1.5-pro',
-            system_instruction=self._load_instruction()
-        )
+        self.model = LazyModel(self.MODEL_NAME, self._load_instruction)
         self.concept_database = self._load_concepts()
     
     def _load_instruction(self):
@@ -156,12 +157,14 @@ Provide a clear, helpful explanation with:
 
 Keep it concise but complete. Use markdown formatting. Be encouraging!"""
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            # Better fallback
-            return f"""**Understanding: {concept_name.title()}**
+        with model_call_span("explainer", self.MODEL_NAME, prompt, concept=concept_name) as span:
+            try:
+                response = self.model.generate_content(prompt)
+                return response.text.strip()
+            except Exception as e:
+                # Better fallback
+                span.set_attribute("fallback", True)
+                return f"""**Understanding: {concept_name.title()}**
 
 I'm having trouble connecting to my knowledge base right now, but here's what I can tell you:
 
@@ -186,11 +189,13 @@ Which fundamental programming concept is the student struggling with?
 Return only ONE word: modulo, loops, conditionals, functions, variables, lists, strings, or other.
 Respond with ONLY the concept name, nothing else."""
         
-        try:
-            response = self.model.generate_content(prompt)
-            concept = response.text.strip().lower()
-            # Clean up response
-            concept = concept.split()[0] if concept else "conditionals"
-            return concept
-        except Exception as e:
-            return "conditionals"
+        with model_call_span("explainer", self.MODEL_NAME, prompt) as span:
+            try:
+                response = self.model.generate_content(prompt)
+                concept = response.text.strip().lower()
+                # Clean up response
+                concept = concept.split()[0] if concept else "conditionals"
+                return concept
+            except Exception as e:
+                span.set_attribute("fallback", True)
+                return "conditionals"
@@ -3,10 +3,18 @@ Progressive Hint Agent
 Provides increasingly specific hints based on number of attempts.
 """
 
-import google.generativeai as genai
-from typing import Dict
+from typing import Dict, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import os
+import sys
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.code_fingerprint import fingerprint_code, execution_outcome
+from tools.semantic_cache import shared_cache
+from tools.telemetry import model_call_span
+from agents.lazy_model import LazyModel
 
 load_dotenv()
 
@@ -15,13 +23,32 @@ class HintAgent:
     """
     Provides progressive hints - starts vague, gets more specific.
     Hint difficulty adjusts based on student's attempt count.
+
+    Because a hint depends only on the problem, the code, the error and the
+    difficulty level, the next level can be computed speculatively while the
+    student is still reading the current one (see prefetch_hint), and
+    shared across students whose code has the same structural fingerprint.
+
+    Speculative hints are buffered per session (context["session_id"]) and
+    tagged with the attempt they were made for; once the session's attempt
+    count moves past that attempt they are dropped.
     """
-    def __init__(self):
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel(
-            'gemini-2.0-flash-exp',
-            system_instruction=self._load_instruction()
+    # Max speculative hints buffered per session
+    PREFETCH_PER_SESSION = 4
+    # Max sessions with buffered hints; the longest idle is dropped first
+    PREFETCH_SESSIONS = 256
+    MODEL_NAME = 'gemini-2.0-flash-exp'
+
+    def __init__(self, prefetch_workers: int = 2, cache=None):
+        self.model = LazyModel(self.MODEL_NAME, self._load_instruction)
+        # Speculative hints: session id -> OrderedDict(key -> (attempt, Future[str]))
+        self._prefetched = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_pool = ThreadPoolExecutor(
+            max_workers=prefetch_workers,
+            thread_name_prefix="hint-prefetch"
         )
+        self.cache = cache if cache is not None else shared_cache
     
     def _load_instruction(self):
         return """You are the Hint Provider Agent in CodeMentor AI.
@@ -58,33 +85,38 @@ CRITICAL RULES:
 
 Keep hints concise (2-4 sentences). Always be encouraging."""
     
-    def generate_hint(self, context: Dict) -> Dict:
-        """
-        Generate appropriately specific hint based on attempt count.
-        
-        Returns:
-            {
-                "hint": str,
-                "difficulty": int (1-5),
-                "encouragement": str
-            }
-        """
-        attempt_count = context.get('attempt_count', 0)
-        
-        # Determine hint difficulty level
+    @staticmethod
+    def hint_difficulty(attempt_count: int) -> int:
+        """Map an attempt number to a hint difficulty level (1-4)"""
         if attempt_count <= 1:
-            difficulty = 1  # Very vague
+            return 1  # Very vague
         elif attempt_count <= 3:
-            difficulty = 2  # Conceptual
+            return 2  # Conceptual
         elif attempt_count <= 5:
-            difficulty = 3  # Structural
-        else:
-            difficulty = 4  # Very specific
-        
-        code_snippet = context.get('student_code', 'No code yet')
-        error_msg = context.get('error_message', 'No error')
-        problem = context.get('current_problem', 'Programming problem')
-        
+            return 3  # Structural
+        return 4  # Very specific
+
+    def _hint_key(self, context: Dict) -> Tuple:
+        """Everything the hint text depends on"""
+        return (
+            context.get('current_problem', 'Programming problem'),
+            context.get('student_code', 'No code yet'),
+            context.get('error_message', 'No error'),
+            self.hint_difficulty(context.get('attempt_count', 0)),
+            # Tells correct output apart from wrong output of similar code
+            execution_outcome(context.get('execution_result')),
+        )
+
+    def _request_hint(self, key: Tuple, attempt_count: int) -> str:
+        """Call the model for a hint at the difficulty encoded in key"""
+        problem, code_snippet, error_msg, difficulty, outcome = key
+        # Error type only - the message text names the student's identifiers
+        cache_key = (problem, fingerprint_code(code_snippet),
+                     error_msg.split(':', 1)[0], difficulty, outcome)
+        cached = self.cache.get("hint", cache_key, source=code_snippet)
+        if cached is not None:
+            return cached
+
         prompt = f"""Problem: {problem}
 
 Student's latest code:
@@ -104,11 +136,94 @@ NEVER write the complete solution. Give just enough guidance for the next step.
 
 Respond with 2-3 sentences. Be specific but don't solve it for them!"""
         
-        try:
-            response = self.model.generate_content(prompt)
-            hint_text = response.text.strip()
-        except Exception as e:
-            hint_text = "Try breaking the problem into smaller steps."
+        with model_call_span("hint", self.MODEL_NAME, prompt, **{"hint.level": difficulty}) as span:
+            try:
+                response = self.model.generate_content(prompt)
+                hint_text = response.text.strip()
+            except Exception as e:
+                span.set_attribute("fallback", True)
+                return "Try breaking the problem into smaller steps."
+        
+        self.cache.put("hint", cache_key, hint_text, source=code_snippet)
+        return hint_text
+
+    def prefetch_hint(self, context: Dict) -> bool:
+        """
+        Start computing the hint for context in the background.
+
+        Returns False if an identical hint is already buffered or in flight.
+        """
+        key = self._hint_key(context)
+        session_id = context.get('session_id', '')
+        attempt_count = context.get('attempt_count', 0)
+        with self._prefetch_lock:
+            buffer = self._prefetched.get(session_id)
+            if buffer is None:
+                buffer = self._prefetched[session_id] = OrderedDict()
+            self._prefetched.move_to_end(session_id)
+            # Hints for earlier attempts can no longer be asked for
+            self._expire(buffer, attempt_count)
+            if key in buffer:
+                return False
+            buffer[key] = (attempt_count, self._prefetch_pool.submit(
+                self._request_hint, key, attempt_count
+            ))
+            while len(buffer) > self.PREFETCH_PER_SESSION:
+                _, (_, stale) = buffer.popitem(last=False)
+                stale.cancel()
+            while len(self._prefetched) > self.PREFETCH_SESSIONS:
+                _, idle = self._prefetched.popitem(last=False)
+                self._expire(idle, float("inf"))
+        return True
+
+    @staticmethod
+    def _expire(buffer: OrderedDict, before_attempt):
+        """Drop (and cancel) buffered hints made for attempts before before_attempt"""
+        for key in [key for key, (attempt, _) in buffer.items() if attempt < before_attempt]:
+            buffer.pop(key)[1].cancel()
+
+    def discard_prefetched(self, session_id: str):
+        """Drop a session's speculative hints, e.g. when it starts over"""
+        with self._prefetch_lock:
+            buffer = self._prefetched.pop(session_id, None)
+            if buffer is not None:
+                self._expire(buffer, float("inf"))
+
+    def _take_prefetched(self, key: Tuple, session_id: str, attempt_count: int):
+        with self._prefetch_lock:
+            buffer = self._prefetched.get(session_id)
+            if buffer is None:
+                return None
+            entry = buffer.pop(key, None)
+            # This attempt is being answered; nothing up to it is needed again
+            self._expire(buffer, attempt_count + 1)
+            if not buffer:
+                del self._prefetched[session_id]
+        future = entry[1] if entry is not None else None
+        if future is None or future.cancelled():
+            return None
+        # Still running: waiting for it is cheaper than starting over
+        return future.result()
+
+    def generate_hint(self, context: Dict) -> Dict:
+        """
+        Generate appropriately specific hint based on attempt count.
+        Served from the prefetch buffer when the hint was speculated earlier.
+        
+        Returns:
+            {
+                "hint": str,
+                "difficulty": int (1-5),
+                "encouragement": str
+            }
+        """
+        attempt_count = context.get('attempt_count', 0)
+        key = self._hint_key(context)
+        difficulty = key[3]
+
+        hint_text = self._take_prefetched(key, context.get('session_id', ''), attempt_count)
+        if hint_text is None:
+            hint_text = self._request_hint(key, attempt_count)
         
         # Add encouragement
         encouragements = [
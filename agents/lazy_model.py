@@ -0,0 +1,53 @@
+"""
+Lazy Gemini model client
+Defers importing google.generativeai and building the model until an
+agent first calls it, so starting the app does not pay for either.
+"""
+
+import os
+import threading
+from typing import Callable
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def _genai():
+    """google.generativeai, imported and configured on first use"""
+    global _configured
+    import google.generativeai as genai
+    with _configure_lock:
+        if not _configured:
+            genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+            _configured = True
+    return genai
+
+
+class LazyModel:
+    """
+    Stands in for genai.GenerativeModel. The real model is created on the
+    first generate_content() call; instruction is called then to build the
+    system instruction. Agents hold one from construction, which keeps
+    their setup off the app's startup path.
+    """
+    def __init__(self, model_name: str, instruction: Callable[[], str]):
+        self.model_name = model_name
+        self._instruction = instruction
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                self._model = _genai().GenerativeModel(
+                    self.model_name,
+                    system_instruction=self._instruction()
+                )
+        return self._model
+
+    def generate_content(self, *args, **kwargs):
+        return (self._model or self._load()).generate_content(*args, **kwargs)
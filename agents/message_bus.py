@@ -0,0 +1,253 @@
+"""
+In-Process A2A Message Bus
+Routes AgentMessages to agents through bounded asyncio queues, one per
+AgentRole, each drained by its own pool of workers.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from agents.a2a_protocol import AgentMessage, AgentRole
+from tools.telemetry import attached_context, extract_trace_context
+
+
+class BusFullError(Exception):
+    """Raised when an agent's queue stays full past the enqueue timeout"""
+    pass
+
+
+class AgentRequestError(Exception):
+    """Raised on the requesting side when the agent's handler failed"""
+    pass
+
+
+# Agent methods callable through the bus, per role
+AGENT_ACTIONS = {
+    AgentRole.SOCRATIC: ("ask_question",),
+    AgentRole.HINT: ("generate_hint", "prefetch_hint"),
+    AgentRole.REVIEW: ("review_code",),
+    AgentRole.EXPLAINER: ("explain_concept", "identify_concept_gap"),
+}
+
+# Workers per role when none are given: the pro-model reviewer is slowest
+DEFAULT_WORKERS = {
+    AgentRole.SOCRATIC: 2,
+    AgentRole.HINT: 2,
+    AgentRole.REVIEW: 4,
+    AgentRole.EXPLAINER: 2,
+}
+
+
+def agent_handler(role: AgentRole, agent) -> Callable[[AgentMessage], Dict]:
+    """
+    Handler that maps a request {"action": ..., "kwargs": {...}} onto a
+    whitelisted method of agent and wraps its return value as {"result": ...}.
+    Spans continue the caller's trace if the request carries "trace" headers.
+    """
+    allowed = AGENT_ACTIONS[role]
+
+    def handle(message: AgentMessage) -> Dict:
+        action = message.content.get("action")
+        if action not in allowed:
+            raise ValueError(f"{role.value} agent does not support action '{action}'")
+        with attached_context(extract_trace_context(message.content.get("trace"))):
+            return {"result": getattr(agent, action)(**message.content.get("kwargs", {}))}
+    return handle
+
+
+class _Route:
+    __slots__ = ("handler", "workers", "max_queue_size", "executor", "queue",
+                 "processed", "failed")
+
+    def __init__(self, handler, workers: int, max_queue_size: int):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.executor = None
+        self.queue = None
+        self.processed = 0
+        self.failed = 0
+
+
+class AgentMessageBus:
+    """
+    Request/response bus between the orchestrator and agents.
+
+    - Each registered role gets a bounded queue; senders wait while it is
+      full (backpressure) and get BusFullError after enqueue_timeout.
+    - Each role has its own worker pool, so a slow agent can be given more
+      workers without touching the fast ones.
+    - Responses carry the request's message_id as correlation_id.
+
+    The bus runs its event loop on a background thread; request_sync() can be
+    called from any other thread, request() awaited from inside the loop.
+    """
+    def __init__(self, max_queue_size: int = 64, enqueue_timeout: float = 30.0,
+                 request_timeout: float = 180.0):
+        self.max_queue_size = max_queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.request_timeout = request_timeout
+        self._routes: Dict[AgentRole, _Route] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+        self._thread = None
+
+    def register(self, role: AgentRole, handler: Callable[[AgentMessage], Dict],
+                 workers: int = 1, max_queue_size: Optional[int] = None):
+        """Route messages addressed to role to handler, run on workers threads"""
+        if self._loop is not None:
+            raise RuntimeError("Register agents before starting the bus")
+        self._routes[role] = _Route(handler, workers, max_queue_size or self.max_queue_size)
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def start(self):
+        """Start the event loop thread and the worker pools"""
+        if self._loop is not None:
+            return
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="a2a-bus", daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        asyncio.run_coroutine_threadsafe(self._start_workers(), loop).result()
+
+    async def _start_workers(self):
+        for role, route in self._routes.items():
+            route.queue = asyncio.Queue(maxsize=route.max_queue_size)
+            route.executor = ThreadPoolExecutor(
+                max_workers=route.workers,
+                thread_name_prefix=f"a2a-{role.value}"
+            )
+            for _ in range(route.workers):
+                self._tasks.append(asyncio.create_task(self._worker(route)))
+
+    async def _worker(self, route: _Route):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await route.queue.get()
+            try:
+                result = await loop.run_in_executor(route.executor, route.handler, message)
+                route.processed += 1
+                self._resolve(message, AgentMessage(
+                    from_agent=message.to_agent,
+                    to_agent=message.from_agent,
+                    message_type="response",
+                    content=result,
+                    correlation_id=message.message_id
+                ))
+            except Exception as e:
+                route.failed += 1
+                self._resolve(message, AgentMessage(
+                    from_agent=message.to_agent,
+                    to_agent=message.from_agent,
+                    message_type="error",
+                    content={"error": f"{type(e).__name__}: {e}"},
+                    correlation_id=message.message_id
+                ))
+            finally:
+                route.queue.task_done()
+
+    def _resolve(self, request: AgentMessage, response: AgentMessage):
+        future = self._pending.pop(request.message_id, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _route(self, role: AgentRole) -> _Route:
+        if role not in self._routes:
+            raise KeyError(f"No agent registered for role '{role.value}'")
+        return self._routes[role]
+
+    async def send(self, message: AgentMessage):
+        """Enqueue a message, waiting while the target queue is full"""
+        queue = self._route(message.to_agent).queue
+        try:
+            await asyncio.wait_for(queue.put(message), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise BusFullError(f"{message.to_agent.value} queue is full") from None
+
+    async def request(self, to_agent: AgentRole, content: Dict, context: Optional[Dict] = None,
+                      from_agent: AgentRole = AgentRole.ORCHESTRATOR,
+                      timeout: Optional[float] = None) -> AgentMessage:
+        """Send a request and wait for the correlated response"""
+        message = AgentMessage(
+            from_agent=from_agent,
+            to_agent=to_agent,
+            message_type="request",
+            content=content,
+            context=context
+        )
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message.message_id] = future
+        try:
+            await self.send(message)
+            response = await asyncio.wait_for(future, timeout or self.request_timeout)
+        finally:
+            self._pending.pop(message.message_id, None)
+        if response.message_type == "error":
+            raise AgentRequestError(response.content.get("error", "Agent request failed"))
+        return response
+
+    def request_sync(self, to_agent: AgentRole, content: Dict, context: Optional[Dict] = None,
+                     timeout: Optional[float] = None) -> AgentMessage:
+        """Blocking request() for callers outside the bus thread"""
+        if self._loop is None:
+            raise RuntimeError("Bus is not running")
+        return asyncio.run_coroutine_threadsafe(
+            self.request(to_agent, content, context, timeout=timeout), self._loop
+        ).result()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Messages waiting per agent role"""
+        return {
+            role.value: route.queue.qsize() if route.queue is not None else 0
+            for role, route in self._routes.items()
+        }
+
+    def stats(self) -> Dict[str, Dict]:
+        """Queue depth, capacity, workers and handled counts per role"""
+        return {
+            role.value: {
+                "depth": route.queue.qsize() if route.queue is not None else 0,
+                "capacity": route.max_queue_size,
+                "workers": route.workers,
+                "processed": route.processed,
+                "failed": route.failed,
+            }
+            for role, route in self._routes.items()
+        }
+
+    def stop(self):
+        """Cancel workers and stop the loop thread"""
+        if self._loop is None:
+            return
+        loop = self._loop
+
+        async def shutdown():
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+        for route in self._routes.values():
+            route.executor.shutdown(wait=False)
+            route.executor = None
+            route.queue = None
+        self._loop = None
+        self._thread = None
@@ -3,8 +3,14 @@ Multi-Agent Orchestrator
 Coordinates all teaching agents using A2A protocol.
 """
 
-from typing import Dict
+from collections import ChainMap
+from typing import Callable, Dict, Optional
+import atexit
+import copy
+import hashlib
 import sys
+import threading
+import time
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -12,15 +18,28 @@ from agents.socratic_agent import SocraticAgent
 from agents.hint_agent import HintAgent
 from agents.review_agent import CodeReviewAgent
 from agents.explainer_agent import ConceptExplainerAgent
-from agents.a2a_protocol import AgentContext
+from agents.a2a_protocol import AgentContext, AgentRole
+from agents.session_store import SessionStore
+from agents.message_bus import AgentMessageBus, agent_handler, DEFAULT_WORKERS
 from tools.memory_manager import StudentMemoryManager
 from tools.code_executor import SafeCodeExecutor
+from tools.code_fingerprint import fingerprint_code
+from tools.semantic_cache import shared_cache
+from tools.knowledge_tracing import KnowledgeTracer
+from tools.snapshot import Snapshot, SnapshotFormatError, SnapshotWriter
+from tools.metrics import (
+    ACTIVE_SESSIONS, TURNS, TURN_LATENCY, configure_metrics_exposition, registry as metrics_registry
+)
+from tools.telemetry import configure_tracing, get_tracer, inject_trace_context
 
 
 class MultiAgentOrchestrator:
     """
     Root orchestrator coordinates 4 teaching agents.
     Implements A2A protocol for inter-agent communication.
+    
+    One instance serves many students: agents, memory and sandbox are
+    shared, and each session only owns its AgentContext in the session store.
     """
     
     # Default FizzBuzz problem for testing and demo
@@ -30,23 +49,163 @@ class MultiAgentOrchestrator:
 - For multiples of both 3 and 5, print "FizzBuzz"
 - Otherwise, print the number"""
     
-    def __init__(self):
+    # Speculative next-level hints allowed per session
+    MAX_HINT_PREFETCHES = 5
+    
+    # Session used when callers don't pass a session_id
+    DEFAULT_SESSION = "default"
+    
+    def __init__(self, session_store: Optional[SessionStore] = None, idle_timeout: float = 1800.0,
+                 memory_path: Optional[str] = None, snapshot_dir: Optional[str] = None,
+                 agent_bus: Optional[bool] = None):
+        # Local span export if CODEMENTOR_TRACE is set (see tools/telemetry.py)
+        configure_tracing()
+        # /metrics endpoint or file dump if configured (see tools/metrics.py)
+        configure_metrics_exposition()
+        
         # Initialize all specialist agents
         self.socratic = SocraticAgent()
         self.hint_provider = HintAgent()
         self.code_reviewer = CodeReviewAgent()
         self.explainer = ConceptExplainerAgent()
         
-        # Memory and tools
-        self.memory = StudentMemoryManager(project_id="demo", location="us-central1")
+        # Memory and tools; persisted only if memory_path or
+        # CODEMENTOR_MEMORY_DB names a session log
+        if memory_path is None:
+            memory_path = os.getenv("CODEMENTOR_MEMORY_DB", "")
+        self.memory = StudentMemoryManager(project_id="demo", location="us-central1",
+                                           store_path=memory_path or None)
         self.executor = SafeCodeExecutor()
+        # Bayesian knowledge tracing of each student's concepts
+        self.knowledge = KnowledgeTracer()
+        # Reviews, hints and execution results shared across all sessions
+        self.cache = shared_cache
         
-        # Shared context across agents
-        self.context = AgentContext()
+        # Optional A2A bus; agents are called directly while it is None.
+        # agent_bus=True or CODEMENTOR_AGENT_BUS=1 attaches an in-process
+        # bus with a worker pool per agent
+        self.bus = None
+        if agent_bus is None:
+            agent_bus = os.getenv("CODEMENTOR_AGENT_BUS", "").lower() in ("1", "true", "yes")
+        if agent_bus:
+            atexit.register(self.attach_bus().stop)
+        
+        # With snapshot_dir or CODEMENTOR_SNAPSHOT_DIR set, students are
+        # saved after every turn (in the background) and hydrated on first access
+        if snapshot_dir is None:
+            snapshot_dir = os.getenv("CODEMENTOR_SNAPSHOT_DIR", "")
+        self.snapshot_dir = snapshot_dir or None
+        self._snapshots = None
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            self._snapshots = SnapshotWriter()
+            atexit.register(self._snapshots.close)
+        
+        # Per-student shared context across agents
+        self.sessions = session_store or SessionStore(
+            factory=self._new_context, idle_timeout=idle_timeout,
+            loader=self.restore_session if self.snapshot_dir else None
+        )
+        ACTIVE_SESSIONS.set_function(lambda: self.active_sessions)
+    
+    def _new_context(self) -> AgentContext:
+        context = AgentContext()
         # Set default problem
-        self.context.current_problem = self.DEFAULT_PROBLEM
+        context.current_problem = self.DEFAULT_PROBLEM
+        return context
+    
+    def get_context(self, session_id: Optional[str] = None) -> AgentContext:
+        """Context of a student session, created on first use"""
+        return self.sessions.get(session_id or self.DEFAULT_SESSION)
+    
+    @property
+    def context(self) -> AgentContext:
+        """Context of the default session (single-student use)"""
+        return self.get_context()
+    
+    def reset_session(self, session_id: Optional[str] = None) -> AgentContext:
+        """Start a session over with a fresh context; memory and mastery are kept"""
+        session_id = session_id or self.DEFAULT_SESSION
+        context = self.sessions.reset(session_id)
+        # Speculative hints were made for the old attempt numbers
+        self.hint_provider.discard_prefetched(session_id)
+        self.save_session(session_id)
+        return context
     
-    def process_student_input(self, student_message: str, code_attempt: str = "") -> Dict:
+    def _snapshot_path(self, session_id: str) -> str:
+        # Session ids come from clients, so never use them as file names
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.snapshot_dir, f"{digest}.snap")
+    
+    def save_session(self, session_id: Optional[str] = None, wait: bool = False) -> Optional[str]:
+        """
+        Save the session's context, concept mastery and (without a
+        session log) memory to a snapshot file. Returns its path.
+        
+        State is captured now and written by a background thread; pass
+        wait=True to block until it is on disk. The default session is
+        never saved: each process starts it fresh.
+        """
+        session_id = session_id or self.DEFAULT_SESSION
+        if not self.snapshot_dir or session_id == self.DEFAULT_SESSION:
+            return None
+        sections = {
+            "context": self.get_context(session_id).to_state(),
+            "mastery": {
+                "known": self.knowledge.student_state(session_id),
+                "series": self.memory.mastery.student_series(session_id)
+            }
+        }
+        # With a session log the memory is already durable
+        if self.memory.log is None:
+            sessions = self.memory.get_student_sessions(session_id)
+            sections["memory"] = list(sessions.items())
+        path = self._snapshot_path(session_id)
+        self._snapshots.submit(path, sections)
+        if wait:
+            self._snapshots.flush()
+        return path
+    
+    def flush_snapshots(self):
+        """Block until every saved session is written"""
+        if self._snapshots is not None:
+            self._snapshots.flush()
+    
+    def restore_session(self, session_id: str) -> Optional[AgentContext]:
+        """
+        Rebuild a session from its snapshot, or None if there is none.
+        The memory section is only decoded if the student's history is used.
+        """
+        if session_id == self.DEFAULT_SESSION:
+            return None
+        path = self._snapshot_path(session_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = Snapshot(path)
+            context = AgentContext.from_state(snapshot["context"])
+        except (OSError, SnapshotFormatError, ValueError, KeyError) as e:
+            print(f"Could not restore session {session_id}: {e}")
+            return None
+        mastery = snapshot.get("mastery", {})
+        if not self.knowledge.student_state(session_id):
+            self.knowledge.restore_student(session_id, mastery.get("known", {}))
+        if not self.memory.mastery.student(session_id):
+            for concept, (timestamps, values) in mastery.get("series", {}).items():
+                self.memory.mastery.restore_series(session_id, concept, timestamps, values)
+        if "memory" in snapshot:
+            self.memory.defer_student_load(
+                session_id, lambda: {attempt: data for attempt, data in snapshot["memory"]}
+            )
+        return context
+    
+    @property
+    def active_sessions(self) -> int:
+        return len(self.sessions)
+    
+    def process_student_input(self, student_message: str, code_attempt: str = "",
+                              on_review_issue: Optional[Callable[[Dict], None]] = None,
+                              session_id: Optional[str] = None) -> Dict:
         """
         Main orchestration logic:
         1. Update context
@@ -54,6 +213,10 @@ class MultiAgentOrchestrator:
         3. Coordinate agent responses
         4. Return unified response to student
         
+        on_review_issue is called with each code review issue as soon as it
+        streams in, before the full response is ready.
+        session_id selects the student; turns of one session run one at a time.
+        
         Returns:
             {
                 "response": str,
@@ -61,26 +224,49 @@ class MultiAgentOrchestrator:
                 "metadata": Dict
             }
         """
+        session_id = session_id or self.DEFAULT_SESSION
+        start = time.perf_counter()
+        with get_tracer().start_as_current_span("tutor.turn") as span:
+            span.set_attribute("session.id", session_id)
+            span.set_attribute("has_code", bool(code_attempt.strip()))
+            with self.sessions.lock(session_id):
+                response = self._process_turn(self.get_context(session_id), session_id,
+                                              student_message, code_attempt, on_review_issue)
+                self.save_session(session_id)
+            span.set_attribute("agent_used", response["agent_used"])
+            if "hint_level" in response["metadata"]:
+                span.set_attribute("hint.level", response["metadata"]["hint_level"])
+        TURN_LATENCY.observe(time.perf_counter() - start)
+        TURNS.inc(agent_used=response["agent_used"])
+        return response
+    
+    def _process_turn(self, context: AgentContext, session_id: str, student_message: str,
+                      code_attempt: str, on_review_issue: Optional[Callable[[Dict], None]]) -> Dict:
+        """One tutoring turn for the session owning context"""
         # Update shared context
-        self.context.student_code = code_attempt
-        self.context.attempt_count += 1
-        self.context.session_history.append({
-            "message": student_message,
-            "code": code_attempt,
-            "attempt": self.context.attempt_count
-        })
+        context.begin_turn(student_message, code_attempt)
         
         response_data = {}
+        execution = None
+        # (concept, correct) evidence from this turn for knowledge tracing
+        evidence = []
+        # Hint request the student's next unchanged submission would trigger
+        next_hint_context = None
         
         # Decision logic: Which agent to activate?
         
         # 1. If student has code, review it first
         if code_attempt.strip():
-            execution = self.executor.execute(code_attempt)
-            review = self.code_reviewer.review_code({
-                **self.context.to_dict(),
-                "execution_result": execution
-            })
+            execution = self._execute(code_attempt)
+            previous = self._previous_reviewed_attempt(context)
+            review = self._call_agent(AgentRole.REVIEW, "review_code", context=ChainMap({
+                "execution_result": execution,
+                "previous_code": previous["code"] if previous else None,
+                "previous_review": previous["review"] if previous else None
+            }, context.snapshot()), on_issue=on_review_issue)
+            # Keep the model's review for incremental re-review next time,
+            # before the static FizzBuzz checks below add to it
+            context.session_history[-1]["review"] = copy.deepcopy(review)
             
             if not execution["success"] and execution.get("error"):
                 # Code has syntax or runtime error - check if it's a concept gap
@@ -102,15 +288,16 @@ class MultiAgentOrchestrator:
                 
                 if needs_explanation and concept_gap:
                     # Activate Explainer Agent
-                    explanation = self.explainer.explain_concept(
-                        concept_gap,
+                    explanation = self._call_agent(
+                        AgentRole.EXPLAINER, "explain_concept",
+                        concept_name=concept_gap,
                         context={"reason": f"Error: {execution['error']}"}
                     )
-                    self.context.identified_gaps.append(concept_gap)
+                    context.add_gap(concept_gap)
+                    evidence.append((concept_gap, False))
                     
                     # Track concept mastery
-                    if concept_gap not in self.context.concepts_covered:
-                        self.context.concepts_covered.append(concept_gap)
+                    context.add_concept(concept_gap)
                     
                     response_data = {
                         "response": f"I noticed you might need help with **{concept_gap}**. Let me explain:\n\n{explanation}\n\n**Now try fixing your code!**",
@@ -123,11 +310,14 @@ class MultiAgentOrchestrator:
                     }
                 else:
                     # No clear concept gap - provide hint
-                    hint = self.hint_provider.generate_hint({
-                        **self.context.to_dict(),
+                    hint_context = ChainMap({
+                        "session_id": session_id,
                         "error_message": execution["error"],
-                        "student_code": code_attempt
-                    })
+                        "student_code": code_attempt,
+                        "execution_result": execution
+                    }, context.snapshot())
+                    hint = self._call_agent(AgentRole.HINT, "generate_hint", context=hint_context)
+                    next_hint_context = hint_context
                     response_data = {
                         "response": f"{hint['encouragement']}\n\n**💡 Hint (Level {hint['difficulty']}/4):**\n{hint['hint']}\n\n**Error details:** {execution['error']}",
                         "agent_used": "hint",
@@ -154,7 +344,7 @@ class MultiAgentOrchestrator:
                 
                 # Static analysis for FizzBuzz-specific issues
                 fizzbuzz_issues = []
-                if "fizzbuzz" in self.context.current_problem.lower():
+                if "fizzbuzz" in context.current_problem.lower():
                     # Check for common FizzBuzz mistakes
                     if "/" in code_attempt and "%" not in code_attempt:
                         fizzbuzz_issues.append({
@@ -162,8 +352,8 @@ class MultiAgentOrchestrator:
                             "hint": "Remember: To check if a number is divisible, use the modulo operator %"
                         })
                         # Trigger explainer for modulo concept
-                        if "modulo" not in self.context.concepts_covered:
-                            self.context.concepts_covered.append("modulo")
+                        context.add_concept("modulo")
+                        evidence.append(("modulo", False))
                     
                     if "%" in code_attempt:
                         # Has modulo but missing FizzBuzz case?
@@ -181,6 +371,12 @@ class MultiAgentOrchestrator:
                             "hint": "Your loop is working! Now add conditions to check divisibility."
                         })
                 
+                # A clean run is evidence for every concept it didn't get wrong
+                if execution["success"]:
+                    missed = {concept for concept, _ in evidence}
+                    evidence.extend((concept, True) for concept in context.concepts_covered
+                                    if concept not in missed)
+                
                 # Override has_issues if we found FizzBuzz-specific problems
                 if fizzbuzz_issues:
                     has_issues = True
@@ -189,13 +385,18 @@ class MultiAgentOrchestrator:
                         review["issues"].append({"line": "?", "issue": fi["issue"], "explanation": fi["hint"]})
                 
                 # After 2+ attempts, provide hints UNLESS code is complete
-                if self.context.attempt_count >= 2 and has_issues and not is_complete_solution:
-                    hint = self.hint_provider.generate_hint({
-                        **self.context.to_dict(),
-                        "error_message": "Code runs but may need improvement",
-                        "student_code": code_attempt,
-                        "review_issues": review.get("issues", [])
-                    })
+                runs_hint_context = ChainMap({
+                    "session_id": session_id,
+                    "error_message": "Code runs but may need improvement",
+                    "student_code": code_attempt,
+                    "execution_result": execution,
+                    "review_issues": review.get("issues", [])
+                }, context.snapshot())
+                if has_issues and not is_complete_solution:
+                    next_hint_context = runs_hint_context
+                
+                if context.attempt_count >= 2 and has_issues and not is_complete_solution:
+                    hint = self._call_agent(AgentRole.HINT, "generate_hint", context=runs_hint_context)
                     response_data = {
                         "response": f"{hint['encouragement']}\n\n**💡 Hint (Level {hint['difficulty']}/4):**\n{hint['hint']}" + (
                             "\n\n⚠️ **Issues found:**\n" + "\n".join(f"- Line {issue.get('line', '?')}: {issue.get('issue', '')}" for issue in review["issues"][:2])
@@ -259,23 +460,158 @@ class MultiAgentOrchestrator:
         # 2. If no code yet, or student asking question
         else:
             # Activate Socratic Agent
-            question = self.socratic.ask_question({
-                **self.context.to_dict(),
+            question = self._call_agent(AgentRole.SOCRATIC, "ask_question", context=ChainMap({
                 "student_message": student_message
-            })
+            }, context.snapshot()))
             
             response_data = {
                 "response": question,
                 "agent_used": "socratic",
                 "metadata": {
-                    "attempt_count": self.context.attempt_count
+                    "attempt_count": context.attempt_count
                 }
             }
         
         # Update memory system
         self.memory.store_session(
-            session_id=f"session_{self.context.attempt_count}",
-            student_data=self.context.to_dict()
+            student_id=session_id,
+            attempt=context.attempt_count,
+            student_data=context.snapshot(),
+            error=execution.get("error", "") if execution else ""
         )
         
+        if evidence:
+            self._trace_knowledge(session_id, evidence)
+        
+        if execution is not None:
+            self.memory.record_attempt(
+                session_id, context.current_problem, context.attempt_count,
+                error=execution.get("error", ""),
+                hint_level=response_data["metadata"].get("hint_level", 0),
+                concept_gap=next((concept for concept, correct in evidence if not correct), ""),
+                success=bool(response_data["metadata"].get("success"))
+            )
+        
+        if next_hint_context is not None:
+            self._prefetch_next_hint(context, next_hint_context)
+        
+        context.record_response(response_data["agent_used"], response_data["response"])
         return response_data
+    
+    def _agents_by_role(self) -> Dict:
+        return {
+            AgentRole.SOCRATIC: self.socratic,
+            AgentRole.HINT: self.hint_provider,
+            AgentRole.REVIEW: self.code_reviewer,
+            AgentRole.EXPLAINER: self.explainer,
+        }
+    
+    def attach_bus(self, bus: Optional[AgentMessageBus] = None,
+                   workers: Optional[Dict[AgentRole, int]] = None) -> AgentMessageBus:
+        """
+        Route agent calls through an A2A message bus instead of calling the
+        agents directly. Without a bus argument, an in-process bus is built
+        with workers per role (defaults in DEFAULT_WORKERS). A
+        transport.RemoteAgentClient can be passed instead to reach agent
+        workers in other processes.
+        """
+        if bus is None:
+            bus = AgentMessageBus()
+            workers = {**DEFAULT_WORKERS, **(workers or {})}
+            for role, agent in self._agents_by_role().items():
+                bus.register(role, agent_handler(role, agent), workers=workers[role])
+        if not bus.running:
+            bus.start()
+        self.bus = bus
+        return bus
+    
+    def _call_agent(self, role: AgentRole, action: str, **kwargs):
+        """Invoke an agent action directly or as an AgentMessage over the bus"""
+        if self.bus is None:
+            return getattr(self._agents_by_role()[role], action)(**kwargs)
+        # Callbacks (e.g. streamed review issues) can't travel in a message
+        kwargs = {key: value for key, value in kwargs.items() if not callable(value)}
+        response = self.bus.request_sync(role, {
+            "action": action,
+            "kwargs": kwargs,
+            # Lets the agent's spans join this turn's trace
+            "trace": inject_trace_context()
+        })
+        return response.content["result"]
+    
+    def bus_stats(self) -> Dict:
+        """Queue depth and throughput per agent, empty without a bus"""
+        return self.bus.stats() if self.bus is not None else {}
+    
+    def _previous_reviewed_attempt(self, context: AgentContext) -> Optional[Dict]:
+        """Most recent earlier history entry that has code and a review"""
+        history = reversed(context.session_history)
+        next(history, None)  # skip the current turn
+        for entry in history:
+            if entry.get("code", "").strip() and "review" in entry:
+                return entry
+        return None
+    
+    def _execute(self, code: str) -> Dict:
+        """Run code in the sandbox, reusing results for identical programs"""
+        key = fingerprint_code(code, canonical=False)
+        cached = self.cache.get("exec", key, source=code)
+        if cached is not None:
+            return cached
+        execution = self.executor.execute(code)
+        # Timeouts depend on host load, so they are not worth remembering
+        if "timed out" not in execution.get("error", ""):
+            self.cache.put("exec", key, execution, source=code)
+        return execution
+    
+    def cache_stats(self) -> Dict:
+        """Hit ratio and fingerprint collision counts of the shared cache"""
+        return self.cache.stats()
+    
+    def _trace_knowledge(self, session_id: str, evidence):
+        """Update BKT mastery from a turn's evidence and record it in memory"""
+        updated = self.knowledge.observe_batch(
+            (session_id, concept, correct) for concept, correct in evidence
+        )
+        for (student_id, concept), mastery in updated.items():
+            self.memory.track_concept_mastery(concept, mastery, student_id=student_id)
+    
+    def concept_mastery(self, session_id: Optional[str] = None) -> Dict[str, float]:
+        """Estimated P(known) of each concept the session has covered"""
+        session_id = session_id or self.DEFAULT_SESSION
+        return self.knowledge.student_mastery(session_id, self.get_context(session_id).concepts_covered)
+    
+    def memory_stats(self) -> Dict:
+        """Hot/cold tier usage of the student memory"""
+        return self.memory.memory_stats()
+    
+    def metrics_text(self) -> str:
+        """Pipeline metrics in the Prometheus text format"""
+        return metrics_registry.render_text()
+    
+    def _prefetch_next_hint(self, context: AgentContext, hint_context: ChainMap):
+        """
+        Speculatively compute the hint for the next attempt, so that an
+        unchanged resubmission is answered from the prefetch buffer.
+        Bounded by MAX_HINT_PREFETCHES per session.
+        """
+        if context.hint_prefetches >= self.MAX_HINT_PREFETCHES:
+            return
+        started = self._call_agent(AgentRole.HINT, "prefetch_hint", context=hint_context.new_child({
+            "attempt_count": hint_context["attempt_count"] + 1
+        }))
+        if started:
+            context.hint_prefetches += 1
+
+
+_shared_orchestrator = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_orchestrator() -> MultiAgentOrchestrator:
+    """Process-wide orchestrator shared by all student sessions"""
+    global _shared_orchestrator
+    with _shared_lock:
+        if _shared_orchestrator is None:
+            _shared_orchestrator = MultiAgentOrchestrator()
+        return _shared_orchestrator
@@ -3,14 +3,20 @@ Code Review Agent
 Analyzes student code for logic errors, style issues, and suggests improvements.
 """
 
-import google.generativeai as genai
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
+from dataclasses import asdict
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tools.code_executor import SafeCodeExecutor
+from agents.review_schema import Review, ReviewIssue, IncrementalReviewParser, REVIEW_GENERATION_CONFIG
+from tools.code_fingerprint import fingerprint_code, execution_outcome, line_layout
+from tools.semantic_cache import shared_cache
+from tools.code_structure import split_top_level, diff_lines, changed_units, number_lines, CodeUnit
+from tools.telemetry import model_call_span, current_context, attached_context
+from agents.lazy_model import LazyModel
 
 load_dotenv()
 
@@ -19,14 +25,25 @@ class CodeReviewAgent:
     """
     Reviews student code and provides constructive feedback.
     Identifies errors, suggests improvements, but doesn't rewrite code.
+    Reviews are cached by (problem, code fingerprint, execution outcome), so
+    structurally equivalent submissions share one model call.
     """
-    def __init__(self):
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel(
-            'gemini-1.5-pro',
-            system_instruction=self._load_instruction()
-        )
+    # Above this share of changed lines a full review is cheaper to reason about
+    INCREMENTAL_MAX_CHANGED_RATIO = 0.6
+    MODEL_NAME = 'gemini-1.5-pro'
+    # Submissions this long are split into top-level chunks reviewed in parallel
+    CHUNKED_REVIEW_MIN_LINES = 150
+    CHUNK_TARGET_LINES = 80
+    
+    def __init__(self, cache=None, max_parallel_reviews: int = 4):
+        self.model = LazyModel(self.MODEL_NAME, self._load_instruction)
         self.executor = SafeCodeExecutor()
+        self.cache = cache if cache is not None else shared_cache
+        # Bounds concurrent model calls for chunked reviews
+        self._review_pool = ThreadPoolExecutor(
+            max_workers=max_parallel_reviews,
+            thread_name_prefix="review-chunk"
+        )
     
     def _load_instruction(self):
         return """You are the Code Review Agent in CodeMentor AI.
@@ -77,12 +94,20 @@ ALWAYS:
 - Point out what's right before what's wrong
 - Explain the reasoning behind feedback
 
-Respond in JSON format with: working_well (list), issues (list of dicts with line/issue/explanation), suggestions (list), overall_assessment (string)."""
+Respond in JSON format with: working_well (list), issues (list of dicts with line/issue/explanation), suggestions (list), overall_assessment (string).
+Use line 0 for issues that concern the whole program."""
     
-    def review_code(self, context: Dict) -> Dict:
+    def review_code(self, context: Dict, on_issue: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Review student's code and provide structured feedback.
         
+        If the context carries previous_code and previous_review, only the
+        functions changed since that attempt are sent to the model; earlier
+        issues in unchanged code are carried over with updated line numbers.
+        
+        on_issue, if given, is called in the caller's thread with each issue
+        as soon as it has been parsed from the streamed reply.
+        
         Returns:
             {
                 "working_well": List[str],
@@ -107,7 +132,43 @@ Respond in JSON format with: working_well (list), issues (list of dicts with lin
         if not execution_result:
             execution_result = self.executor.execute(code)
         
-        prompt = f"""Review this student code for the following problem:
+        emit = on_issue or (lambda issue: None)
+        # Issues cite line numbers, so only code laid out the same shares a review
+        cache_key = (problem, fingerprint_code(code), line_layout(code), execution_outcome(execution_result))
+        cached = self.cache.get("review", cache_key, source=code)
+        if cached is not None:
+            for issue in cached["issues"]:
+                emit(issue)
+            return cached
+        
+        review = self._review_incrementally(
+            problem, code, execution_result,
+            context.get('previous_code'), context.get('previous_review'), emit
+        )
+        if review is None and len(code.splitlines()) >= self.CHUNKED_REVIEW_MIN_LINES:
+            review = self._review_in_chunks(problem, code, execution_result, emit)
+        if review is None:
+            review = self._request_review(
+                self._full_review_prompt(problem, code, execution_result), emit
+            )
+        
+        if review is None:
+            return self._fallback_review(execution_result)
+        
+        review_dict = review.to_dict()
+        # Salvaged partial reviews are served once but not remembered
+        if review.complete:
+            self.cache.put("review", cache_key, review_dict, source=code)
+        return review_dict
+    
+    def _execution_summary(self, execution_result: Dict) -> str:
+        return f"""Execution result:
+- Success: {execution_result['success']}
+- Output: {execution_result.get('output', 'No output')}
+- Error: {execution_result.get('error', 'No errors')}"""
+    
+    def _full_review_prompt(self, problem: str, code: str, execution_result: Dict) -> str:
+        return f"""Review this student code for the following problem:
 
 Problem: {problem}
 
@@ -116,40 +177,199 @@ Student's code:
 {code}
 ```
 
-Execution result:
-- Success: {execution_result['success']}
-- Output: {execution_result.get('output', 'No output')}
-- Error: {execution_result.get('error', 'No errors')}
-
-Provide structured code review in JSON format:
-{{
-    "working_well": ["point 1", "point 2"],
-    "issues": [
-        {{"line": 3, "issue": "Description", "explanation": "Why it matters"}}
-    ],
-    "suggestions": ["suggestion 1"],
-    "overall_assessment": "Overall feedback"
-}}
-
-Respond with ONLY valid JSON, no markdown formatting."""
-        
-        try:
-            response = self.model.generate_content(prompt)
-            review_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if review_text.startswith('```'):
-                review_text = review_text.split('\n', 1)[1]
-                review_text = review_text.rsplit('```', 1)[0]
-            
-            review = json.loads(review_text)
-        except Exception as e:
-            # Fallback if JSON parsing fails
-            review = {
-                "working_well": ["Code structure is clear"] if execution_result['success'] else [],
-                "issues": [{"line": 0, "issue": execution_result.get('error', 'Unknown error'), "explanation": "Fix this error first"}] if not execution_result['success'] else [],
-                "suggestions": ["Keep refining your solution"],
-                "overall_assessment": "You're on the right track! Keep going."
-            }
+{self._execution_summary(execution_result)}
+
+Provide a structured code review: what is working well, issues (with line
+number, description and why it matters), suggestions and an overall assessment."""
+    
+    def _review_incrementally(self, problem: str, code: str, execution_result: Dict,
+                              previous_code: Optional[str], previous_review: Optional[Dict],
+                              emit: Callable[[Dict], None]) -> Optional[Review]:
+        """
+        Review only the units changed since the previous attempt.
+        Returns None when a full review is the better choice.
+        """
+        if not previous_code or not previous_review:
+            return None
+        old_units = split_top_level(previous_code)
+        new_units = split_top_level(code)
+        if not old_units or not new_units:
+            return None
+        
+        diff = diff_lines(previous_code, code)
+        changed = changed_units(old_units, new_units, diff)
+        changed_line_count = sum(unit.line_count for unit in changed)
+        total_line_count = sum(unit.line_count for unit in new_units)
+        if changed_line_count > total_line_count * self.INCREMENTAL_MAX_CHANGED_RATIO:
+            return None
         
+        # Earlier issues on lines that survived unchanged keep their verdict
+        carried_issues = []
+        for issue in previous_review.get('issues', []):
+            old_line = issue.get('line')
+            if not isinstance(old_line, int) or old_line not in diff.line_map:
+                continue
+            new_line = diff.line_map[old_line]
+            if any(unit.contains(new_line) for unit in changed):
+                continue
+            carried_issues.append(ReviewIssue.from_dict({**issue, "line": new_line}))
+        
+        if not changed:
+            review = Review(overall_assessment=previous_review.get("overall_assessment", ""))
+        else:
+            changed_code = "\n\n".join(
+                number_lines(unit.source, unit.start_line) for unit in changed
+            )
+            earlier_findings = "\n".join(
+                f"- Line {issue.line}: {issue.issue}" for issue in carried_issues
+            ) or "- None"
+            prompt = f"""You reviewed an earlier attempt at this problem. The student has since changed part of their code.
+
+Problem: {problem}
+
+Changed code only (line numbers are the real line numbers in the full program):
+```python
+{changed_code}
+```
+
+Earlier findings that still apply to the unchanged code:
+{earlier_findings}
+
+{self._execution_summary(execution_result)}
+
+Review ONLY the changed code shown above, using the real line numbers.
+The overall assessment should cover the whole attempt."""
+            review = self._request_review(prompt, emit)
+            if review is None:
+                return None
+        
+        # Carried issues go out only now: if the incremental call failed,
+        # the full review that follows reports them again itself
+        for issue in carried_issues:
+            emit(asdict(issue))
+        review.issues = carried_issues + review.issues
+        for key in ("working_well", "suggestions"):
+            merged = getattr(review, key)
+            merged += [item for item in previous_review.get(key, []) if item not in merged]
         return review
+    
+    def _chunk_units(self, units: List[CodeUnit]) -> List[List[CodeUnit]]:
+        """Group consecutive top-level units into chunks of about CHUNK_TARGET_LINES"""
+        chunks, current, current_lines = [], [], 0
+        for unit in units:
+            if current and current_lines + unit.line_count > self.CHUNK_TARGET_LINES:
+                chunks.append(current)
+                current, current_lines = [], 0
+            current.append(unit)
+            current_lines += unit.line_count
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _review_in_chunks(self, problem: str, code: str, execution_result: Dict,
+                          emit: Callable[[Dict], None]) -> Optional[Review]:
+        """
+        Review a long program chunk by chunk, concurrently, and merge the
+        results with issue lines mapped back to the full program.
+        Returns None if the code cannot be split or every chunk failed.
+        """
+        units = split_top_level(code)
+        if not units:
+            return None
+        chunks = self._chunk_units(units)
+        if len(chunks) < 2:
+            return None
+        
+        lines = code.splitlines()
+        outline = ", ".join(
+            f"{unit.kind} {unit.name}" for unit in units if unit.kind != "statement"
+        ) or "none"
+        
+        trace_context = current_context()
+        
+        def review_chunk(chunk: List[CodeUnit]) -> Optional[Review]:
+            with attached_context(trace_context):
+                return review_chunk_traced(chunk)
+        
+        def review_chunk_traced(chunk: List[CodeUnit]) -> Optional[Review]:
+            start, end = chunk[0].start_line, chunk[-1].end_line
+            source = "\n".join(lines[start - 1:end])
+            prompt = f"""You are reviewing one part (lines {start}-{end}) of a longer student program.
+
+Problem: {problem}
+
+Other top-level definitions in the program: {outline}
+
+Code part (line numbers count from 1 within this part):
+```python
+{number_lines(source)}
+```
+
+{self._execution_summary(execution_result)}
+
+Review ONLY this part. The overall assessment should cover this part."""
+            review = self._request_review(prompt)
+            if review is not None:
+                for issue in review.issues:
+                    if issue.line > 0:
+                        issue.line += start - 1
+            return review
+        
+        futures = [self._review_pool.submit(review_chunk, chunk) for chunk in chunks]
+        # Issues are emitted here, in the caller's thread, chunk by chunk
+        results = []
+        for future in futures:
+            review = future.result()
+            results.append(review)
+            if review is not None:
+                for issue in review.issues:
+                    emit(asdict(issue))
+        if all(review is None for review in results):
+            return None
+        
+        merged = Review(complete=all(review is not None and review.complete for review in results))
+        assessments = []
+        for review in results:
+            if review is None:
+                continue
+            merged.issues += review.issues
+            merged.working_well += [item for item in review.working_well if item not in merged.working_well]
+            merged.suggestions += [item for item in review.suggestions if item not in merged.suggestions]
+            if review.overall_assessment:
+                assessments.append(review.overall_assessment)
+        merged.overall_assessment = " ".join(assessments)
+        return merged
+    
+    def _request_review(self, prompt: str, emit: Optional[Callable[[Dict], None]] = None) -> Optional[Review]:
+        """
+        Ask the model for a schema-constrained review and parse the reply as
+        it streams in. If the finished reply does not validate, whatever
+        issues did parse are salvaged (complete=False). None if nothing usable.
+        """
+        parser = IncrementalReviewParser()
+        with model_call_span("review", self.MODEL_NAME, prompt) as span:
+            try:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=REVIEW_GENERATION_CONFIG,
+                    stream=True
+                )
+                for chunk in response:
+                    for issue in parser.feed(chunk.text):
+                        if emit is not None:
+                            emit(asdict(issue))
+                return parser.result()
+            except Exception as e:
+                salvaged = parser.salvage()
+                span.set_attribute("fallback", salvaged is None)
+                span.set_attribute("salvaged_issues", len(parser.issues))
+                return salvaged
+    
+    def _fallback_review(self, execution_result: Dict) -> Dict:
+        """Generic review used when the model reply cannot be parsed"""
+        return {
+            "working_well": ["Code structure is clear"] if execution_result['success'] else [],
+            "issues": [{"line": 0, "issue": execution_result.get('error', 'Unknown error'), "explanation": "Fix this error first"}] if not execution_result['success'] else [],
+            "suggestions": ["Keep refining your solution"],
+            "overall_assessment": "You're on the right track! Keep going."
+        }
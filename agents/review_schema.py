@@ -0,0 +1,208 @@
+"""
+Review Schema
+Validated review types, the response schema the reviewer model is
+constrained to, and an incremental parser for streamed review JSON.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+
+class ReviewValidationError(ValueError):
+    """Raised when model output does not match the review schema"""
+    pass
+
+
+# Gemini response_schema (OpenAPI subset) for structured review output
+REVIEW_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "working_well": {"type": "array", "items": {"type": "string"}},
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "line": {"type": "integer"},
+                    "issue": {"type": "string"},
+                    "explanation": {"type": "string"}
+                },
+                "required": ["line", "issue", "explanation"]
+            }
+        },
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+        "overall_assessment": {"type": "string"}
+    },
+    "required": ["working_well", "issues", "suggestions", "overall_assessment"]
+}
+
+REVIEW_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": REVIEW_RESPONSE_SCHEMA
+}
+
+
+def _string_list(data: Dict, key: str) -> List[str]:
+    value = data.get(key, [])
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ReviewValidationError(f"'{key}' must be a list, got {type(value).__name__}")
+    return [str(item) for item in value if str(item).strip()]
+
+
+@dataclass
+class ReviewIssue:
+    """One problem found in the student's code. line 0 means the whole program."""
+    line: int
+    issue: str
+    explanation: str = ""
+
+    @classmethod
+    def from_dict(cls, data) -> "ReviewIssue":
+        if not isinstance(data, dict):
+            raise ReviewValidationError(f"issue must be an object, got {type(data).__name__}")
+        if not str(data.get("issue", "")).strip():
+            raise ReviewValidationError("issue is missing its description")
+        line = data.get("line", 0)
+        try:
+            line = int(line)
+        except (TypeError, ValueError):
+            line = 0
+        return cls(line=max(line, 0), issue=str(data["issue"]),
+                   explanation=str(data.get("explanation", "")))
+
+
+@dataclass
+class Review:
+    """Structured code review as returned by CodeReviewAgent"""
+    working_well: List[str] = field(default_factory=list)
+    issues: List[ReviewIssue] = field(default_factory=list)
+    suggestions: List[str] = field(default_factory=list)
+    overall_assessment: str = ""
+    # False for reviews salvaged from a reply that did not fully validate
+    complete: bool = field(default=True, compare=False)
+
+    @classmethod
+    def from_dict(cls, data) -> "Review":
+        """Validate and normalize a decoded review"""
+        if not isinstance(data, dict):
+            raise ReviewValidationError(f"review must be an object, got {type(data).__name__}")
+        issues = data.get("issues", [])
+        if not isinstance(issues, list):
+            raise ReviewValidationError("'issues' must be a list")
+        return cls(
+            working_well=_string_list(data, "working_well"),
+            issues=[ReviewIssue.from_dict(issue) for issue in issues],
+            suggestions=_string_list(data, "suggestions"),
+            overall_assessment=str(data.get("overall_assessment", ""))
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "Review":
+        try:
+            return cls.from_dict(json.loads(_strip_fences(text)))
+        except json.JSONDecodeError as e:
+            raise ReviewValidationError(f"invalid JSON: {e}") from e
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        del data["complete"]
+        return data
+
+
+def _strip_fences(text: str) -> str:
+    """Drop markdown code fences around a JSON reply"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        text = text.rsplit('```', 1)[0]
+    return text
+
+
+class IncrementalReviewParser:
+    """
+    Consumes a streamed review reply chunk by chunk and surfaces each
+    entry of the top-level "issues" array as soon as its object closes.
+
+        parser = IncrementalReviewParser()
+        for chunk in response:
+            for issue in parser.feed(chunk.text):
+                show(issue)
+        review = parser.result()
+    """
+    def __init__(self):
+        self._text = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None
+        self._issues_depth = None   # depth of the "issues" array when inside it
+        self._issue_start = None    # offset of the issue object being read
+        self._offset = 0
+        self.issues: List[ReviewIssue] = []
+
+    def feed(self, chunk: str) -> List[ReviewIssue]:
+        """Add streamed text; returns issues completed by this chunk"""
+        completed = []
+        self._text.append(chunk)
+        buffer = None
+        for char in chunk:
+            position = self._offset
+            self._offset += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        buffer = buffer or "".join(self._text)
+                        self._last_key = buffer[self._string_start + 1:position]
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in '{[':
+                self._depth += 1
+                if char == '[' and self._depth == 2 and self._last_key == "issues":
+                    self._issues_depth = 2
+                elif char == '{' and self._issues_depth and self._depth == self._issues_depth + 1:
+                    self._issue_start = position
+            elif char in '}]':
+                if (char == '}' and self._issue_start is not None
+                        and self._depth == self._issues_depth + 1):
+                    buffer = "".join(self._text)
+                    issue = self._parse_issue(buffer[self._issue_start:position + 1])
+                    if issue is not None:
+                        self.issues.append(issue)
+                        completed.append(issue)
+                    self._issue_start = None
+                elif char == ']' and self._depth == self._issues_depth:
+                    self._issues_depth = None
+                self._depth -= 1
+        return completed
+
+    @staticmethod
+    def _parse_issue(text: str) -> Optional[ReviewIssue]:
+        try:
+            return ReviewIssue.from_dict(json.loads(text))
+        except (json.JSONDecodeError, ReviewValidationError):
+            return None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def result(self) -> Review:
+        """Validated full review; raises ReviewValidationError if unusable"""
+        return Review.from_json(self.text)
+
+    def salvage(self) -> Optional[Review]:
+        """Review built from the issues that did parse, if any"""
+        if not self.issues:
+            return None
+        return Review(issues=list(self.issues), complete=False)
@@ -0,0 +1,174 @@
+"""
+Session Event Log - append-only record of one tutoring session
+"""
+
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+import threading
+import time
+
+
+class SessionView(NamedTuple):
+    """Frozen copy of a SessionEventLog's views, for rendering"""
+    seq: int
+    turns: int
+    code_attempts: int
+    agent_mix: Dict[str, int]
+    concepts: Tuple[str, ...]
+    transcript: Tuple[Dict, ...]
+    code_history: Tuple[Dict, ...]
+
+    def attempt_numbers(self) -> range:
+        return range(1, self.turns + 1)
+
+
+class SessionEventLog:
+    """
+    Append-only event log for one session, with derived views kept up
+    to date on every append.
+
+    Event kinds:
+        "turn"      student message and code (message, code, attempt)
+        "response"  an agent's reply (agent, text)
+        "concept"   a concept covered for the first time (concept, attempt)
+        "gap"       a knowledge gap identified (concept)
+
+    Views (counts, turns, code_attempts, agent_mix, concepts,
+    concept_timeline, gaps, transcript, code_history) are cumulative and
+    read in O(1). The raw log keeps the last RETAIN events; views that
+    list items are bounded by their own limits, except the transcript,
+    which keeps every message so the chat can page back to the start.
+
+    Appends come from the worker thread running the session's turn;
+    other threads (the UI) read through view(), which copies the views
+    under the same lock instead of iterating them while they change.
+    """
+    RETAIN = 500
+    CODE_HISTORY_LIMIT = 20
+    GAPS_LIMIT = 50
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self.events = deque(maxlen=self.RETAIN)
+        # Sequence number of the last event; also a change counter
+        self.seq = 0
+        self.counts: Dict[str, int] = {}
+        self.turns = 0
+        self.code_attempts = 0
+        self.agent_mix: Dict[str, int] = {}
+        self.concept_timeline: List[Tuple[int, str]] = []
+        # Concepts in the order first seen, as a tuple callers can share
+        self.concepts: Tuple[str, ...] = ()
+        self._concepts = set()
+        self.gaps = deque(maxlen=self.GAPS_LIMIT)
+        self.transcript: List[Dict] = []
+        self.code_history = deque(maxlen=self.CODE_HISTORY_LIMIT)
+        self._lock = threading.Lock()
+        self._view = None
+
+    def append(self, kind: str, **data) -> Dict:
+        """Record an event and fold it into the views"""
+        if kind not in self._VIEWS:
+            raise ValueError(f"Unknown session event kind: {kind}")
+        with self._lock:
+            self.seq += 1
+            event = {"seq": self.seq, "kind": kind, "time": self._clock(), **data}
+            self.events.append(event)
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self._VIEWS[kind](self, event)
+        return event
+
+    def view(self) -> SessionView:
+        """Consistent copy of the views; the same object until the next append"""
+        with self._lock:
+            if self._view is None or self._view.seq != self.seq:
+                self._view = SessionView(
+                    seq=self.seq,
+                    turns=self.turns,
+                    code_attempts=self.code_attempts,
+                    agent_mix=dict(self.agent_mix),
+                    concepts=self.concepts,
+                    transcript=tuple(self.transcript),
+                    # Feedback is filled into the last entry after the fact
+                    code_history=tuple(dict(entry) for entry in self.code_history)
+                )
+            return self._view
+
+    def _on_turn(self, event: Dict):
+        self.turns += 1
+        event.setdefault("attempt", self.turns)
+        self.transcript.append({"seq": event["seq"], "agent": "student", "content": event.get("message", "")})
+        if event.get("code", "").strip():
+            self.code_attempts += 1
+            self.code_history.append({"attempt": event["attempt"], "code": event["code"], "agent_feedback": None})
+
+    def _on_response(self, event: Dict):
+        agent = event["agent"]
+        self.agent_mix[agent] = self.agent_mix.get(agent, 0) + 1
+        self.transcript.append({"seq": event["seq"], "agent": agent, "content": event.get("text", "")})
+        # The reply to a code submission is that attempt's feedback
+        if self.code_history and self.code_history[-1]["attempt"] == self.turns:
+            self.code_history[-1]["agent_feedback"] = agent
+
+    def _on_concept(self, event: Dict):
+        concept = event["concept"]
+        if concept not in self._concepts:
+            self._concepts.add(concept)
+            self.concept_timeline.append((event.get("attempt", self.turns), concept))
+            self.concepts += (concept,)
+
+    def _on_gap(self, event: Dict):
+        self.gaps.append(event["concept"])
+
+    _VIEWS = {"turn": _on_turn, "response": _on_response, "concept": _on_concept, "gap": _on_gap}
+
+    def attempt_numbers(self) -> range:
+        """Attempt number of every turn so far, including turns no longer retained"""
+        return range(1, self.turns + 1)
+
+    def has_concept(self, concept: str) -> bool:
+        return concept in self._concepts
+
+    def __len__(self) -> int:
+        return self.seq
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.events)
+
+    def since(self, seq: int) -> List[Dict]:
+        """Retained events after seq, for consumers catching up"""
+        return [event for event in self.events if event["seq"] > seq]
+
+    def to_state(self) -> Dict:
+        """Retained events and views as plain JSON types"""
+        return {
+            "events": list(self.events),
+            "seq": self.seq,
+            "counts": dict(self.counts),
+            "turns": self.turns,
+            "code_attempts": self.code_attempts,
+            "agent_mix": dict(self.agent_mix),
+            "concept_timeline": [list(item) for item in self.concept_timeline],
+            "gaps": list(self.gaps),
+            "transcript": list(self.transcript),
+            "code_history": list(self.code_history)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, clock=time.time) -> "SessionEventLog":
+        # Views are restored as saved rather than replayed: the retained
+        # events may no longer cover the whole session
+        log = cls(clock)
+        log.events.extend(state.get("events", []))
+        log.seq = state.get("seq", 0)
+        log.counts = dict(state.get("counts", {}))
+        log.turns = state.get("turns", 0)
+        log.code_attempts = state.get("code_attempts", 0)
+        log.agent_mix = dict(state.get("agent_mix", {}))
+        log.concept_timeline = [(attempt, concept) for attempt, concept in state.get("concept_timeline", [])]
+        log.concepts = tuple(concept for _, concept in log.concept_timeline)
+        log._concepts = set(log.concepts)
+        log.gaps.extend(state.get("gaps", []))
+        log.transcript.extend(state.get("transcript", []))
+        log.code_history.extend(state.get("code_history", []))
+        return log
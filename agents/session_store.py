@@ -0,0 +1,119 @@
+"""
+Session Store
+Holds the live AgentContext of every connected student so a single
+orchestrator can serve many sessions, evicting sessions that go idle.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from agents.a2a_protocol import AgentContext
+
+
+class _Session:
+    __slots__ = ("context", "lock", "last_seen")
+
+    def __init__(self, context: AgentContext, now: float):
+        self.context = context
+        self.lock = threading.RLock()
+        self.last_seen = now
+
+
+class SessionStore:
+    """
+    Thread-safe map of session id -> AgentContext with idle eviction.
+    Sessions are kept in last-access order, so eviction only looks at the
+    front of the map. A loader, if given, is asked for a saved context
+    before a new session is created from the factory; it runs outside the
+    store lock, so a slow restore does not hold up other sessions.
+    """
+    def __init__(self, factory: Callable[[], AgentContext] = AgentContext,
+                 idle_timeout: float = 1800.0,
+                 on_evict: Optional[Callable[[str, AgentContext], None]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 loader: Optional[Callable[[str], Optional[AgentContext]]] = None):
+        self.factory = factory
+        self.loader = loader
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, session_id: str) -> _Session:
+        now = self._clock()
+        with self._lock:
+            evicted = self._pop_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry.last_seen = now
+                self._sessions.move_to_end(session_id)
+        self._notify(evicted)
+        if entry is not None:
+            return entry
+
+        context = self.loader(session_id) if self.loader is not None else None
+        created = _Session(context or self.factory(), now)
+        with self._lock:
+            # Another thread may have created the session while we loaded it
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = created
+            else:
+                entry.last_seen = max(entry.last_seen, now)
+                self._sessions.move_to_end(session_id)
+        return entry
+
+    def get(self, session_id: str) -> AgentContext:
+        """Context for session_id, created on first use"""
+        return self._entry(session_id).context
+
+    def lock(self, session_id: str) -> threading.RLock:
+        """Lock serializing turns within one session"""
+        return self._entry(session_id).lock
+
+    def reset(self, session_id: str) -> AgentContext:
+        """
+        Replace the session's context with a fresh one. The session keeps
+        its lock, and the swap waits for a turn in progress to finish.
+        """
+        entry = self._entry(session_id)
+        with entry.lock:
+            entry.context = self.factory()
+            return entry.context
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _pop_idle(self, now: float) -> List:
+        evicted = []
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry.last_seen < self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            evicted.append((session_id, entry.context))
+        return evicted
+
+    def _notify(self, evicted: List):
+        if self.on_evict is not None:
+            for session_id, context in evicted:
+                self.on_evict(session_id, context)
+
+    def evict_idle(self) -> List[str]:
+        """Drop sessions idle for longer than idle_timeout; returns their ids"""
+        with self._lock:
+            evicted = self._pop_idle(self._clock())
+        self._notify(evicted)
+        return [session_id for session_id, _ in evicted]
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
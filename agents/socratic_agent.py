@@ -3,10 +3,13 @@ Socratic Questioning Agent
 Guides students through Socratic questioning, never giving answers.
 """
 
-import google.generativeai as genai
 from typing import Dict
 import os
+import sys
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.telemetry import model_call_span
+from agents.lazy_model import LazyModel
 
 load_dotenv()
 
@@ -16,12 +19,10 @@ class SocraticAgent:
     Asks Socratic questions to guide student's thinking.
     Never gives answers, only asks strategic questions.
     """
+    MODEL_NAME = 'gemini-2.0-flash-exp'
+    
     def __init__(self):
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel(
-            'gemini-2.0-flash-exp',
-            system_instruction=self._load_instruction()
-        )
+        self.model = LazyModel(self.MODEL_NAME, self._load_instruction)
     
     def _load_instruction(self):
         return """You are the Socratic Mentor in CodeMentor AI.
@@ -82,8 +83,10 @@ Examples of good Socratic questions:
 
 Respond with ONLY the question (1-2 sentences), nothing else. Be warm and encouraging!"""
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"Let's break this down: What's the first step you think you should take?"
+        with model_call_span("socratic", self.MODEL_NAME, prompt) as span:
+            try:
+                response = self.model.generate_content(prompt)
+                return response.text.strip()
+            except Exception as e:
+                span.set_attribute("fallback", True)
+                return f"Let's break this down: What's the first step you think you should take?"
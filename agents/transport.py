@@ -0,0 +1,376 @@
+"""
+A2A Transports
+Carries serialized AgentMessages between the orchestrator and agent
+workers running in other processes or on other hosts.
+
+Built-in transports:
+- MultiprocessingHub: one multiprocessing queue per role, for workers
+  forked from the app process
+- LocalBroker + SocketTransport: a small TCP broker routing length-prefixed
+  JSON frames by target role, for workers started anywhere
+"""
+
+import itertools
+import multiprocessing
+import queue
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agents.a2a_protocol import AgentMessage, AgentRole
+from agents.message_bus import AgentRequestError, agent_handler
+
+
+class Transport:
+    """Endpoint that receives messages addressed to one role"""
+    role: AgentRole
+
+    def send(self, message: AgentMessage):
+        raise NotImplementedError
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[AgentMessage]:
+        """Next message for this endpoint, or None on timeout"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# --- multiprocessing queues ---------------------------------------------------
+
+class MultiprocessingHub:
+    """
+    One inbox queue per role. Workers of the same role share an inbox, so
+    adding processes for a role spreads its load.
+    """
+    def __init__(self, roles=tuple(AgentRole)):
+        self._inboxes = {role: multiprocessing.Queue() for role in roles}
+
+    def endpoint(self, role: AgentRole) -> "MultiprocessingTransport":
+        return MultiprocessingTransport(role, self._inboxes)
+
+
+class MultiprocessingTransport(Transport):
+    def __init__(self, role: AgentRole, inboxes: Dict[AgentRole, "multiprocessing.Queue"]):
+        self.role = role
+        self._inboxes = inboxes
+
+    def send(self, message: AgentMessage):
+        self._inboxes[message.to_agent].put(message.to_json())
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[AgentMessage]:
+        try:
+            return AgentMessage.from_json(self._inboxes[self.role].get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+
+# --- socket broker -------------------------------------------------------------
+
+_HEADER = struct.Struct("!I")
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _recv_frame(sock: socket.socket) -> Optional[bytes]:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    return _recv_exact(sock, _HEADER.unpack(header)[0])
+
+
+class LocalBroker:
+    """
+    TCP broker on localhost. Each connection first sends its role name;
+    afterwards every frame is an AgentMessage routed to a connection of the
+    target role (round-robin when a role has several workers). Responses go
+    back to the connection that sent the request, so several app nodes can
+    share one broker. Requests for a role with no connection are answered
+    with an error response.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = socket.create_server((host, port))
+        self.address: Tuple[str, int] = self._server.getsockname()[:2]
+        self._connections: Dict[AgentRole, List[socket.socket]] = {}
+        self._round_robin: Dict[AgentRole, itertools.count] = {}
+        self._send_locks: Dict[socket.socket, threading.Lock] = {}
+        # request message_id -> connection awaiting the response
+        self._reply_to: Dict[str, socket.socket] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept_loop, name="a2a-broker", daemon=True)
+
+    def start(self) -> "LocalBroker":
+        self._thread.start()
+        return self
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        hello = _recv_frame(conn)
+        if hello is None:
+            conn.close()
+            return
+        role = AgentRole(hello.decode("utf-8"))
+        with self._lock:
+            self._connections.setdefault(role, []).append(conn)
+            self._round_robin.setdefault(role, itertools.count())
+            self._send_locks[conn] = threading.Lock()
+        try:
+            while True:
+                frame = _recv_frame(conn)
+                if frame is None:
+                    break
+                message = AgentMessage.from_json(frame.decode("utf-8"))
+                if message.message_type == "request":
+                    with self._lock:
+                        self._reply_to[message.message_id] = conn
+                self._route(message, frame)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._connections[role].remove(conn)
+                self._send_locks.pop(conn, None)
+                self._reply_to = {mid: c for mid, c in self._reply_to.items() if c is not conn}
+            conn.close()
+
+    def _route(self, message: AgentMessage, frame: bytes):
+        with self._lock:
+            target = self._reply_to.pop(message.correlation_id, None) if message.correlation_id else None
+            if target is None:
+                targets = self._connections.get(message.to_agent, [])
+                target = targets[next(self._round_robin[message.to_agent]) % len(targets)] if targets else None
+            send_lock = self._send_locks.get(target)
+        if target is None or send_lock is None:
+            if message.message_type == "request":
+                self._route(AgentMessage(
+                    from_agent=message.to_agent,
+                    to_agent=message.from_agent,
+                    message_type="error",
+                    content={"error": f"No worker connected for role '{message.to_agent.value}'"},
+                    correlation_id=message.message_id
+                ), None)
+            return
+        if frame is None:
+            frame = message.to_json().encode("utf-8")
+        try:
+            with send_lock:
+                _send_frame(target, frame)
+        except OSError:
+            pass
+
+    def close(self):
+        self._closed = True
+        self._server.close()
+        with self._lock:
+            for conns in self._connections.values():
+                for conn in conns:
+                    conn.close()
+
+
+class SocketTransport(Transport):
+    """Broker connection receiving the messages addressed to role"""
+    def __init__(self, address: Tuple[str, int], role: AgentRole):
+        self.role = role
+        self._sock = socket.create_connection(tuple(address))
+        self._send_lock = threading.Lock()
+        self._inbox = queue.Queue()
+        _send_frame(self._sock, role.value.encode("utf-8"))
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        try:
+            while True:
+                frame = _recv_frame(self._sock)
+                if frame is None:
+                    break
+                self._inbox.put(AgentMessage.from_json(frame.decode("utf-8")))
+        except OSError:
+            pass
+        self._inbox.put(None)
+
+    def send(self, message: AgentMessage):
+        with self._send_lock:
+            _send_frame(self._sock, message.to_json().encode("utf-8"))
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[AgentMessage]:
+        try:
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._sock.close()
+
+
+# --- workers and client ----------------------------------------------------------
+
+def default_handler_factory(role: AgentRole) -> Callable[[AgentMessage], Dict]:
+    """Build the real agent for role inside the worker process"""
+    if role == AgentRole.SOCRATIC:
+        from agents.socratic_agent import SocraticAgent as agent_class
+    elif role == AgentRole.HINT:
+        from agents.hint_agent import HintAgent as agent_class
+    elif role == AgentRole.REVIEW:
+        from agents.review_agent import CodeReviewAgent as agent_class
+    elif role == AgentRole.EXPLAINER:
+        from agents.explainer_agent import ConceptExplainerAgent as agent_class
+    else:
+        raise ValueError(f"No agent for role '{role.value}'")
+    return agent_handler(role, agent_class())
+
+
+class AgentWorker:
+    """Serves requests for one role from a transport until told to stop"""
+    def __init__(self, role: AgentRole, handler: Callable[[AgentMessage], Dict], transport: Transport):
+        self.role = role
+        self.handler = handler
+        self.transport = transport
+
+    def serve_forever(self, poll_interval: float = 0.5, stop_event: Optional[threading.Event] = None):
+        while stop_event is None or not stop_event.is_set():
+            message = self.transport.receive(timeout=poll_interval)
+            if message is None:
+                continue
+            if message.message_type == "shutdown":
+                break
+            try:
+                response = AgentMessage(
+                    from_agent=self.role,
+                    to_agent=message.from_agent,
+                    message_type="response",
+                    content=self.handler(message),
+                    correlation_id=message.message_id
+                )
+            except Exception as e:
+                response = AgentMessage(
+                    from_agent=self.role,
+                    to_agent=message.from_agent,
+                    message_type="error",
+                    content={"error": f"{type(e).__name__}: {e}"},
+                    correlation_id=message.message_id
+                )
+            self.transport.send(response)
+        self.transport.close()
+
+
+def run_agent_worker(role: AgentRole, transport_factory: Callable[[], Transport],
+                     handler_factory: Callable[[AgentRole], Callable] = default_handler_factory):
+    """Process entry point: connect, build the agent and serve"""
+    AgentWorker(role, handler_factory(role), transport_factory()).serve_forever()
+
+
+def start_worker_processes(transport_factories: Dict[AgentRole, Callable[[], Transport]],
+                           workers: Dict[AgentRole, int],
+                           handler_factory: Callable[[AgentRole], Callable] = default_handler_factory
+                           ) -> List[multiprocessing.Process]:
+    """Start workers[role] processes per role; factories must be picklable"""
+    processes = []
+    for role, count in workers.items():
+        for i in range(count):
+            process = multiprocessing.Process(
+                target=run_agent_worker,
+                args=(role, transport_factories[role], handler_factory),
+                name=f"a2a-{role.value}-{i}",
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+    return processes
+
+
+class RemoteAgentClient:
+    """
+    Orchestrator side of a transport. Offers the same request_sync() as
+    AgentMessageBus, so MultiAgentOrchestrator.attach_bus() accepts either.
+    """
+    def __init__(self, transport: Transport, request_timeout: float = 180.0):
+        self.transport = transport
+        self.request_timeout = request_timeout
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch_loop, name="a2a-client", daemon=True)
+            self._thread.start()
+
+    def _dispatch_loop(self):
+        while True:
+            message = self.transport.receive(timeout=1.0)
+            if message is None:
+                continue
+            with self._lock:
+                future = self._pending.pop(message.correlation_id, None)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+    def request_sync(self, to_agent: AgentRole, content: Dict, context: Optional[Dict] = None,
+                     timeout: Optional[float] = None) -> AgentMessage:
+        message = AgentMessage(
+            from_agent=self.transport.role,
+            to_agent=to_agent,
+            message_type="request",
+            content=content,
+            context=context
+        )
+        future = Future()
+        with self._lock:
+            self._pending[message.message_id] = future
+            stats = self._stats.setdefault(to_agent.value, {"in_flight": 0, "processed": 0, "failed": 0})
+            stats["in_flight"] += 1
+        try:
+            self.transport.send(message)
+            response = future.result(timeout=timeout or self.request_timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(message.message_id, None)
+                stats["in_flight"] -= 1
+        with self._lock:
+            stats["failed" if response.message_type == "error" else "processed"] += 1
+        if response.message_type == "error":
+            raise AgentRequestError(response.content.get("error", "Agent request failed"))
+        return response
+
+    def shutdown_workers(self, workers: Dict[AgentRole, int]):
+        """Ask workers[role] workers of each role to exit"""
+        for role, count in workers.items():
+            for _ in range(count):
+                self.transport.send(AgentMessage(
+                    from_agent=self.transport.role,
+                    to_agent=role,
+                    message_type="shutdown",
+                    content={}
+                ))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests in flight, processed and failed per agent role"""
+        with self._lock:
+            return {role: dict(s) for role, s in self._stats.items()}
@@ -4,10 +4,9 @@ Multi-Agent Programming Tutor
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -22,9 +21,15 @@ if not os.getenv('GOOGLE_API_KEY'):
     st.info("📝 Create a `.env` file in the project root with:\n```\nGOOGLE_API_KEY=your_key_here\n```")
     st.stop()
 
-from agents.orchestrator import MultiAgentOrchestrator
+from agents.orchestrator import get_shared_orchestrator
 from tools.code_executor import SafeCodeExecutor
-from visualization.learning_journey import create_learning_journey_graph, create_concept_mastery_chart
+from tools.job_queue import get_shared_job_queue, job_key
+from visualization.learning_journey import (
+    create_learning_journey_graph, create_concept_mastery_chart, create_agent_activity_chart
+)
+from visualization.journey_layout import JourneyLayout
+from visualization.figure_cache import figure_cache
+from visualization.chat_history import split_window, messages_html
 
 # Page configuration
 st.set_page_config(
@@ -163,13 +168,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+
+@st.cache_resource
+def load_orchestrator():
+    """One orchestrator per server process, shared by every student session"""
+    return get_shared_orchestrator()
+
+
+orchestrator = load_orchestrator()
+# Run Code and Submit for Review execute here, off the script thread
+jobs = get_shared_job_queue()
+# Seconds between status checks while a job is in flight
+JOB_POLL_INTERVAL = 1.0
+
 # Initialize session state
-if 'orchestrator' not in st.session_state:
-    st.session_state.orchestrator = MultiAgentOrchestrator()
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
-if 'code_history' not in st.session_state:
-    st.session_state.code_history = []
+if 'session_id' not in st.session_state:
+    # Kept in the URL so a restarted server can restore the student's snapshot
+    if "sid" not in st.query_params:
+        st.query_params["sid"] = uuid.uuid4().hex
+    st.session_state.session_id = st.query_params["sid"]
 if 'current_code' not in st.session_state:
     st.session_state.current_code = ""
 if 'current_problem' not in st.session_state:
@@ -178,10 +195,12 @@ if 'current_problem' not in st.session_state:
 - For multiples of 5, print "Buzz"
 - For multiples of both 3 and 5, print "FizzBuzz"
 - Otherwise, print the number"""
-if 'attempt_count' not in st.session_state:
-    st.session_state.attempt_count = 0
-if 'concepts_learned' not in st.session_state:
-    st.session_state.concepts_learned = set()
+
+# This student's context in the shared orchestrator. Review jobs append to
+# its event log from worker threads, so the page renders from one frozen
+# view of the transcript, code history and counters taken here
+session_context = orchestrator.get_context(st.session_state.session_id)
+session_events = session_context.events.view()
 
 # Header
 # Header with animated banner
@@ -214,32 +233,21 @@ with col_chat:
     # Chat container
     chat_container = st.container(height=400)
     with chat_container:
-        for msg in st.session_state.messages:
-            agent = msg.get("agent", "student")
-            
-            if agent == "student":
-                content = msg['content']
-                st.markdown(f"""
-                <div class="student-msg">
-                <strong>You:</strong> {content}
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                agent_names = {
-                    "socratic": "🤔 Socratic Mentor",
-                    "hint": "💡 Hint Provider",
-                    "reviewer": "✅ Code Reviewer",
-                    "explainer": "📚 Concept Explainer"
-                }
-                name = agent_names.get(agent, "AI Mentor")
-                content_html = msg['content'].replace('\n', '<br>')
-                
-                st.markdown(f"""
-                <div class="agent-card {agent}">
-                <strong>{name}:</strong><br>
-                {content_html}
-                </div>
-                """, unsafe_allow_html=True)
+        older_pages, recent = split_window(session_events.transcript)
+        # Older pages go out only once the student asks for them
+        shown = min(st.session_state.get("chat_pages_shown", 0), len(older_pages))
+        hidden = len(older_pages) - shown
+        if hidden:
+            def show_earlier():
+                st.session_state.chat_pages_shown = shown + 1
+            hidden_count = sum(len(page) for page in older_pages[:hidden])
+            st.button(f"⬆️ Show earlier messages ({hidden_count} hidden)",
+                      key="chat_earlier", on_click=show_earlier)
+        for page in older_pages[hidden:]:
+            with st.expander(f"🕘 Earlier conversation ({len(page)} messages)"):
+                st.markdown(messages_html(page), unsafe_allow_html=True)
+        if recent:
+            st.markdown(messages_html(recent), unsafe_allow_html=True)
     
     # Input area
     st.markdown("---")
@@ -252,57 +260,29 @@ with col_chat:
         reset_btn = st.button("🔄 Reset", key="reset_btn")
     
     if send_btn and user_input:
-        # Add user message
-        st.session_state.messages.append({
-            "agent": "student",
-            "content": user_input
-        })
-        
         # Update orchestrator context with current problem
-        st.session_state.orchestrator.context.current_problem = st.session_state.current_problem
+        session_context.current_problem = st.session_state.current_problem
         
         # Process with orchestrator
         with st.spinner("🤖 AI Mentors are thinking..."):
-            response = st.session_state.orchestrator.process_student_input(
+            orchestrator.process_student_input(
                 student_message=user_input,
-                code_attempt=st.session_state.current_code
+                code_attempt=st.session_state.current_code,
+                session_id=st.session_state.session_id
             )
         
-        # Add agent response
-        st.session_state.messages.append({
-            "agent": response["agent_used"],
-            "content": response["response"]
-        })
-        
-        # Save code to history if exists
-        if st.session_state.current_code.strip():
-            st.session_state.code_history.append({
-                "attempt": len(st.session_state.code_history) + 1,
-                "code": st.session_state.current_code,
-                "agent_feedback": response["agent_used"]
-            })
-            # Update attempt counter
-            st.session_state.attempt_count = len(st.session_state.code_history)
-        
-        # Update concepts learned
-        if "metadata" in response and "concept" in response.get("metadata", {}):
-            concept = response["metadata"]["concept"]
-            st.session_state.concepts_learned.add(concept)
-        
         st.rerun()
     
     if reset_btn:
-        # Complete reset of all session state
-        st.session_state.attempt_count = 0
-        st.session_state.concepts_learned = set()
-        st.session_state.messages = []
-        st.session_state.code_history = []
-        st.session_state.orchestrator = MultiAgentOrchestrator()
         st.session_state.current_code = ""
-        # Reset orchestrator context properly
-        st.session_state.orchestrator.context.attempt_count = 0
-        st.session_state.orchestrator.context.concepts_covered = []
-        st.session_state.orchestrator.context.session_history = []
+        st.session_state.chat_pages_shown = 0
+        # Jobs and node positions of the old session must not carry over
+        for state_key in ("run_job", "review_job", "journey_layout"):
+            st.session_state.pop(state_key, None)
+        # Fresh context (and event log) for this student in the shared orchestrator
+        orchestrator.reset_session(st.session_state.session_id)
+        # The new event log restarts its sequence, so cached versions are stale
+        figure_cache.drop(st.session_state.session_id)
         st.rerun()
 
 with col_code:
@@ -325,9 +305,64 @@ with col_code:
     with col_submit:
         submit_btn = st.button("📤 Submit for Review", key="submit_btn", type="primary")
     
+    session_id = st.session_state.session_id
+    
     if run_btn and code_input:
-        executor = SafeCodeExecutor()
-        result = executor.execute(code_input)
+        # Identical code already running for this student reuses that job
+        job = jobs.submit(
+            "run", lambda job: SafeCodeExecutor().execute(code_input),
+            key=job_key(session_id, "run", code_input), session_id=session_id
+        )
+        st.session_state.run_job = job.id
+    
+    if submit_btn and code_input:
+        # Update orchestrator context
+        session_context.current_problem = st.session_state.current_problem
+        
+        submitted_to = session_context
+        
+        def review(job):
+            # Still queued when the student pressed Reset: drop it rather
+            # than land the turn in the fresh session
+            if orchestrator.get_context(session_id) is not submitted_to:
+                return None
+            # Review issues are reported as they stream in, before the full response
+            return orchestrator.process_student_input(
+                student_message="Here's my code submission",
+                code_attempt=code_input,
+                on_review_issue=job.report,
+                session_id=session_id
+            )
+        
+        job = jobs.submit("review", review, key=job_key(session_id, "review", code_input),
+                          session_id=session_id)
+        st.session_state.review_job = job.id
+    
+    run_job = jobs.get(st.session_state.get("run_job"))
+    review_job = jobs.get(st.session_state.get("review_job"))
+    waiting = [job for job in (run_job, review_job) if job is not None and not job.finished]
+    
+    # Polls only while this student has work in flight; a finished job
+    # reruns the whole page so the chat and sidebar pick up the result
+    @st.fragment(run_every=JOB_POLL_INTERVAL if waiting else None)
+    def job_status():
+        for job in waiting:
+            if job.finished:
+                st.rerun()
+        if run_job is not None and not run_job.finished:
+            st.info("⏳ Running your code...")
+        if review_job is not None and not review_job.finished:
+            st.info("🤖 Reviewing your code...")
+            if review_job.progress:
+                st.markdown("⚠️ **Found so far:**\n" + "\n".join(
+                    f"- Line {issue.get('line', '?')}: {issue.get('issue', '')}"
+                    for issue in review_job.progress
+                ))
+    
+    job_status()
+    
+    if run_job is not None and run_job.finished:
+        result = run_job.result if run_job.status == "done" else {"success": False, "error": run_job.error}
         
         st.markdown("**Output:**")
         if result["success"]:
@@ -339,49 +374,16 @@ with col_code:
         else:
             st.error(f"❌ Error: {result['error']}")
     
-    if submit_btn and code_input:
-        # Update orchestrator context
-        st.session_state.orchestrator.context.current_problem = st.session_state.current_problem
-        
-        # Process with orchestrator
-        with st.spinner("🤖 Reviewing your code..."):
-            response = st.session_state.orchestrator.process_student_input(
-                student_message="Please review my code",
-                code_attempt=code_input
-            )
-        
-        # Add to messages
-        st.session_state.messages.append({
-            "agent": "student",
-            "content": "Here's my code submission"
-        })
-        st.session_state.messages.append({
-            "agent": response["agent_used"],
-            "content": response["response"]
-        })
-        
-        # Save to history
-        st.session_state.code_history.append({
-            "attempt": len(st.session_state.code_history) + 1,
-            "code": code_input,
-            "agent_feedback": response["agent_used"]
-        })
-        
-        # Update attempt counter
-        st.session_state.attempt_count = len(st.session_state.code_history)
-        
-        # Update concepts learned
-        if "metadata" in response and "concept" in response.get("metadata", {}):
-            concept = response["metadata"]["concept"]
-            st.session_state.concepts_learned.add(concept)
-        
-        st.rerun()
+    if review_job is not None and review_job.finished:
+        if review_job.status == "failed":
+            st.error(f"❌ Review failed: {review_job.error}")
+        st.session_state.review_job = None
     
     # Code history
-    if st.session_state.code_history:
+    if session_events.code_history:
         st.markdown("---")
         st.caption("📜 Code History")
-        for entry in reversed(st.session_state.code_history[-3:]):
+        for entry in session_events.code_history[:-4:-1]:
             with st.expander(f"Attempt {entry['attempt']} • Feedback by: {entry['agent_feedback']}"):
                 st.code(entry['code'], language="python")
 
@@ -390,8 +392,8 @@ with st.sidebar:
     st.header("📊 Your Learning Journey")
     
     # Stats
-    attempt_count = len(st.session_state.code_history)
-    concepts = st.session_state.orchestrator.context.concepts_covered
+    attempt_count = session_events.code_attempts
+    concepts = session_events.concepts
     
     # Metrics
     col_m1, col_m2 = st.columns(2)
@@ -418,38 +420,12 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 🤖 Agent Activity")
     
-    agent_counts = {}
-    for msg in st.session_state.messages:
-        agent = msg.get("agent", "student")
-        if agent != "student":
-            agent_counts[agent] = agent_counts.get(agent, 0) + 1
-    
-    if agent_counts:
-        # Create bar chart with dark mode compatible styling
-        fig = px.bar(
-            x=list(agent_counts.keys()),
-            y=list(agent_counts.values()),
-            labels={"x": "Agent", "y": "Count"},
-            color=list(agent_counts.keys()),
-            color_discrete_map={
-                "socratic": "#FF6B6B",
-                "hint": "#4ECDC4",
-                "reviewer": "#FFD93D",
-                "explainer": "#95E1D3"
-            }
-        )
-        fig.update_layout(
-            showlegend=False, 
-            height=180,
-            margin=dict(l=0, r=0, t=10, b=0),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(tickfont=dict(color='#E0E0E0', size=10), showgrid=False),
-            yaxis=dict(tickfont=dict(color='#E0E0E0', size=10), showgrid=False),
-            bargap=0.3
-        )
-        fig.update_traces(textposition='outside', textfont=dict(color='#E0E0E0', size=10))
-        st.plotly_chart(fig, key="agent_chart")
+    # Memoized figures hand st.plotly_chart the JSON payload cached with
+    # them (see visualization/figure_cache.py), so reruns skip re-encoding
+    if session_events.agent_mix:
+        st.plotly_chart(create_agent_activity_chart(session_events.agent_mix,
+                                                    cache_scope=st.session_state.session_id),
+                        key="agent_chart")
     
     # Learning tips
     st.markdown("---")
@@ -467,16 +443,27 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 🗺️ Learning Journey")
     if attempt_count > 0:
+        layout_mode = "timeline" if st.toggle("Timeline view", key="journey_timeline") else "spring"
+        # Node positions persist across reruns; only new nodes get placed
+        if st.session_state.get("journey_layout") is None or st.session_state.journey_layout.mode != layout_mode:
+            st.session_state.journey_layout = JourneyLayout(mode=layout_mode)
         journey_fig = create_learning_journey_graph(
-            st.session_state.orchestrator.context.session_history,
-            concepts
+            session_events.attempt_numbers(),
+            concepts,
+            layout=st.session_state.journey_layout,
+            cache_scope=st.session_state.session_id,
+            # Every turn, reply or concept bumps the event sequence
+            cache_version=(layout_mode, session_events.seq)
         )
         st.plotly_chart(journey_fig, key="journey_chart")
         
         # Concept Mastery
         if concepts:
             st.markdown("### 📈 Concept Mastery")
-            mastery_fig = create_concept_mastery_chart(concepts, attempt_count)
+            mastery_fig = create_concept_mastery_chart(
+                orchestrator.concept_mastery(st.session_state.session_id),
+                cache_scope=st.session_state.session_id
+            )
             st.plotly_chart(mastery_fig, key="mastery_chart")
     else:
         st.info("Start coding to see your learning journey map!")
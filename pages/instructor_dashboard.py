@@ -0,0 +1,74 @@
+"""
+CodeMentor AI - Instructor Dashboard
+Class-wide view of where students struggle
+"""
+
+import streamlit as st
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.orchestrator import get_shared_orchestrator
+from visualization.cohort_charts import (
+    create_concept_gap_heatmap, create_error_heatmap, create_hint_level_chart
+)
+
+st.set_page_config(page_title="CodeMentor AI - Instructor", page_icon="📊", layout="wide")
+
+
+@st.cache_resource
+def load_orchestrator():
+    """Same process-wide orchestrator the student app uses"""
+    return get_shared_orchestrator()
+
+
+cohort = load_orchestrator().memory.cohort
+
+st.title("📊 Instructor Dashboard")
+
+if not len(cohort):
+    st.info("No graded attempts yet. Charts appear once students submit code.")
+    st.stop()
+
+summary = cohort.problem_summary()
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Students", len(cohort.students))
+with col2:
+    st.metric("Graded attempts", len(cohort))
+with col3:
+    solved = sum(row["success_rate"] * row["attempts"] for row in summary)
+    st.metric("Success rate", f"{solved / len(cohort):.0%}")
+
+st.markdown("### 🧩 Problems")
+st.dataframe(
+    [{
+        "Problem": row["problem"],
+        "Students": row["students"],
+        "Attempts": row["attempts"],
+        "Success rate": f"{row['success_rate']:.0%}",
+        "Attempts to solve": f"{row['mean_attempts_to_solve']:.1f}" if row["mean_attempts_to_solve"] else "-"
+    } for row in summary],
+    hide_index=True
+)
+
+struggling = cohort.struggling_concepts()
+if struggling:
+    st.markdown("### 🚧 Concepts the class struggles with")
+    st.markdown(" · ".join(f"**{concept}** ({count})" for concept, count in struggling))
+
+col_left, col_right = st.columns(2)
+with col_left:
+    st.markdown("### Concept gaps by problem")
+    st.plotly_chart(create_concept_gap_heatmap(cohort), key="gap_heatmap")
+with col_right:
+    st.markdown("### Errors by problem")
+    st.plotly_chart(create_error_heatmap(cohort), key="error_heatmap")
+
+st.markdown("### 💡 Hint levels reached")
+st.plotly_chart(create_hint_level_chart(cohort), key="hint_chart")
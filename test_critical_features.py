@@ -194,7 +194,7 @@ def test_session_context():
     
     # Test concept tracking
     print("\n[Test 3b] Testing concept learning...")
-    orchestrator.context.concepts_covered = []
+    orchestrator.reset_session(orchestrator.DEFAULT_SESSION)
     # Trigger explainer for variable concept
     orchestrator.process_student_input("Test", "print(x)")
     concepts = orchestrator.context.concepts_covered
@@ -0,0 +1,70 @@
+"""
+Tests for the bounded AgentContext and its snapshots
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from agents.a2a_protocol import AgentContext, AgentMessage, AgentRole
+
+
+def test_history_is_bounded_and_summarized():
+    """Test that old turns are folded into history_summary"""
+    context = AgentContext()
+    total = AgentContext.HISTORY_LIMIT + 5
+    for attempt in range(1, total + 1):
+        entry = {"message": "", "code": "x = 1", "attempt": attempt}
+        context.record_turn(entry)
+        entry["review"] = {"issues": [{"line": 1}]}
+
+    assert len(context.session_history) == AgentContext.HISTORY_LIMIT
+    assert context.session_history[0]["attempt"] == 6
+    assert context.history_summary["turns"] == 5
+    assert context.history_summary["last_attempt"] == 5
+    assert context.history_summary["issues"] == 5
+    assert context.total_turns == total
+
+
+def test_snapshot_is_read_only_and_reused():
+    """Test that agents get an immutable view rebuilt only on change"""
+    context = AgentContext()
+    context.add_concept("loops")
+    snapshot = context.snapshot()
+
+    with pytest.raises(TypeError):
+        snapshot["attempt_count"] = 5
+    assert snapshot["concepts_covered"] == ("loops",)
+    assert context.snapshot() is snapshot
+
+    context.begin_turn("hi")
+    assert context.snapshot() is not snapshot
+    assert context.snapshot()["attempt_count"] == 1
+
+    before = context.snapshot()
+    context.add_concept("modulo")
+    assert context.snapshot() is not before
+
+
+def test_slots_and_plain_dict_copy():
+    """Test that unknown attributes are rejected and to_dict is detached"""
+    context = AgentContext()
+    with pytest.raises(AttributeError):
+        context.unknown_field = 1
+    context.add_gap("variables")
+    data = context.to_dict()
+    data["identified_gaps"].append("loops")
+    assert list(context.identified_gaps) == ["variables"]
+    assert context.add_concept("loops") and not context.add_concept("loops")
+
+
+def test_snapshot_serializes_in_messages():
+    """Test that snapshots survive the JSON transport encoding"""
+    context = AgentContext()
+    context.add_concept("loops")
+    message = AgentMessage(AgentRole.ORCHESTRATOR, AgentRole.HINT, "request",
+                           {"context": context.snapshot()})
+    decoded = AgentMessage.from_json(message.to_json())
+    assert decoded.content["context"]["concepts_covered"] == ["loops"]
@@ -0,0 +1,52 @@
+"""
+Tests for windowed chat history rendering
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.session_events import SessionEventLog
+from visualization.chat_history import (
+    split_window, messages_html, message_html, CHAT_WINDOW, PAGE_SIZE
+)
+
+
+def _transcript(turns):
+    log = SessionEventLog()
+    for turn in range(turns):
+        log.append("turn", message=f"question {turn}", code="")
+        log.append("response", agent="socratic", text=f"answer {turn}\nthink")
+    return log.transcript
+
+
+def test_recent_window_and_stable_pages():
+    """Test that pages keep their messages as the session grows"""
+    transcript = _transcript(30)
+    pages, recent = split_window(transcript)
+    assert len(recent) == CHAT_WINDOW
+    assert recent[-1]["content"] == "answer 29\nthink"
+    assert sum(len(page) for page in pages) == 60 - CHAT_WINDOW
+    assert all(len(page) <= PAGE_SIZE for page in pages)
+
+    longer_pages, _ = split_window(_transcript(40))
+    assert longer_pages[0] == pages[0]
+
+
+def test_short_transcripts_have_no_pages():
+    """Test that nothing is paged below the window size"""
+    pages, recent = split_window(_transcript(2))
+    assert pages == [] and len(recent) == 4
+    assert split_window([]) == ([], [])
+
+
+def test_html_is_rendered_once():
+    """Test message cards and groups come from the cache"""
+    message_html.cache_clear()
+    transcript = list(_transcript(3))
+    html = messages_html(transcript)
+    assert '<div class="student-msg"><strong>You:</strong> question 0</div>' in html
+    assert "🤔 Socratic Mentor" in html and "answer 0<br>think" in html
+    misses = message_html.cache_info().misses
+    assert messages_html(transcript) is html
+    assert message_html.cache_info().misses == misses == 6
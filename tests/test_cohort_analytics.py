@@ -0,0 +1,84 @@
+"""
+Tests for class-wide cohort analytics
+"""
+
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.cohort_analytics import CohortAnalytics, problem_label
+from visualization.cohort_charts import create_concept_gap_heatmap, create_hint_level_chart
+
+FIZZBUZZ = "Write a function fizzbuzz() that prints numbers from 1 to 100.\n- For multiples of 3..."
+PALINDROME = "Check whether a string is a palindrome"
+
+
+def test_rollups_follow_inserts():
+    """Test per-problem gap, error and hint rollups"""
+    cohort = CohortAnalytics(capacity=2)
+    cohort.record("alice", FIZZBUZZ, 1, "NameError", 0, "variables")
+    cohort.record("alice", FIZZBUZZ, 2, "", 2, "modulo")
+    cohort.record("bob", FIZZBUZZ, 1, "", 0, "", success=True)
+    cohort.record("bob", PALINDROME, 1, "IndexError", 1, "modulo")
+
+    problems, concepts, counts = cohort.concept_gap_matrix()
+    assert problems == [problem_label(FIZZBUZZ), PALINDROME]
+    assert dict(zip(concepts, counts[0])) == {"variables": 1, "modulo": 1}
+    assert dict(zip(concepts, counts[1])) == {"variables": 0, "modulo": 1}
+    _, errors, error_counts = cohort.error_matrix()
+    assert dict(zip(errors, error_counts[0])) == {"NameError": 1, "IndexError": 0}
+    _, hints = cohort.hint_level_matrix()
+    assert list(hints[0]) == [2, 0, 1, 0, 0]
+    assert cohort.struggling_concepts()[0] == ("modulo", 2)
+
+
+def test_problem_summary():
+    """Test distinct students, success rate and attempts to solve"""
+    cohort = CohortAnalytics()
+    for attempt in (1, 2, 3):
+        cohort.record("alice", FIZZBUZZ, attempt, success=attempt == 3)
+    cohort.record("bob", FIZZBUZZ, 1, success=True)
+    summary = cohort.problem_summary()[0]
+    assert summary["students"] == 2
+    assert summary["attempts"] == 4
+    assert summary["success_rate"] == 0.5
+    assert summary["mean_attempts_to_solve"] == 2.0
+
+
+def test_attempts_to_solve_counts_submissions_until_first_success():
+    """Test that resubmitting a solved problem and chat turns do not inflate it"""
+    cohort = CohortAnalytics()
+    for attempt in range(1, 5):
+        cohort.record("s", FIZZBUZZ, attempt, success=True)
+    assert cohort.problem_summary()[0]["mean_attempts_to_solve"] == 1.0
+    # Chat turns 4 and 9: the second submission on this problem
+    cohort.record("t", PALINDROME, 4)
+    cohort.record("t", PALINDROME, 9, success=True)
+    summary = cohort.problem_summary()[1]
+    assert summary["students"] == 1
+    assert summary["mean_attempts_to_solve"] == 2.0
+
+
+def test_dashboard_reads_stay_fast_at_scale():
+    """Test tens of thousands of attempts and memoized heatmaps"""
+    cohort = CohortAnalytics()
+    rng = np.random.default_rng(0)
+    gaps = ["", "modulo", "loops", "variables"]
+    for n in range(30000):
+        cohort.record(f"s{n % 500}", f"Problem {n % 12}", n // 500 + 1,
+                      ["", "NameError", "TypeError"][n % 3], int(rng.integers(0, 5)),
+                      gaps[n % 4], success=n % 7 == 0)
+    start = time.perf_counter()
+    cohort.problem_summary()
+    cohort.concept_gap_matrix()
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.2
+
+    heatmap = create_concept_gap_heatmap(cohort)
+    assert create_concept_gap_heatmap(cohort) is heatmap
+    cohort.record("s1", "Problem 1", 99, concept_gap="modulo")
+    assert create_concept_gap_heatmap(cohort) is not heatmap
+    assert len(create_hint_level_chart(cohort).data) == 5
@@ -0,0 +1,52 @@
+"""
+Regression tests for cold start: heavy modules and model clients load lazily
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import lazy_model
+from agents.lazy_model import LazyModel
+from tools.import_report import measure_imports, format_report
+
+
+def test_orchestrator_setup_loads_no_heavy_modules():
+    """Test that building the orchestrator and importing charts stays light"""
+    report = measure_imports(
+        "import agents.orchestrator as o, visualization.learning_journey, "
+        "visualization.cohort_charts, visualization.chat_history; o.get_shared_orchestrator()",
+        env={"GOOGLE_API_KEY": "dummy"}
+    )
+    assert report["heavy_loaded"] == []
+    assert any(m["name"] == "agents.orchestrator" for m in report["modules"])
+    assert "Heavy modules loaded: none" in format_report(report)
+
+
+def test_app_first_page_skips_model_sdk():
+    """Test the first page renders without the model SDK or networkx"""
+    report = measure_imports("import app", env={"GOOGLE_API_KEY": "dummy"})
+    # Streamlit itself imports plotly for st.plotly_chart
+    assert set(report["heavy_loaded"]) <= {"plotly"}
+
+
+def test_model_is_created_on_first_call(monkeypatch):
+    """Test LazyModel builds the client once, on first use"""
+    built = []
+
+    class FakeModel:
+        def __init__(self, name, system_instruction):
+            built.append((name, system_instruction))
+
+        def generate_content(self, prompt, **kwargs):
+            return prompt.upper()
+
+    class FakeGenai:
+        GenerativeModel = FakeModel
+
+    monkeypatch.setattr(lazy_model, "_genai", lambda: FakeGenai)
+    model = LazyModel("gemini-test", lambda: "be kind")
+    assert not model.loaded and built == []
+    assert model.generate_content("hi") == "HI"
+    assert model.generate_content("again") == "AGAIN"
+    assert built == [("gemini-test", "be kind")]
@@ -0,0 +1,78 @@
+"""
+Tests for the indexed concept mastery store
+"""
+
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tools.concept_mastery import ConceptMasteryIndex
+from tools.memory_manager import StudentMemoryManager
+
+
+def test_latest_value_per_student_and_concept():
+    """Test O(1) latest lookups and per-student isolation"""
+    memory = StudentMemoryManager()
+    memory.track_concept_mastery("modulo", 0.2, student_id="alice")
+    memory.track_concept_mastery("modulo", 0.6, student_id="alice")
+    memory.track_concept_mastery("modulo", 0.9, student_id="bob")
+    assert memory.get_concept_mastery("modulo", student_id="alice") == pytest.approx(0.6)
+    assert memory.get_concept_mastery("modulo", student_id="bob") == pytest.approx(0.9)
+    assert memory.get_concept_mastery("loops", student_id="alice") == 0.0
+
+
+def test_series_has_real_timestamps_and_trend():
+    """Test the time series and the per-hour slope"""
+    index = ConceptMasteryIndex()
+    for hour, value in enumerate([0.1, 0.3, 0.5]):
+        index.track("alice", "loops", value, timestamp=1000.0 + hour * 3600)
+    timestamps, values = index.series("alice", "loops")
+    assert list(timestamps) == [1000.0, 4600.0, 8200.0]
+    assert index.trend("alice", "loops") == pytest.approx(0.2)
+    assert list(index.series("alice", "loops", since=4600.0)[1]) == pytest.approx([0.3, 0.5])
+
+
+def test_cohort_queries_read_one_column():
+    """Test cohort mastery across many students, including growth"""
+    index = ConceptMasteryIndex(initial_students=2, initial_concepts=1)
+    for n in range(100):
+        index.track(f"student{n}", "modulo", n / 100)
+        if n % 2:
+            index.track(f"student{n}", "loops", 1.0)
+    cohort = index.cohort("modulo")
+    assert len(cohort) == 100 and cohort["student42"] == pytest.approx(0.42)
+    assert len(index.cohort("loops")) == 50
+    assert index.cohort_mean("modulo") == pytest.approx(0.495, abs=1e-3)
+    assert index.student("student1") == pytest.approx({"modulo": 0.01, "loops": 1.0})
+
+
+def test_reads_wait_for_growth():
+    """Test that a read of a just-interned student waits for the matrix to grow"""
+    index = ConceptMasteryIndex(initial_students=1, initial_concepts=1)
+    index.track("alice", "loops", 0.2)
+    interned, release = threading.Event(), threading.Event()
+    grow = index._ensure_shape
+
+    def slow_grow():
+        interned.set()
+        release.wait(5)
+        grow()
+
+    index._ensure_shape = slow_grow
+    writer = threading.Thread(target=index.track, args=("bob", "loops", 0.7))
+    writer.start()
+    interned.wait(5)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(
+        (index.latest("bob", "loops"), index.student("bob"), index.cohort("loops"))))
+    reader.start()
+    reader.join(0.1)
+    release.set()
+    writer.join()
+    reader.join()
+    latest, student, cohort = results[0]
+    assert latest == pytest.approx(0.7) and student == {"loops": pytest.approx(0.7)}
+    assert cohort == {"alice": pytest.approx(0.2), "bob": pytest.approx(0.7)}
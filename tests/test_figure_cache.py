@@ -0,0 +1,93 @@
+"""
+Tests for memoized sidebar figures
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualization.figure_cache import FigureCache, memoized_figure, figure_cache
+from visualization.learning_journey import (
+    create_learning_journey_graph, create_concept_mastery_chart, create_agent_activity_chart
+)
+from visualization.journey_layout import JourneyLayout
+
+
+def test_unchanged_inputs_reuse_the_figure():
+    """Test that reruns with the same inputs skip the builder"""
+    history = [{"attempt": 1, "code": "x = 1"}, {"attempt": 2, "code": "x = 2"}]
+    layout = JourneyLayout()
+    first = create_learning_journey_graph(history, ["loops"], layout=layout)
+    # Code edits don't change the journey figure
+    history[1]["code"] = "x = 3"
+    assert create_learning_journey_graph(history, ["loops"], layout=layout) is first
+    assert create_learning_journey_graph(history + [{"attempt": 3}], ["loops"], layout=layout) is not first
+
+
+def test_mastery_chart_keyed_on_displayed_values():
+    """Test that changes below display precision hit the cache"""
+    chart = create_concept_mastery_chart({"modulo": 0.5012})
+    assert create_concept_mastery_chart({"modulo": 0.5013}) is chart
+    assert create_concept_mastery_chart({"modulo": 0.62}) is not chart
+
+
+def test_sessions_do_not_evict_each_other():
+    """Test the per-session LRU bound and dropping a session's figures"""
+    cache = FigureCache(max_entries=2, max_scopes=2)
+    kept = cache.figure("k", lambda: object(), scope="alice")
+    for key in "abcdef":
+        cache.figure(key, lambda: object(), scope="bob")
+    assert cache.figure("k", lambda: object(), scope="alice") is kept
+    assert cache.stats()["entries"] == 3
+    # Bob's scope is the one idle longest
+    cache.figure("k", lambda: object(), scope="carol")
+    assert cache.stats()["scopes"] == 2
+    assert cache.figure("k", lambda: object(), scope="alice") is kept
+    cache.drop("alice")
+    assert cache.figure("k", lambda: None, scope="alice") is None
+
+
+def test_decorator_scope_and_version():
+    """Test cache_scope/cache_version arguments of memoized builders"""
+    built = []
+
+    @memoized_figure(lambda n: (n,))
+    def builder(n):
+        built.append(n)
+        return {"n": n}
+
+    builder(1), builder(1), builder(2)
+    assert built == [1, 2]
+    # Same inputs in another session are built for that session
+    builder(1, cache_scope="alice")
+    assert built == [1, 2, 1]
+    # A version stands in for the inputs
+    first = builder(3, cache_scope="alice", cache_version=7)
+    assert builder(4, cache_scope="alice", cache_version=7) is first
+    assert builder(4, cache_scope="alice", cache_version=8) == {"n": 4}
+    assert figure_cache.stats()["hits"] >= 2
+
+
+def test_rerun_renders_cached_payload(monkeypatch):
+    """Test that rendering an unchanged figure again does not serialize it"""
+    import plotly.io as pio
+    import plotly.tools
+    from plotly.basedatatypes import BaseFigure
+
+    serialized = []
+    to_dict = BaseFigure.to_dict
+    monkeypatch.setattr(BaseFigure, "to_dict", lambda self: serialized.append(1) or to_dict(self))
+
+    def render(fig):
+        # What st.plotly_chart does with a figure
+        return pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True),
+                           validate=False)
+
+    mix = {"hint": 3, "explainer": 1}
+    first = render(create_agent_activity_chart(mix, cache_scope="render-test"))
+    assert len(serialized) == 1
+    assert render(create_agent_activity_chart(dict(mix), cache_scope="render-test")) == first
+    assert len(serialized) == 1
+    payload = create_agent_activity_chart.payload(mix, cache_scope="render-test")
+    assert list(payload["data"][0]["y"]) == [3, 1]
+    assert create_agent_activity_chart.payload(mix, cache_scope="render-test") is payload
@@ -0,0 +1,110 @@
+"""
+Tests for speculative hint prefetching
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.hint_agent import HintAgent
+from tools.semantic_cache import SemanticCache
+
+
+class FakeModel:
+    """Stands in for the Gemini model and counts calls"""
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+        level = prompt.split("Hint difficulty level: ")[1].split("/")[0]
+
+        class Response:
+            text = f"hint at level {level}"
+        return Response()
+
+
+def make_agent():
+    agent = HintAgent(cache=SemanticCache())
+    agent.model = FakeModel()
+    return agent
+
+
+def test_hint_difficulty_levels():
+    """Test attempt-to-level mapping"""
+    assert HintAgent.hint_difficulty(1) == 1
+    assert HintAgent.hint_difficulty(3) == 2
+    assert HintAgent.hint_difficulty(5) == 3
+    assert HintAgent.hint_difficulty(9) == 4
+
+
+def test_prefetched_hint_is_reused():
+    """Test that a matching submission is served from the prefetch buffer"""
+    agent = make_agent()
+    context = {"current_problem": "FizzBuzz", "student_code": "print(1)",
+               "error_message": "NameError", "attempt_count": 2}
+    assert agent.prefetch_hint(context) == True
+    # Same state again is not fetched twice
+    assert agent.prefetch_hint(context) == False
+
+    hint = agent.generate_hint(context)
+    assert hint["hint"] == "hint at level 2"
+    assert hint["difficulty"] == 2
+    assert agent.model.calls == 1
+
+
+def test_changed_code_misses_prefetch():
+    """Test that a different submission does not use a stale hint"""
+    agent = make_agent()
+    context = {"current_problem": "FizzBuzz", "student_code": "print(1)",
+               "error_message": "NameError", "attempt_count": 4}
+    agent.prefetch_hint(context)
+    agent.generate_hint({**context, "student_code": "print(2)"})
+    assert agent.model.calls == 2
+
+
+def test_prefetch_buffer_is_bounded_per_session():
+    """Test that one session's speculative hints never evict another's"""
+    agent = make_agent()
+    agent.prefetch_hint({"session_id": "bob", "student_code": "y = 1", "attempt_count": 1})
+    for i in range(HintAgent.PREFETCH_PER_SESSION + 5):
+        agent.prefetch_hint({"session_id": "alice", "student_code": f"x = {i}", "attempt_count": 1})
+    assert len(agent._prefetched["alice"]) == HintAgent.PREFETCH_PER_SESSION
+    assert len(agent._prefetched["bob"]) == 1
+    agent.discard_prefetched("alice")
+    assert "alice" not in agent._prefetched
+
+
+def test_prefetched_hints_expire_with_attempts():
+    """Test that hints made for an earlier attempt are dropped once it has passed"""
+    agent = make_agent()
+    context = {"session_id": "alice", "current_problem": "FizzBuzz", "student_code": "print(1)",
+               "error_message": "NameError", "attempt_count": 2}
+    agent.prefetch_hint(context)
+    agent.prefetch_hint({**context, "student_code": "print(2)"})
+    # The student edited the code, so attempt 2 is answered without the buffer
+    agent.generate_hint({**context, "student_code": "print(3)"})
+    assert "alice" not in agent._prefetched
+    agent.prefetch_hint({**context, "attempt_count": 3})
+    agent.prefetch_hint({**context, "attempt_count": 5})
+    assert [attempt for attempt, _ in agent._prefetched["alice"].values()] == [5]
+
+
+def test_hint_cache_separates_execution_outcomes():
+    """Test that similar code with different output gets its own hint"""
+    agent = make_agent()
+    base = {"current_problem": "Count to 100", "error_message": "Code runs but may need improvement",
+            "attempt_count": 2}
+    short = {**base, "student_code": "for i in range(1, 100):\n    print(i)",
+             "execution_result": {"success": True, "output": "1..99"}}
+    full = {**base, "student_code": "for i in range(1, 101):\n    print(i)",
+            "execution_result": {"success": True, "output": "1..100"}}
+    agent.generate_hint(short)
+    agent.generate_hint(full)
+    assert agent.model.calls == 2
+    # Same structure and same output still share the cached hint
+    agent.generate_hint({**full, "student_code": "for n in range(1, 101):\n    print(n)"})
+    assert agent.model.calls == 2
@@ -0,0 +1,179 @@
+"""
+Tests for code structure diffing and incremental re-review
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.review_agent import CodeReviewAgent
+from tools.code_structure import split_top_level, diff_lines, changed_units
+from tools.semantic_cache import SemanticCache
+
+
+FIRST_ATTEMPT = """def is_fizz(n):
+    return n % 3 == 0
+
+def is_buzz(n):
+    return n / 5 == 0
+
+for i in range(1, 16):
+    print(i)
+"""
+
+# Only is_buzz changed
+SECOND_ATTEMPT = FIRST_ATTEMPT.replace("n / 5 == 0", "n % 5 == 0")
+
+
+class FakeModel:
+    """Returns a canned JSON review and records prompts"""
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        text = json.dumps(self.reply)
+
+        class Chunk:
+            def __init__(self, text):
+                self.text = text
+        # Streamed in small pieces, like the real API
+        return [Chunk(text[i:i + 7]) for i in range(0, len(text), 7)]
+
+
+def make_agent(reply):
+    agent = CodeReviewAgent(cache=SemanticCache())
+    agent.model = FakeModel(reply)
+    return agent
+
+
+def test_split_top_level():
+    """Test splitting into functions and statements"""
+    units = split_top_level(FIRST_ATTEMPT)
+    assert [(u.name, u.start_line, u.end_line) for u in units] == [
+        ("is_fizz", 1, 2), ("is_buzz", 4, 5), ("<module>", 7, 8)
+    ]
+    assert split_top_level("def broken(:") is None
+
+
+def test_changed_units():
+    """Test that only the edited function is reported"""
+    diff = diff_lines(FIRST_ATTEMPT, SECOND_ATTEMPT)
+    changed = changed_units(split_top_level(FIRST_ATTEMPT), split_top_level(SECOND_ATTEMPT), diff)
+    assert [u.name for u in changed] == ["is_buzz"]
+    assert diff.line_map[8] == 8
+
+
+def test_incremental_review_sends_only_changed_code():
+    """Test prompt contents and issue carry-over"""
+    agent = make_agent({"working_well": ["Uses modulo now"], "issues": [],
+                        "suggestions": [], "overall_assessment": "Better"})
+    previous_review = {
+        "working_well": ["Clear function names"],
+        "issues": [
+            {"line": 5, "issue": "Division instead of modulo", "explanation": "Use %"},
+            {"line": 8, "issue": "Prints numbers only", "explanation": "Add Fizz/Buzz"},
+            {"line": "?", "issue": "Static check", "explanation": ""},
+        ],
+        "suggestions": [],
+        "overall_assessment": "Getting there"
+    }
+    review = agent.review_code({
+        "student_code": SECOND_ATTEMPT,
+        "current_problem": "FizzBuzz",
+        "execution_result": {"success": True, "output": "1\n", "error": ""},
+        "previous_code": FIRST_ATTEMPT,
+        "previous_review": previous_review,
+    })
+
+    prompt = agent.model.prompts[0]
+    assert "def is_buzz" in prompt
+    assert "def is_fizz" not in prompt
+    assert "Prints numbers only" in prompt
+    # The fixed issue is dropped, the untouched one carried over
+    assert [i["issue"] for i in review["issues"]] == ["Prints numbers only"]
+    assert review["working_well"] == ["Uses modulo now", "Clear function names"]
+
+
+def test_failed_incremental_review_does_not_repeat_issues():
+    """Test that issues streamed before a failed incremental call are not sent twice"""
+    reply = {"working_well": [], "suggestions": [], "overall_assessment": "Full review",
+             "issues": [{"line": 8, "issue": "Prints numbers only", "explanation": "Add Fizz/Buzz"}]}
+    agent = make_agent(reply)
+    full_review = agent.model.generate_content
+
+    def flaky(prompt, **kwargs):
+        # The incremental call fails; the full review that follows succeeds
+        if "changed part of their code" in prompt:
+            agent.model.prompts.append(prompt)
+            raise RuntimeError("model unavailable")
+        return full_review(prompt, **kwargs)
+
+    agent.model.generate_content = flaky
+    streamed = []
+    review = agent.review_code({
+        "student_code": SECOND_ATTEMPT,
+        "current_problem": "FizzBuzz",
+        "execution_result": {"success": True, "output": "1\n", "error": ""},
+        "previous_code": FIRST_ATTEMPT,
+        "previous_review": {"issues": [{"line": 8, "issue": "Prints numbers only", "explanation": ""}]},
+    }, on_issue=streamed.append)
+    assert len(agent.model.prompts) == 2
+    assert [issue["issue"] for issue in streamed] == ["Prints numbers only"]
+    assert review["overall_assessment"] == "Full review"
+
+
+def test_full_review_without_history():
+    """Test that a first attempt gets the full program"""
+    agent = make_agent({"working_well": [], "issues": [], "suggestions": [], "overall_assessment": ""})
+    agent.review_code({
+        "student_code": FIRST_ATTEMPT,
+        "current_problem": "FizzBuzz",
+        "execution_result": {"success": True, "output": "", "error": ""},
+    })
+    assert "def is_fizz" in agent.model.prompts[0]
+
+
+def make_long_program(functions=20, body_lines=8):
+    parts = []
+    for f in range(functions):
+        body = "\n".join(f"    x{i} = {i}" for i in range(body_lines - 1))
+        parts.append(f"def step_{f}():\n{body}\n    return x0\n")
+    return "\n".join(parts)
+
+
+def test_chunked_review_maps_lines_globally():
+    """Test that long code is reviewed in chunks with global line numbers"""
+    agent = make_agent({"working_well": ["Small functions"],
+                        "issues": [{"line": 2, "issue": "Unused variable", "explanation": ""}],
+                        "suggestions": [], "overall_assessment": "OK"})
+    code = make_long_program()
+    assert len(code.splitlines()) >= CodeReviewAgent.CHUNKED_REVIEW_MIN_LINES
+
+    review = agent.review_code({
+        "student_code": code,
+        "current_problem": "Steps",
+        "execution_result": {"success": True, "output": "", "error": ""},
+    })
+
+    prompts = agent.model.prompts
+    assert len(prompts) > 1
+    chunk_starts = sorted(int(p.split("(lines ")[1].split("-")[0]) for p in prompts)
+    assert [i["line"] for i in review["issues"]] == [start + 1 for start in chunk_starts]
+    assert review["working_well"] == ["Small functions"]
+    assert all(code.splitlines()[i["line"] - 1].startswith("    x0") for i in review["issues"])
+
+
+def test_cached_review_not_served_to_shifted_code():
+    """Test that a review citing line numbers is not reused after code moves"""
+    reply = {"working_well": [], "issues": [{"line": 5, "issue": "Use %", "explanation": ""}],
+             "suggestions": [], "overall_assessment": "ok"}
+    agent = make_agent(reply)
+    agent.review_code({"student_code": FIRST_ATTEMPT, "current_problem": "p"})
+    shifted = "# my solution\n# attempt 2\n" + FIRST_ATTEMPT
+    reply["issues"][0]["line"] = 7
+    review = agent.review_code({"student_code": shifted, "current_problem": "p"})
+    assert len(agent.model.prompts) == 2
+    assert review["issues"][0]["line"] == 7
@@ -0,0 +1,86 @@
+"""
+Tests for the background job queue
+"""
+
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.job_queue import JobQueue, job_key, DONE, FAILED
+from tools.code_executor import SafeCodeExecutor
+
+
+def test_submit_returns_immediately_and_finishes():
+    """Test that jobs run in the background and keep their result"""
+    queue = JobQueue(workers=2)
+    release = threading.Event()
+
+    def work(job):
+        job.report("started")
+        release.wait(5)
+        return 42
+
+    job = queue.submit("run", work, key=job_key("alice", "run", "x"), session_id="alice")
+    assert not job.finished
+    assert queue.pending("alice") == [job] and queue.pending("bob") == []
+    release.set()
+    assert queue.wait(job.id, timeout=5).status == DONE
+    assert job.result == 42 and job.progress == ["started"]
+    assert queue.pending() == []
+    queue.shutdown()
+
+
+def test_identical_in_flight_submissions_are_deduplicated():
+    """Test that a double click reuses the in-flight job"""
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+    calls = []
+
+    def work(job):
+        calls.append(job.id)
+        release.wait(5)
+
+    key = job_key("alice", "review", "print(1)")
+    first = queue.submit("review", work, key=key)
+    assert queue.submit("review", work, key=key) is first
+    other = queue.submit("review", work, key=job_key("alice", "review", "print(2)"))
+    assert other is not first
+    release.set()
+    queue.wait(first.id, 5)
+    queue.wait(other.id, 5)
+    assert calls == [first.id, other.id]
+    # Once finished, the same submission runs again
+    again = queue.submit("review", lambda job: None, key=key)
+    assert again is not first
+    queue.wait(again.id, 5)
+    assert queue.stats()["deduplicated"] == 1
+    queue.shutdown()
+
+
+def test_failures_and_retention():
+    """Test that errors are captured and old finished jobs dropped"""
+    queue = JobQueue(workers=1, max_finished=2)
+
+    def fail(job):
+        raise RuntimeError("model unavailable")
+
+    failed = queue.submit("review", fail)
+    queue.wait(failed.id, 5)
+    assert failed.status == FAILED and "model unavailable" in failed.error
+    for _ in range(2):
+        queue.wait(queue.submit("run", lambda job: None).id, 5)
+    assert queue.get(failed.id) is None
+    assert queue.stats()["failed"] == 1
+    queue.shutdown()
+
+
+def test_concurrent_runs_keep_their_own_output():
+    """Test that sandbox runs on the pool don't mix their output"""
+    queue = JobQueue(workers=4)
+    runs = [queue.submit("run", lambda job, n=n: SafeCodeExecutor().execute(f"for i in range(200): print({n})"))
+            for n in range(4)]
+    for n, job in enumerate(runs):
+        output = queue.wait(job.id, 10).result["output"]
+        assert set(output.split()) == {str(n)}
+    queue.shutdown()
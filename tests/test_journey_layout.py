@@ -0,0 +1,93 @@
+"""
+Tests for the cached, incremental learning-journey layout
+"""
+
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+import pytest
+
+from agents.a2a_protocol import AgentContext
+from visualization.journey_layout import JourneyLayout
+from visualization.learning_journey import create_learning_journey_graph
+
+
+def journey(attempts, concepts=()):
+    G = nx.DiGraph()
+    for i in range(attempts):
+        G.add_node(f"Attempt {i+1}", type="attempt", index=i)
+    for concept in concepts:
+        G.add_node(concept, type="concept")
+    for i in range(attempts - 1):
+        G.add_edge(f"Attempt {i+1}", f"Attempt {i+2}")
+    for i, concept in enumerate(concepts):
+        G.add_edge(concept, f"Attempt {min(i + 2, attempts)}")
+    return G
+
+
+@pytest.mark.parametrize("mode", JourneyLayout.MODES)
+def test_existing_nodes_keep_their_positions(mode):
+    """Test that growing the graph only adds positions"""
+    layout = JourneyLayout(mode=mode)
+    before = dict(layout.positions_for(journey(3, ["loops"])))
+    after = layout.positions_for(journey(4, ["loops", "modulo"]))
+    for node, position in before.items():
+        assert after[node] == position
+    assert {"Attempt 4", "modulo"} <= set(after)
+    assert after["Attempt 4"] != after["Attempt 3"]
+
+
+def test_timeline_is_deterministic():
+    """Test attempt order along x and concepts above their attempt"""
+    positions = JourneyLayout(mode="timeline").positions_for(journey(3, ["loops"]))
+    assert [positions[f"Attempt {i}"][0] for i in (1, 2, 3)] == [0.0, 1.0, 2.0]
+    assert positions["loops"] == (1.0, 1.0)
+
+
+def test_incremental_cost_stays_flat():
+    """Test that one new node costs about the same on a long history"""
+    layout = JourneyLayout()
+    layout.positions_for(journey(20))
+    for attempts in range(21, 300):
+        layout.positions_for(journey(attempts))
+    start = time.perf_counter()
+    layout.positions_for(journey(300))
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.1
+
+
+def test_figure_uses_session_layout():
+    """Test that the builder reads positions from the given layout"""
+    layout = JourneyLayout(mode="timeline")
+    history = [{"attempt": i} for i in (1, 2, 3)]
+    create_learning_journey_graph(history, ["loops"], layout=layout)
+    assert layout.positions["Attempt 3"] == (2.0, 0.0)
+
+
+def test_long_history_serializes_small():
+    """Test fixed trace count and payload size for thousands of attempts"""
+    history = [{"attempt": i} for i in range(1, 5001)]
+    fig = create_learning_journey_graph(history, ["loops", "modulo"], layout=JourneyLayout(mode="timeline"))
+    assert len(fig.data) == 4
+    labels = list(fig.data[1].text)
+    assert labels == ["4–4980"]
+    assert len(fig.to_json()) < 20000
+    assert fig.data[0].x.count(None) == len(fig.data[0].x) // 3
+
+
+def test_app_input_collapses_long_sessions():
+    """Test the journey built the way app.py does, from every attempt of a session"""
+    context = AgentContext()
+    for attempt in range(1, 61):
+        context.begin_turn("", f"x = {attempt}")
+    context.add_concept("loops")
+    attempts = context.events.attempt_numbers()
+    assert len(context.session_history) == AgentContext.HISTORY_LIMIT
+    assert list(attempts) == list(range(1, 61))
+    fig = create_learning_journey_graph(attempts, context.concepts_covered,
+                                        layout=JourneyLayout(mode="timeline"))
+    assert list(fig.data[1].text) == ["4–40"]
+    assert list(fig.data[2].text)[-1] == "#60"
@@ -0,0 +1,64 @@
+"""
+Tests for Bayesian knowledge tracing
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from tools.knowledge_tracing import KnowledgeTracer, BKTParams
+
+
+def test_single_update_matches_bkt_formula():
+    """Test one correct and one incorrect observation against hand math"""
+    tracer = KnowledgeTracer({"loops": BKTParams(p_init=0.5, p_transit=0.1, p_slip=0.1, p_guess=0.2)})
+    posterior = 0.5 * 0.9 / (0.5 * 0.9 + 0.5 * 0.2)
+    assert tracer.observe("alice", "loops", True) == pytest.approx(posterior + (1 - posterior) * 0.1)
+
+    known = tracer.mastery("alice", "loops")
+    posterior = known * 0.1 / (known * 0.1 + (1 - known) * 0.8)
+    assert tracer.observe("alice", "loops", False) == pytest.approx(posterior + (1 - posterior) * 0.1)
+
+
+def test_batch_equals_sequential_updates():
+    """Test that repeated pairs in one batch are applied in order"""
+    events = [("alice", "modulo", False), ("bob", "modulo", True), ("alice", "modulo", True),
+              ("alice", "loops", True), ("alice", "modulo", True), ("bob", "modulo", False)]
+    batched = KnowledgeTracer()
+    batched.observe_batch(events)
+    sequential = KnowledgeTracer()
+    for event in events:
+        sequential.observe(*event)
+    for student, concept in [("alice", "modulo"), ("alice", "loops"), ("bob", "modulo")]:
+        assert batched.mastery(student, concept) == pytest.approx(sequential.mastery(student, concept))
+
+
+def test_cohort_matrix_grows_and_uses_priors():
+    """Test a cohort-wide pass and priors for untouched pairs"""
+    tracer = KnowledgeTracer(initial_students=2, initial_concepts=1)
+    tracer.observe_batch((f"s{n}", "modulo", n % 2 == 0) for n in range(200))
+    tracer.observe("s0", "loops", True)
+    students, concepts, matrix = tracer.mastery_matrix()
+    assert matrix.shape == (200, 2)
+    assert concepts == ["modulo", "loops"]
+    assert np.all(matrix[::2, 0] > matrix[1::2, 0])
+    assert matrix[1, 1] == pytest.approx(BKTParams().p_init)
+
+
+def test_orchestrator_records_mastery():
+    """Test that turn evidence reaches the tracer and the memory index"""
+    from agents.orchestrator import MultiAgentOrchestrator
+
+    orchestrator = MultiAgentOrchestrator(memory_path="")
+    context = orchestrator.get_context("alice")
+    context.add_concept("modulo")
+    orchestrator._trace_knowledge("alice", [("modulo", False)])
+    low = orchestrator.concept_mastery("alice")["modulo"]
+    orchestrator._trace_knowledge("alice", [("modulo", True), ("modulo", True)])
+    assert orchestrator.concept_mastery("alice")["modulo"] > low
+    assert orchestrator.memory.get_concept_mastery("modulo", student_id="alice") == pytest.approx(
+        orchestrator.concept_mastery("alice")["modulo"]
+    )
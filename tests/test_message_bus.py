@@ -0,0 +1,139 @@
+"""
+Tests for the in-process A2A message bus
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.a2a_protocol import AgentRole
+from agents.message_bus import AgentMessageBus, BusFullError, AgentRequestError
+from agents.orchestrator import MultiAgentOrchestrator
+
+
+def echo(message):
+    return {"echo": message.content["value"]}
+
+
+def test_request_response_correlation():
+    """Test that responses are matched to their requests"""
+    bus = AgentMessageBus()
+    bus.register(AgentRole.HINT, echo, workers=2)
+    bus.start()
+    try:
+        results = {}
+
+        def ask(i):
+            results[i] = bus.request_sync(AgentRole.HINT, {"value": i})
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for i, response in results.items():
+            assert response.content == {"echo": i}
+            assert response.message_type == "response"
+            assert response.from_agent == AgentRole.HINT
+        assert bus.stats()["hint"]["processed"] == 10
+    finally:
+        bus.stop()
+
+
+def test_worker_pool_runs_in_parallel():
+    """Test that a role with N workers handles N requests at once"""
+    def slow(message):
+        time.sleep(0.3)
+        return {}
+
+    bus = AgentMessageBus()
+    bus.register(AgentRole.REVIEW, slow, workers=4)
+    bus.start()
+    try:
+        threads = [threading.Thread(target=bus.request_sync, args=(AgentRole.REVIEW, {}))
+                   for _ in range(4)]
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert time.time() - start < 1.0
+    finally:
+        bus.stop()
+
+
+def test_backpressure_when_queue_is_full():
+    """Test that a full queue rejects new work after the enqueue timeout"""
+    release = threading.Event()
+
+    def blocked(message):
+        release.wait()
+        return {}
+
+    bus = AgentMessageBus(enqueue_timeout=0.2)
+    bus.register(AgentRole.REVIEW, blocked, workers=1, max_queue_size=1)
+    bus.start()
+    try:
+        # One request in the worker, one waiting in the queue
+        waiting = [threading.Thread(target=bus.request_sync, args=(AgentRole.REVIEW, {}))
+                   for _ in range(2)]
+        for t in waiting:
+            t.start()
+            time.sleep(0.1)
+        assert bus.queue_depths() == {"review": 1}
+        with pytest.raises(BusFullError):
+            bus.request_sync(AgentRole.REVIEW, {})
+        release.set()
+        for t in waiting:
+            t.join()
+    finally:
+        release.set()
+        bus.stop()
+
+
+def test_handler_errors_are_returned():
+    """Test that a failing handler raises on the requesting side"""
+    def broken(message):
+        raise ValueError("boom")
+
+    bus = AgentMessageBus()
+    bus.register(AgentRole.SOCRATIC, broken)
+    bus.start()
+    try:
+        with pytest.raises(AgentRequestError, match="boom"):
+            bus.request_sync(AgentRole.SOCRATIC, {})
+        assert bus.stats()["socratic"]["failed"] == 1
+    finally:
+        bus.stop()
+
+
+def test_orchestrator_routes_agents_through_bus():
+    """Test orchestrator agent calls travel over the bus"""
+    orchestrator = MultiAgentOrchestrator(memory_path="", snapshot_dir="")
+    bus = orchestrator.attach_bus()
+    try:
+        # Pre-loaded concepts need no model call
+        explanation = orchestrator._call_agent(AgentRole.EXPLAINER, "explain_concept", concept_name="modulo")
+        assert "Modulo" in explanation
+        assert orchestrator.bus_stats()["explainer"]["processed"] == 1
+        assert orchestrator.bus_stats()["review"]["workers"] == 4
+        with pytest.raises(AgentRequestError):
+            orchestrator._call_agent(AgentRole.EXPLAINER, "_load_concepts")
+    finally:
+        bus.stop()
+
+
+def test_bus_enabled_by_setting(monkeypatch):
+    """Test CODEMENTOR_AGENT_BUS attaching the bus at construction"""
+    monkeypatch.setenv("CODEMENTOR_AGENT_BUS", "1")
+    orchestrator = MultiAgentOrchestrator(memory_path="", snapshot_dir="")
+    try:
+        assert orchestrator.bus is not None and orchestrator.bus.running
+        orchestrator._call_agent(AgentRole.EXPLAINER, "explain_concept", concept_name="modulo")
+        assert orchestrator.bus_stats()["explainer"]["processed"] == 1
+    finally:
+        orchestrator.bus.stop()
+    assert MultiAgentOrchestrator(memory_path="", snapshot_dir="", agent_bus=False).bus is None
@@ -0,0 +1,92 @@
+"""
+Tests for the pipeline metrics registry
+"""
+
+import urllib.request
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tools.metrics import (
+    MetricsRegistry, AGENT_CALLS, AGENT_FALLBACKS, SANDBOX_TIMEOUTS, CACHE_HIT_RATIO,
+    serve_metrics
+)
+from tools.telemetry import model_call_span
+from tools.semantic_cache import SemanticCache
+
+
+def test_histogram_exposition_and_quantile():
+    """Test cumulative buckets in the text format and the p99 estimate"""
+    registry = MetricsRegistry()
+    latency = registry.histogram("review_seconds", "Review latency", ("agent",), buckets=(1, 5, 10))
+    for value in [0.5] * 98 + [7, 8]:
+        latency.observe(value, agent="review")
+
+    text = registry.render_text()
+    assert "# TYPE review_seconds histogram" in text
+    assert 'review_seconds_bucket{agent="review",le="1"} 98' in text
+    assert 'review_seconds_bucket{agent="review",le="10"} 100' in text
+    assert 'review_seconds_bucket{agent="review",le="+Inf"} 100' in text
+    assert 'review_seconds_count{agent="review"} 100' in text
+    assert 5 < latency.quantile(0.99, agent="review") <= 10
+    assert latency.quantile(0.5, agent="review") <= 1
+
+
+def test_labels_must_match():
+    """Test that a metric rejects unknown label names"""
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ("agent",))
+    with pytest.raises(ValueError):
+        calls.inc(role="hint")
+
+
+def test_gauge_function_and_file_dump(tmp_path):
+    """Test callback gauges and the atomic file dump"""
+    registry = MetricsRegistry()
+    sessions = registry.gauge("sessions", "Active sessions")
+    store = {"a": 1, "b": 2}
+    sessions.set_function(lambda: len(store))
+    path = tmp_path / "metrics.prom"
+    registry.dump(str(path))
+    assert "sessions 2" in path.read_text()
+
+
+def test_model_calls_and_fallbacks_are_counted():
+    """Test that model_call_span feeds the agent metrics"""
+    calls = AGENT_CALLS.value(agent="metrics-test")
+    fallbacks = AGENT_FALLBACKS.value(agent="metrics-test")
+    with model_call_span("metrics-test", "model", "prompt"):
+        pass
+    with model_call_span("metrics-test", "model", "prompt") as span:
+        span.set_attribute("fallback", True)
+    assert AGENT_CALLS.value(agent="metrics-test") == calls + 2
+    assert AGENT_FALLBACKS.value(agent="metrics-test") == fallbacks + 1
+
+
+def test_cache_hit_ratio_and_sandbox_timeouts():
+    """Test cache lookups and sandbox timeouts reach the shared registry"""
+    from tools.code_executor import SafeCodeExecutor
+
+    cache = SemanticCache()
+    cache.put("metrics-test", "k", "v")
+    cache.get("metrics-test", "k")
+    cache.get("metrics-test", "missing")
+    assert CACHE_HIT_RATIO.value(namespace="metrics-test") == pytest.approx(0.5)
+
+    timeouts = SANDBOX_TIMEOUTS.value()
+    SafeCodeExecutor().execute("while True:\n    pass")
+    assert SANDBOX_TIMEOUTS.value() == timeouts + 1
+
+
+def test_http_endpoint_serves_registry():
+    """Test the /metrics endpoint"""
+    server = serve_metrics(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode()
+        assert "codementor_agent_calls_total" in body
+    finally:
+        server.shutdown()
@@ -0,0 +1,75 @@
+"""
+Tests for review validation and incremental review parsing
+"""
+
+import json
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.review_schema import Review, ReviewValidationError, IncrementalReviewParser
+
+
+REVIEW = {
+    "working_well": ["Nice loop"],
+    "issues": [
+        {"line": 3, "issue": "Uses / instead of %", "explanation": "Division \"rounds\" {not} [remainder]"},
+        {"line": "5", "issue": "Missing FizzBuzz case", "explanation": ""}
+    ],
+    "suggestions": ["Check 15 first"],
+    "overall_assessment": "Close"
+}
+
+
+def test_review_from_dict_normalizes():
+    """Test validation and coercion of model output"""
+    review = Review.from_dict(REVIEW)
+    assert review.issues[1].line == 5
+    assert review.to_dict()["issues"][0]["line"] == 3
+    assert "complete" not in review.to_dict()
+
+
+def test_review_from_json_strips_fences():
+    """Test markdown fences around JSON are tolerated"""
+    review = Review.from_json("```json\n" + json.dumps(REVIEW) + "\n```")
+    assert review.suggestions == ["Check 15 first"]
+
+
+def test_review_validation_errors():
+    """Test malformed reviews are rejected"""
+    with pytest.raises(ReviewValidationError):
+        Review.from_dict({"issues": "none"})
+    with pytest.raises(ReviewValidationError):
+        Review.from_dict({"issues": [{"line": 1}]})
+    with pytest.raises(ReviewValidationError):
+        Review.from_json("{not json")
+
+
+def test_parser_emits_issues_as_they_complete():
+    """Test streamed parsing surfaces each issue once its object closes"""
+    text = json.dumps(REVIEW)
+    first_issue_end = text.index('}, {"line": "5"') + 1
+    parser = IncrementalReviewParser()
+
+    assert parser.feed(text[:first_issue_end - 1]) == []
+    emitted = parser.feed(text[first_issue_end - 1:first_issue_end + 3])
+    assert [issue.line for issue in emitted] == [3]
+
+    emitted = []
+    for i in range(first_issue_end + 3, len(text), 5):
+        emitted += parser.feed(text[i:i + 5])
+    assert [issue.line for issue in emitted] == [5]
+    assert parser.result() == Review.from_dict(REVIEW)
+
+
+def test_parser_salvages_truncated_reply():
+    """Test issues survive a reply cut off mid-stream"""
+    text = json.dumps(REVIEW)
+    parser = IncrementalReviewParser()
+    parser.feed(text[:text.index("Missing")])
+    with pytest.raises(ReviewValidationError):
+        parser.result()
+    salvaged = parser.salvage()
+    assert [issue.issue for issue in salvaged.issues] == ["Uses / instead of %"]
+    assert salvaged.complete == False
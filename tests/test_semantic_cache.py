@@ -0,0 +1,102 @@
+"""
+Tests for structural fingerprints and the semantic result cache
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.code_fingerprint import fingerprint_code, execution_outcome, line_layout
+from tools.semantic_cache import SemanticCache
+
+
+FIZZBUZZ_A = """
+for i in range(1, 101):
+    # check both first
+    if i % 15 == 0:
+        print("FizzBuzz")
+    elif i % 3 == 0:
+        print("Fizz")
+    else:
+        print(i)
+"""
+
+FIZZBUZZ_B = """
+for number in range(1, 101):
+    if number % 15 == 0:  print("FizzBuzz")
+    elif number % 3 == 0:
+        print("Fizz")
+    else:
+        print(number)
+"""
+
+
+def test_fingerprint_ignores_names_and_comments():
+    """Test that renamed, reformatted code shares a fingerprint"""
+    assert fingerprint_code(FIZZBUZZ_A) == fingerprint_code(FIZZBUZZ_B)
+
+
+def test_fingerprint_keeps_structure():
+    """Test that different divisors or builtins change the fingerprint"""
+    assert fingerprint_code(FIZZBUZZ_A) != fingerprint_code(FIZZBUZZ_A.replace("% 3", "% 4"))
+    assert fingerprint_code("print(x)") != fingerprint_code("len(x)")
+
+
+def test_fingerprint_keeps_string_literals():
+    """Test that swapping output strings changes the fingerprint"""
+    swapped = FIZZBUZZ_A.replace('"Fizz"', '"Buzz"')
+    assert fingerprint_code(FIZZBUZZ_A) != fingerprint_code(swapped)
+
+
+def test_line_layout_tracks_moved_code():
+    """Test that comments or blank lines moving statements change the layout"""
+    shifted = "# my solution\n# attempt 2\n" + FIZZBUZZ_A
+    assert fingerprint_code(shifted) == fingerprint_code(FIZZBUZZ_A)
+    assert line_layout(shifted) != line_layout(FIZZBUZZ_A)
+    assert line_layout("x = 1  # note") == line_layout("x = 2")
+
+
+def test_exact_fingerprint_keeps_names():
+    """Test that execution keys still distinguish renamed code"""
+    assert fingerprint_code(FIZZBUZZ_A, canonical=False) != fingerprint_code(FIZZBUZZ_B, canonical=False)
+    assert fingerprint_code("x = 1  # note", canonical=False) == fingerprint_code("x = 1", canonical=False)
+
+
+def test_fingerprint_syntax_error():
+    """Test fallback for code that does not parse"""
+    assert fingerprint_code("for i in range(3)\n  print(i)").startswith("src:")
+
+
+def test_execution_outcome():
+    """Test outcome signatures"""
+    assert execution_outcome({"success": False, "error": "NameError: name 'x' is not defined"}) == "error:NameError"
+    assert execution_outcome({"success": True, "output": "1\n"}) == execution_outcome({"success": True, "output": "1\n"})
+
+
+def test_cache_hits_and_collisions():
+    """Test that equivalent submissions share an entry and are reported"""
+    cache = SemanticCache()
+    key = ("fizzbuzz", fingerprint_code(FIZZBUZZ_A), "ok")
+    assert cache.get("review", key, source=FIZZBUZZ_A) is None
+    cache.put("review", key, {"issues": []}, source=FIZZBUZZ_A)
+
+    review = cache.get("review", ("fizzbuzz", fingerprint_code(FIZZBUZZ_B), "ok"), source=FIZZBUZZ_B)
+    assert review == {"issues": []}
+    # Callers may mutate their copy without touching the cache
+    review["issues"].append("x")
+    assert cache.get("review", key, source=FIZZBUZZ_A) == {"issues": []}
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["collisions"] == 1
+    assert stats["collision_rate"] == 0.5
+
+
+def test_cache_is_bounded():
+    """Test LRU eviction"""
+    cache = SemanticCache(max_entries=2)
+    for i in range(3):
+        cache.put("exec", i, i)
+    assert cache.get("exec", 0) is None
+    assert cache.get("exec", 2) == 2
@@ -0,0 +1,114 @@
+"""
+Tests for the per-session event log and its derived views
+"""
+
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from agents.session_events import SessionEventLog
+from agents.a2a_protocol import AgentContext
+
+
+def test_views_follow_appends():
+    """Test counts, agent mix, transcript and code history"""
+    log = SessionEventLog(clock=lambda: 0.0)
+    log.append("turn", message="How do I start?", code="")
+    log.append("response", agent="socratic", text="What should it print?")
+    log.append("turn", message="Here's my code", code="print(1)")
+    log.append("response", agent="reviewer", text="Looks good")
+    log.append("concept", concept="modulo")
+    log.append("concept", concept="modulo")
+
+    assert log.turns == 2 and log.code_attempts == 1
+    assert log.counts == {"turn": 2, "response": 2, "concept": 2}
+    assert log.agent_mix == {"socratic": 1, "reviewer": 1}
+    assert [msg["agent"] for msg in log.transcript] == ["student", "socratic", "student", "reviewer"]
+    assert list(log.code_history) == [{"attempt": 2, "code": "print(1)", "agent_feedback": "reviewer"}]
+    assert log.concept_timeline == [(2, "modulo")]
+    assert log.concepts == ("modulo",)
+    assert [event["seq"] for event in log.since(4)] == [5, 6]
+    with pytest.raises(ValueError):
+        log.append("unknown")
+
+
+def test_views_outlive_retained_events():
+    """Test that cumulative views survive the raw log being trimmed"""
+    log = SessionEventLog()
+    total = SessionEventLog.RETAIN + 10
+    for _ in range(total):
+        log.append("turn", message="", code="x = 1")
+    assert len(log.events) == SessionEventLog.RETAIN
+    assert log.turns == total and len(log) == total
+    assert len(log.code_history) == SessionEventLog.CODE_HISTORY_LIMIT
+    assert log.code_history[-1]["attempt"] == total
+    # Every message stays reachable for the chat pager
+    transcript = log.view().transcript
+    assert len(transcript) == total and transcript[0]["seq"] == 1
+
+
+def test_state_round_trip():
+    """Test that to_state/from_state keep views and retained events"""
+    log = SessionEventLog()
+    log.append("turn", message="hi", code="")
+    log.append("response", agent="socratic", text="hello")
+    log.append("gap", concept="loops")
+    log.append("concept", concept="loops")
+    restored = SessionEventLog.from_state(log.to_state())
+    assert restored.to_state() == log.to_state()
+    assert restored.has_concept("loops") and restored.concepts == ("loops",)
+
+
+def test_context_reads_counters_from_events():
+    """Test AgentContext counters are views of its event log"""
+    context = AgentContext()
+    entry = context.begin_turn("hi", "print(1)")
+    context.record_response("reviewer", "ok")
+    context.add_gap("loops")
+    assert entry["attempt"] == context.attempt_count == 1
+    assert list(context.identified_gaps) == ["loops"]
+    assert context.events.agent_mix == {"reviewer": 1}
+    with pytest.raises(AttributeError):
+        context.attempt_count = 5
+
+
+def test_context_restores_pre_event_log_state():
+    """Test that snapshots saved before the event log still load"""
+    context = AgentContext.from_state({
+        "attempt_count": 4, "concepts_covered": ["loops"], "identified_gaps": ["modulo"]
+    })
+    assert context.attempt_count == 4
+    assert context.concepts_covered == ("loops",)
+    assert list(context.identified_gaps) == ["modulo"]
+
+
+def test_view_is_frozen_while_a_worker_appends():
+    """Test that the UI can iterate a view while turns keep being appended"""
+    log = SessionEventLog()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            log.append("turn", message="again", code="x = 1")
+            log.append("response", agent="reviewer", text="ok")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        for _ in range(200):
+            view = log.view()
+            transcript = [msg["agent"] for msg in view.transcript]
+            assert len(transcript) == len(view.transcript)
+            assert all(entry["attempt"] <= view.turns for entry in view.code_history)
+            assert list(view.attempt_numbers()) == list(range(1, view.turns + 1))
+    finally:
+        stop.set()
+        thread.join()
+    view = log.view()
+    assert log.view() is view
+    code_feedback = view.code_history[-1]
+    log.append("turn", message="more", code="")
+    assert log.view() is not view and view.code_history[-1] is code_feedback
@@ -0,0 +1,92 @@
+"""
+Tests for the durable session log behind StudentMemoryManager
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.session_log import SQLiteSessionLog
+from tools.memory_manager import StudentMemoryManager
+
+
+def test_students_do_not_overwrite_each_other(tmp_path):
+    """Test per-student keys for the same attempt number"""
+    memory = StudentMemoryManager(store_path=str(tmp_path / "memory.db"))
+    memory.store_session("alice", 1, {"student_code": "print('a')"})
+    memory.store_session("bob", 1, {"student_code": "print('b')"})
+    assert memory.get_student_sessions("alice")[1]["student_code"] == "print('a')"
+    assert memory.get_student_sessions("bob")[1]["student_code"] == "print('b')"
+    memory.close()
+
+
+def test_sessions_survive_restart_and_load_lazily(tmp_path):
+    """Test that history is read back per student only when requested"""
+    path = str(tmp_path / "memory.db")
+    memory = StudentMemoryManager(store_path=path)
+    for attempt in range(1, 4):
+        memory.store_session("alice", attempt, {"attempt_count": attempt})
+    memory.close()
+
+    restarted = StudentMemoryManager(store_path=path)
+    assert len(restarted.memory_store) == 0
+    sessions = restarted.get_student_sessions("alice")
+    assert sorted(sessions) == [1, 2, 3]
+    assert "bob" not in restarted.memory_store
+    restarted.close()
+
+
+def test_writes_are_batched(tmp_path):
+    """Test that append returns before the write and flush commits batches"""
+    log = SQLiteSessionLog(str(tmp_path / "log.db"), batch_size=10, flush_interval=5.0)
+    for attempt in range(25):
+        log.append("alice", attempt, {"n": attempt})
+    log.flush()
+    assert log.count("alice") == 25
+    assert log.students() == ["alice"]
+    log.close()
+
+
+def test_in_memory_without_store_path():
+    """Test the process-local mode used when no path is configured"""
+    memory = StudentMemoryManager()
+    memory.store_session("alice", 1, {"attempt_count": 1})
+    assert memory.get_student_sessions("alice") == {1: {"attempt_count": 1}}
+
+
+def test_cohort_rebuilt_from_log_on_restart(tmp_path):
+    """Test that graded attempts are replayed into the cohort analytics"""
+    path = str(tmp_path / "memory.db")
+    memory = StudentMemoryManager(store_path=path)
+    memory.record_attempt("alice", "FizzBuzz", 1, error="NameError: name 'x' is not defined",
+                          concept_gap="variables")
+    memory.record_attempt("alice", "FizzBuzz", 2, success=True)
+    memory.close()
+
+    restarted = StudentMemoryManager(store_path=path)
+    summary = restarted.cohort.problem_summary()
+    assert summary == [{"problem": "FizzBuzz", "attempts": 2, "students": 1,
+                        "success_rate": 0.5, "mean_attempts_to_solve": 2.0}]
+    _, errors, counts = restarted.cohort.error_matrix()
+    assert dict(zip(errors, counts[0])) == {"NameError": 1}
+    assert restarted.cohort.struggling_concepts() == [("variables", 1)]
+    restarted.close()
+
+
+def test_index_recovers_sessions_after_crash(tmp_path):
+    """Test that logged sessions missing from the saved index are embedded on load"""
+    path = str(tmp_path / "memory.db")
+    memory = StudentMemoryManager(store_path=path)
+    memory.store_session("alice", 1, {"current_problem": "FizzBuzz", "student_code": "print(1)"})
+    memory.store_session("bob", 1, {"current_problem": "Palindrome", "student_code": "s[::-1]"})
+    # Crash: the log is committed but close() never saves the index
+    memory.log.close()
+    assert not os.path.exists(f"{path}.vectors.npy")
+
+    restarted = StudentMemoryManager(store_path=path)
+    assert len(restarted.index) == 2
+    match = restarted.retrieve_similar_sessions("Palindrome", top_k=1, code="s[::-1]")
+    assert match[0]["student_id"] == "bob"
+    restarted.close()
+    # Nothing is embedded twice on the next start
+    assert len(StudentMemoryManager(store_path=path).index) == 2
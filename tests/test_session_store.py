@@ -0,0 +1,106 @@
+"""
+Tests for the multi-tenant session store
+"""
+
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.session_store import SessionStore
+from agents.orchestrator import MultiAgentOrchestrator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_are_isolated():
+    """Test each session id gets its own context"""
+    store = SessionStore()
+    for _ in range(3):
+        store.get("alice").begin_turn("hi")
+    assert store.get("bob").attempt_count == 0
+    assert store.get("alice").attempt_count == 3
+    assert len(store) == 2
+
+
+def test_idle_sessions_are_evicted():
+    """Test idle eviction and the eviction callback"""
+    clock = FakeClock()
+    evicted = []
+    store = SessionStore(idle_timeout=60, clock=clock,
+                         on_evict=lambda sid, ctx: evicted.append(sid))
+    store.get("alice")
+    clock.now = 30
+    store.get("bob")
+    clock.now = 70
+    # Touching bob sweeps alice, who has been idle for 70s
+    store.get("bob")
+    assert "alice" not in store
+    assert evicted == ["alice"]
+    clock.now = 200
+    assert store.evict_idle() == ["bob"]
+    assert len(store) == 0
+
+
+def test_reset_session():
+    """Test reset replaces the context"""
+    store = SessionStore()
+    store.get("alice").add_concept("loops")
+    lock = store.lock("alice")
+    assert store.reset("alice").concepts_covered == ()
+    assert store.lock("alice") is lock
+
+
+def test_loader_runs_outside_the_store_lock():
+    """Test that a slow restore does not block other sessions"""
+    release = threading.Event()
+
+    def loader(session_id):
+        if session_id == "slow":
+            release.wait(5)
+        return None
+
+    store = SessionStore(loader=loader)
+    loading = threading.Thread(target=store.get, args=("slow",))
+    loading.start()
+    try:
+        done = threading.Event()
+        threading.Thread(target=lambda: (store.get("fast"), done.set())).start()
+        assert done.wait(1)
+    finally:
+        release.set()
+        loading.join()
+    assert "slow" in store
+
+
+def test_concurrent_first_access_shares_one_context():
+    """Test the double-checked insert when two threads load the same session"""
+    loaded = threading.Barrier(2)
+
+    def loader(session_id):
+        loaded.wait(5)
+        return None
+
+    store = SessionStore(loader=loader)
+    contexts = []
+    threads = [threading.Thread(target=lambda: contexts.append(store.get("alice"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert contexts[0] is contexts[1]
+
+
+def test_orchestrator_serves_many_sessions():
+    """Test one orchestrator keeps per-student contexts"""
+    orchestrator = MultiAgentOrchestrator(memory_path="", snapshot_dir="")
+    orchestrator.get_context("alice").current_problem = "Palindrome"
+    assert orchestrator.get_context("bob").current_problem == MultiAgentOrchestrator.DEFAULT_PROBLEM
+    assert orchestrator.context is orchestrator.get_context(MultiAgentOrchestrator.DEFAULT_SESSION)
+    assert orchestrator.active_sessions == 3
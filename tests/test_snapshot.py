@@ -0,0 +1,109 @@
+"""
+Tests for session snapshots and on-demand hydration
+"""
+
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tools.snapshot import Snapshot, SnapshotFormatError, write_snapshot, FORMAT_VERSION
+from agents.orchestrator import MultiAgentOrchestrator
+
+
+def test_sections_decode_lazily(tmp_path):
+    """Test that only requested sections are decoded"""
+    path = str(tmp_path / "s.snap")
+    write_snapshot(path, {"context": {"attempt_count": 3}, "memory": [[1, {"code": "x"}]]})
+    snapshot = Snapshot(path)
+    assert snapshot.version == FORMAT_VERSION
+    assert snapshot.sections == ["context", "memory"]
+    assert snapshot["context"] == {"attempt_count": 3}
+    assert "memory" not in snapshot._decoded
+
+
+def test_rejects_unknown_files_and_newer_versions(tmp_path):
+    """Test the magic and version checks"""
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(SnapshotFormatError):
+        Snapshot(str(path))
+
+    write_snapshot(str(path), {"context": {}})
+    data = bytearray(path.read_bytes())
+    data[6:8] = (FORMAT_VERSION + 1).to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotFormatError):
+        Snapshot(str(path))
+
+
+def test_restarted_orchestrator_hydrates_students(tmp_path):
+    """Test save after changes and restore into a fresh orchestrator"""
+    first = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    context = first.get_context("alice")
+    for attempt in range(1, 4):
+        context.begin_turn("", f"x = {attempt}")
+        first.memory.store_session("alice", attempt, context.snapshot())
+    context.add_concept("modulo")
+    first._trace_knowledge("alice", [("modulo", True)])
+
+    start = time.perf_counter()
+    first.save_session("alice")
+    saved_in = time.perf_counter() - start
+    first.flush_snapshots()
+
+    second = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    start = time.perf_counter()
+    restored = second.get_context("alice")
+    restored_in = time.perf_counter() - start
+
+    assert restored.attempt_count == 3
+    assert restored.concepts_covered == ("modulo",)
+    assert [entry["attempt"] for entry in restored.session_history] == [1, 2, 3]
+    assert second.concept_mastery("alice") == pytest.approx(first.concept_mastery("alice"))
+    assert sorted(second.memory.get_student_sessions("alice")) == [1, 2, 3]
+    assert saved_in < 0.05 and restored_in < 0.05
+
+
+def test_reset_keeps_mastery(tmp_path):
+    """Test that Reset starts a fresh context without losing mastery"""
+    orchestrator = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    orchestrator.get_context("alice").add_concept("modulo")
+    orchestrator._trace_knowledge("alice", [("modulo", True)])
+    orchestrator.reset_session("alice")
+    orchestrator.flush_snapshots()
+
+    restarted = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    assert restarted.get_context("alice").attempt_count == 0
+    assert restarted.knowledge.student_state("alice") == orchestrator.knowledge.student_state("alice")
+
+
+def test_persistence_is_opt_in_and_skips_default_session(tmp_path, monkeypatch):
+    """Test that nothing is saved unless configured, and "default" never is"""
+    monkeypatch.delenv("CODEMENTOR_SNAPSHOT_DIR", raising=False)
+    monkeypatch.delenv("CODEMENTOR_MEMORY_DB", raising=False)
+    plain = MultiAgentOrchestrator()
+    assert plain.snapshot_dir is None and plain.memory.log is None
+
+    first = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    first.get_context().begin_turn("hi")
+    assert first.save_session(wait=True) is None
+    first.get_context("alice").begin_turn("hi")
+    first.save_session("alice", wait=True)
+    second = MultiAgentOrchestrator(memory_path="", snapshot_dir=str(tmp_path))
+    assert second.get_context().attempt_count == 0
+    assert second.get_context("alice").attempt_count == 1
+
+
+def test_writer_coalesces_saves(tmp_path):
+    """Test that queued saves of one path collapse into the latest"""
+    from tools.snapshot import SnapshotWriter
+    writer = SnapshotWriter()
+    path = str(tmp_path / "s.snap")
+    for attempt in range(50):
+        writer.submit(path, {"context": {"attempt_count": attempt}})
+    writer.flush()
+    assert Snapshot(path)["context"] == {"attempt_count": 49}
+    writer.close()
@@ -0,0 +1,50 @@
+"""
+Tests for pipeline tracing
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+from tools import telemetry
+from tools.telemetry import JsonLinesSpanExporter, model_call_span, get_tracer
+from tools.code_executor import SafeCodeExecutor
+
+
+def test_spans_are_written_as_json_lines(tmp_path):
+    """Test the file exporter and span nesting"""
+    path = tmp_path / "traces.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonLinesSpanExporter(str(path))))
+    tracer = provider.get_tracer("test")
+
+    original = telemetry.get_tracer
+    telemetry.get_tracer = lambda: tracer
+    try:
+        with tracer.start_as_current_span("tutor.turn"):
+            with model_call_span("hint", "gemini-2.0-flash-exp", "prompt text", **{"hint.level": 2}) as span:
+                span.set_attribute("fallback", True)
+    finally:
+        telemetry.get_tracer = original
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    by_name = {s["name"]: s for s in spans}
+    model_span = by_name["agent.hint.generate"]
+    assert model_span["attributes"]["model"] == "gemini-2.0-flash-exp"
+    assert model_span["attributes"]["prompt.chars"] == len("prompt text")
+    assert model_span["attributes"]["hint.level"] == 2
+    assert model_span["attributes"]["fallback"] == True
+    assert model_span["parent_id"] == by_name["tutor.turn"]["context"]["span_id"]
+
+
+def test_tracing_is_noop_by_default():
+    """Test instrumented code runs without any tracer configured"""
+    result = SafeCodeExecutor().execute("print(1)")
+    assert result["success"] == True
+    with get_tracer().start_as_current_span("unused") as span:
+        assert not span.is_recording()
@@ -0,0 +1,83 @@
+"""
+Tests for the hot/cold tiered store behind the session memory
+"""
+
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.tiered_store import TieredStore
+from tools.memory_manager import StudentMemoryManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_spills_to_cold_and_reloads(tmp_path):
+    """Test that the hot tier stays bounded and cold values come back"""
+    store = TieredStore(max_hot=2, cold_dir=str(tmp_path / "cold"))
+    for name in ["alice", "bob", "carol"]:
+        store.put(name, {"name": name})
+    stats = store.stats()
+    assert stats["hot"]["entries"] == 2 and stats["cold"]["entries"] == 1
+    assert len(os.listdir(tmp_path / "cold")) == 1
+
+    assert store.get("alice") == {"name": "alice"}
+    assert store.stats()["cold"]["hits"] == 1
+    assert "bob" in store and len(store) == 3
+
+
+def test_idle_values_demoted_after_ttl():
+    """Test TTL demotion into the in-memory compressed tier"""
+    clock = FakeClock()
+    store = TieredStore(max_hot=10, ttl=60, clock=clock)
+    store.put("alice", {"attempts": list(range(100))})
+    clock.now = 30
+    store.put("bob", {"attempts": []})
+    clock.now = 70
+    assert store.demote_idle() == 1
+    stats = store.stats()
+    assert stats["hot"]["entries"] == 1 and stats["cold"]["bytes"] > 0
+    assert store.get("alice") == {"attempts": list(range(100))}
+
+
+def test_memory_manager_keeps_attempt_keys_through_cold_tier():
+    """Test that sessions demoted and reloaded keep integer attempts"""
+    memory = StudentMemoryManager(max_hot_students=1)
+    memory.store_session("alice", 1, {"student_code": "a"})
+    memory.store_session("bob", 1, {"student_code": "b"})
+    memory.store_session("alice", 2, {"student_code": "a2"})
+    assert sorted(memory.get_student_sessions("alice")) == [1, 2]
+    assert memory.get_student_sessions("bob")[1]["student_code"] == "b"
+    stats = memory.memory_stats()
+    assert stats["sessions"]["hot"]["entries"] == 1
+    assert stats["sessions"]["cold"]["entries"] == 1
+    # Without a store path the cold tier still goes to disk, not memory
+    assert stats["sessions"]["cold"]["on_disk"]
+    assert len(os.listdir(memory.memory_store.cold_dir)) == 1
+
+
+def test_update_is_atomic_with_demotion():
+    """Test that a write through update() cannot be lost to a concurrent demotion"""
+    store = TieredStore(max_hot=1)
+    store.put("alice", {1: "a"})
+    demoter = threading.Thread(target=store.put, args=("bob", {}))
+
+    def add(sessions):
+        # A put of another key would demote alice between read and write
+        demoter.start()
+        demoter.join(0.1)
+        sessions[2] = "b"
+        return sessions
+
+    store.update("alice", add)
+    demoter.join()
+    assert store.stats()["cold"]["entries"] == 1
+    assert store.get("alice") == {"1": "a", "2": "b"}
+    assert store.update("missing", lambda value: None) is None and "missing" not in store
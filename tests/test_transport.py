@@ -0,0 +1,91 @@
+"""
+Tests for multi-process agent workers over the built-in transports
+"""
+
+import functools
+import time
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.a2a_protocol import AgentMessage, AgentRole
+from agents.message_bus import AgentRequestError
+from agents.transport import (
+    LocalBroker, MultiprocessingHub, RemoteAgentClient, SocketTransport,
+    start_worker_processes
+)
+
+
+def echo_handler_factory(role):
+    """Stand-in agent: echoes its payload with the worker's pid"""
+    def handle(message):
+        if message.content.get("fail"):
+            raise ValueError("bad request")
+        return {"result": message.content["value"], "pid": os.getpid()}
+    return handle
+
+
+def run_requests(client, count=6):
+    responses = [client.request_sync(AgentRole.HINT, {"value": i}, timeout=10) for i in range(count)]
+    assert [r.content["result"] for r in responses] == list(range(count))
+    return responses
+
+
+def test_message_json_roundtrip():
+    """Test AgentMessage serialization"""
+    message = AgentMessage(AgentRole.ORCHESTRATOR, AgentRole.REVIEW, "request",
+                           {"kwargs": {"concepts": {"loops"}}}, correlation_id="abc")
+    decoded = AgentMessage.from_json(message.to_json())
+    assert decoded.to_agent == AgentRole.REVIEW
+    assert decoded.content == {"kwargs": {"concepts": ["loops"]}}
+    assert decoded.message_id == message.message_id
+
+
+def test_socket_broker_topology():
+    """Test orchestrator and two worker processes on a localhost broker"""
+    broker = LocalBroker().start()
+    workers = {AgentRole.HINT: 2}
+    processes = start_worker_processes(
+        {AgentRole.HINT: functools.partial(SocketTransport, broker.address, AgentRole.HINT)},
+        workers, echo_handler_factory
+    )
+    client = RemoteAgentClient(SocketTransport(broker.address, AgentRole.ORCHESTRATOR))
+    client.start()
+    try:
+        # Wait until both workers have registered with the broker
+        deadline = time.time() + 10
+        while len(broker._connections.get(AgentRole.HINT, [])) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        responses = run_requests(client)
+        assert len({r.content["pid"] for r in responses}) == 2
+        with pytest.raises(AgentRequestError, match="bad request"):
+            client.request_sync(AgentRole.HINT, {"fail": True}, timeout=10)
+        with pytest.raises(AgentRequestError, match="No worker"):
+            client.request_sync(AgentRole.REVIEW, {}, timeout=10)
+        assert client.stats()["hint"]["processed"] == 6
+    finally:
+        client.shutdown_workers(workers)
+        for process in processes:
+            process.join(timeout=5)
+        broker.close()
+    assert all(not p.is_alive() for p in processes)
+
+
+def test_multiprocessing_queue_topology():
+    """Test workers fed from multiprocessing queues"""
+    hub = MultiprocessingHub()
+    workers = {AgentRole.HINT: 2}
+    processes = start_worker_processes(
+        {AgentRole.HINT: functools.partial(hub.endpoint, AgentRole.HINT)},
+        workers, echo_handler_factory
+    )
+    client = RemoteAgentClient(hub.endpoint(AgentRole.ORCHESTRATOR))
+    client.start()
+    try:
+        run_requests(client)
+    finally:
+        client.shutdown_workers(workers)
+        for process in processes:
+            process.join(timeout=5)
+    assert all(not p.is_alive() for p in processes)
@@ -0,0 +1,107 @@
+"""
+Tests for the session embedding and vector index
+"""
+
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.vector_index import SessionVectorIndex, embed_session, error_signature
+from tools.memory_manager import StudentMemoryManager
+
+FIZZBUZZ = "Write a function fizzbuzz() that prints numbers from 1 to 100"
+PALINDROME = "Check whether a string reads the same backwards"
+
+
+def test_embedding_is_deterministic_and_normalized():
+    """Test the offline hashed n-gram embedding"""
+    a = embed_session(FIZZBUZZ, "for i in range(1, 101):\n    print(i)", "NameError: name 'x' is not defined")
+    b = embed_session(FIZZBUZZ, "for i in range(1, 101):\n    print(i)", "NameError: name 'x' is not defined")
+    assert np.array_equal(a, b)
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+    assert error_signature("Traceback...\nZeroDivisionError: division by zero") == "ZeroDivisionError"
+
+
+def test_similar_sessions_rank_first():
+    """Test that the same problem and error type outrank unrelated sessions"""
+    memory = StudentMemoryManager()
+    memory.store_session("alice", 1, {"current_problem": FIZZBUZZ, "student_code": "for i in range(100): print(i / 3)"},
+                         error="ZeroDivisionError: division by zero")
+    memory.store_session("bob", 1, {"current_problem": PALINDROME, "student_code": "s == s[::-1]"})
+    memory.store_session("carol", 1, {"current_problem": FIZZBUZZ, "student_code": "print('Fizz')"})
+
+    matches = memory.retrieve_similar_sessions(FIZZBUZZ, top_k=2, code="for n in range(100): print(n / 5)",
+                                               error="ZeroDivisionError")
+    assert [m["student_id"] for m in matches] == ["alice", "carol"]
+    assert matches[0]["score"] > matches[1]["score"]
+
+    others = memory.retrieve_similar_sessions(FIZZBUZZ, top_k=3, exclude_student="alice")
+    assert "alice" not in [m["student_id"] for m in others]
+
+
+def test_index_persists_as_memmap(tmp_path):
+    """Test save/load and inserts after reopening"""
+    index = SessionVectorIndex(dim=16, capacity=2)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(5, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index.add_batch([("s", i) for i in range(5)], vectors)
+    path = str(tmp_path / "index.npy")
+    index.save(path)
+
+    loaded = SessionVectorIndex.load(path)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.search(vectors[3], top_k=1)[0][0] == ("s", 3)
+    loaded.add(("s", 5), vectors[0])
+    assert len(loaded) == 6
+
+
+def test_batched_search_scales():
+    """Test top-k over tens of thousands of sessions stays in milliseconds"""
+    rng = np.random.default_rng(1)
+    count, dim = 20000, 256
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = SessionVectorIndex(dim=dim)
+    index.add_batch(list(range(count)), vectors)
+
+    start = time.perf_counter()
+    results = index.search_batch(vectors[:8], top_k=5)
+    elapsed = time.perf_counter() - start
+    assert [r[0][0] for r in results] == list(range(8))
+    assert elapsed < 0.5
+
+
+def test_concurrent_adds_and_searches():
+    """Test that threads adding past the capacity lose no vectors"""
+    index = SessionVectorIndex(capacity=1)
+    vector = np.ones(index.dim, dtype=np.float32) / np.sqrt(index.dim)
+    errors = []
+
+    def worker(student):
+        try:
+            for attempt in range(300):
+                index.add((student, attempt), vector)
+                if attempt % 50 == 0:
+                    index.search(vector, top_k=1)
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads often so inserts interleave inside add()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(f"s{i}",)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert len(index) == len(set(index.keys)) == 4800
+    assert np.allclose(index.vectors, vector)
@@ -2,11 +2,12 @@
 Safe Python Code Execution Sandbox
 """
 
-import sys
 from io import StringIO
 import signal
 from contextlib import contextmanager
 from typing import Dict
+from tools.metrics import SANDBOX_LATENCY, SANDBOX_RUNS, SANDBOX_TIMEOUTS
+from tools.telemetry import get_tracer
 
 
 class TimeoutException(Exception):
@@ -71,22 +72,39 @@ class SafeCodeExecutor:
                 "success": bool
             }
         """
-        # Capture stdout
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = StringIO()
+        with get_tracer().start_as_current_span("sandbox.execute") as span:
+            span.set_attribute("code.lines", len(code.splitlines()))
+            with SANDBOX_LATENCY.time():
+                result = self._run(code, test_input)
+            timed_out = "timed out" in result["error"]
+            span.set_attribute("success", result["success"])
+            span.set_attribute("timed_out", timed_out)
+        if timed_out:
+            SANDBOX_TIMEOUTS.inc()
+        SANDBOX_RUNS.inc(outcome="timeout" if timed_out else "ok" if result["success"] else "error")
+        return result
+    
+    def _run(self, code: str, test_input: str = None) -> Dict:
+        """Run code with restricted builtins and a 5-second limit"""
+        # Capture output per run, not via sys.stdout, so runs on
+        # different threads don't interleave
+        captured_output = StringIO()
+        
+        def sandbox_print(*args, sep=" ", end="\n", file=None, flush=False):
+            print(*args, sep=sep, end=end, file=captured_output)
         
         result = {"success": False, "output": "", "error": ""}
         
         try:
             # Create restricted globals with safe builtins
             import builtins
-            safe_globals = {
-                '__builtins__': {
-                    name: getattr(builtins, name) 
-                    for name in self.ALLOWED_BUILTINS 
-                    if hasattr(builtins, name)
-                }
+            safe_builtins = {
+                name: getattr(builtins, name) 
+                for name in self.ALLOWED_BUILTINS 
+                if hasattr(builtins, name)
             }
+            safe_builtins['print'] = sandbox_print
+            safe_globals = {'__builtins__': safe_builtins}
             
             # Execute code with timeout protection
             # Using threading (Windows-compatible)
@@ -117,7 +135,5 @@ class SafeCodeExecutor:
                 
         except Exception as e:
             result["error"] = f"{type(e).__name__}: {str(e)}"
-        finally:
-            sys.stdout = old_stdout
             
         return result
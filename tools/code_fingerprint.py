@@ -0,0 +1,155 @@
+"""
+Structural Code Fingerprints
+Maps student submissions that differ only in naming, whitespace or comments
+to the same key, so cohort-wide caches can share work between them.
+"""
+
+import ast
+import builtins
+import hashlib
+from typing import Dict, Optional
+
+# Builtins keep their names - print() and range() carry meaning
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+# Small integers are kept exact (loop bounds, divisors); larger ones bucketed
+_EXACT_INT_LIMIT = 16
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _literal_bucket(value) -> str:
+    """Coarse bucket for a literal value"""
+    if value is None or isinstance(value, bool):
+        return repr(value)
+    if isinstance(value, int):
+        if abs(value) <= _EXACT_INT_LIMIT:
+            return f"int:{value}"
+        sign = "-" if value < 0 else "+"
+        return f"int:{sign}{len(str(abs(value)))}digits"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        # Strings are the program's output ("Fizz" vs "Buzz"), kept exact
+        return "str:" + repr(value)
+    return type(value).__name__
+
+
+class _Canonicalizer(ast.NodeTransformer):
+    """Renames identifiers in order of first appearance and buckets literals"""
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+
+    def _canon(self, name: str) -> str:
+        if name in _BUILTIN_NAMES:
+            return name
+        if name not in self.names:
+            self.names[name] = f"v{len(self.names)}"
+        return self.names[name]
+
+    def _strip_docstring(self, node):
+        body = getattr(node, "body", None)
+        if (body and isinstance(body[0], ast.Expr)
+                and isinstance(body[0].value, ast.Constant)
+                and isinstance(body[0].value.value, str)):
+            node.body = body[1:] or [ast.Pass()]
+
+    def visit_Module(self, node):
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        node.name = self._canon(node.name)
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        node.name = self._canon(node.name)
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_Name(self, node):
+        node.id = self._canon(node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self._canon(node.arg)
+        node.annotation = None
+        return node
+
+    def visit_keyword(self, node):
+        # Keyword names of user functions follow their parameters;
+        # keywords of builtins (print(end=...)) stay as they are
+        if node.arg in self.names:
+            node.arg = self.names[node.arg]
+        return self.generic_visit(node)
+
+    def visit_Global(self, node):
+        node.names = [self._canon(n) for n in node.names]
+        return node
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Constant(self, node):
+        # NUL prefix keeps buckets apart from real string literals
+        return ast.Constant(value="\0" + _literal_bucket(node.value))
+
+
+def fingerprint_code(code: str, canonical: bool = True) -> str:
+    """
+    Fingerprint student code.
+
+    With canonical=True, identifiers are renamed, numeric literals bucketed
+    and comments/docstrings dropped - a key for reviews and hints.
+    With canonical=False only formatting and comments are ignored, which
+    keeps the key exact enough for execution results.
+
+    Code that does not parse falls back to a digest of its stripped lines.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        lines = [line.rstrip() for line in code.strip().splitlines() if line.strip()]
+        return "src:" + _digest("\n".join(lines))
+
+    if canonical:
+        tree = _Canonicalizer().visit(tree)
+        return "ast:" + _digest(ast.dump(tree, annotate_fields=False))
+    return "exact:" + _digest(ast.dump(tree, annotate_fields=False))
+
+
+def line_layout(code: str) -> str:
+    """
+    Digest of the line each statement starts on. Fingerprints ignore
+    layout, so results that cite line numbers (reviews) add this to their
+    key; comments or blank lines that move code give a different layout.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return "src:" + _digest(code)
+    lines = [node.lineno for node in ast.walk(tree) if isinstance(node, ast.stmt)]
+    return "lines:" + _digest(",".join(map(str, lines)))
+
+
+def source_digest(code: str) -> str:
+    """Digest of the raw source, used to tell distinct submissions apart"""
+    return _digest(code)
+
+
+def execution_outcome(execution_result: Optional[Dict]) -> str:
+    """
+    Compact signature of an execution result: success flag, error type
+    and a digest of the output.
+    """
+    if not execution_result:
+        return "not-run"
+    if execution_result.get("success"):
+        return "ok:" + _digest(execution_result.get("output", ""))
+    error = execution_result.get("error", "") or ""
+    return "error:" + error.split(":", 1)[0].strip()
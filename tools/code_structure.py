@@ -0,0 +1,115 @@
+"""
+Code Structure Utilities
+Splits student code into top-level units and diffs attempts line by line,
+so reviews can focus on what actually changed.
+"""
+
+import ast
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+# Name shared by top-level statements outside any def/class
+MODULE_UNIT = "<module>"
+
+
+@dataclass
+class CodeUnit:
+    """A top-level function, class or statement with 1-based line range"""
+    name: str
+    kind: str  # "function", "class", "statement"
+    start_line: int
+    end_line: int
+    source: str
+
+    @property
+    def line_count(self) -> int:
+        return self.end_line - self.start_line + 1
+
+    def contains(self, line: int) -> bool:
+        return self.start_line <= line <= self.end_line
+
+
+@dataclass
+class LineDiff:
+    """Line-level mapping between two versions of the same program"""
+    line_map: Dict[int, int] = field(default_factory=dict)  # old line -> new line
+    changed_new: Set[int] = field(default_factory=set)      # inserted/replaced new lines
+    deleted_old: Set[int] = field(default_factory=set)      # removed/replaced old lines
+
+
+def split_top_level(code: str) -> Optional[List[CodeUnit]]:
+    """
+    Split code into its top-level units via the AST.
+    Returns None if the code does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = code.splitlines()
+    units = []
+    for node in tree.body:
+        start = node.lineno
+        decorators = getattr(node, "decorator_list", None)
+        if decorators:
+            start = min(d.lineno for d in decorators)
+        end = node.end_lineno or node.lineno
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            name, kind = node.name, "function"
+        elif isinstance(node, ast.ClassDef):
+            name, kind = node.name, "class"
+        else:
+            name, kind = MODULE_UNIT, "statement"
+
+        units.append(CodeUnit(
+            name=name,
+            kind=kind,
+            start_line=start,
+            end_line=end,
+            source="\n".join(lines[start - 1:end])
+        ))
+    return units
+
+
+def diff_lines(old_code: str, new_code: str) -> LineDiff:
+    """Diff two attempts line by line"""
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    diff = LineDiff()
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                diff.line_map[i1 + offset + 1] = j1 + offset + 1
+        else:
+            diff.deleted_old.update(range(i1 + 1, i2 + 1))
+            diff.changed_new.update(range(j1 + 1, j2 + 1))
+    return diff
+
+
+def changed_units(old_units: List[CodeUnit], new_units: List[CodeUnit], diff: LineDiff) -> List[CodeUnit]:
+    """
+    New units that need a fresh look: any line inserted or edited, or a
+    function/class of the same name lost lines since the previous attempt.
+    """
+    shrunk = {
+        unit.name for unit in old_units
+        if unit.name != MODULE_UNIT
+        and any(unit.contains(line) for line in diff.deleted_old)
+    }
+    return [
+        unit for unit in new_units
+        if unit.name in shrunk
+        or any(unit.contains(line) for line in diff.changed_new)
+    ]
+
+
+def number_lines(source: str, start_line: int = 1) -> str:
+    """Prefix each line with its line number, as shown to the model"""
+    return "\n".join(
+        f"{start_line + i:4d} | {line}"
+        for i, line in enumerate(source.splitlines())
+    )
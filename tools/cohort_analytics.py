@@ -0,0 +1,203 @@
+"""
+Cohort Analytics
+Columnar record of every graded attempt across students, with rollups per
+problem maintained on insert, for class-level dashboards.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Hint levels go 1-4 (see HintAgent.hint_difficulty); 0 = no hint
+HINT_LEVELS = 5
+
+
+def problem_label(problem: str, width: int = 60) -> str:
+    """Short display name of a problem: its first line, truncated"""
+    first_line = problem.strip().splitlines()[0] if problem.strip() else "(no problem)"
+    return first_line if len(first_line) <= width else first_line[:width - 1] + "…"
+
+
+class _Interned:
+    """Name <-> dense id table; id 0 is reserved for "none" when none_name is given"""
+    def __init__(self, none_name: Optional[str] = None):
+        self.names: List[str] = [] if none_name is None else [none_name]
+        self.ids: Dict[str, int] = {} if none_name is None else {none_name: 0}
+
+    def id(self, name: str) -> int:
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class _GrowingCounts:
+    """2-D count matrix that grows in either dimension on demand"""
+    def __init__(self, rows: int = 8, cols: int = 8):
+        self.counts = np.zeros((rows, cols), dtype=np.int64)
+
+    def add(self, row: int, col: int, amount: int = 1):
+        rows, cols = self.counts.shape
+        if row >= rows or col >= cols:
+            grown = np.zeros((max(rows, row + 1) * 2 if row >= rows else rows,
+                              max(cols, col + 1) * 2 if col >= cols else cols), dtype=np.int64)
+            grown[:rows, :cols] = self.counts
+            self.counts = grown
+        self.counts[row, col] += amount
+
+    def view(self, rows: int, cols: int) -> np.ndarray:
+        out = np.zeros((rows, cols), dtype=np.int64)
+        r, c = min(rows, self.counts.shape[0]), min(cols, self.counts.shape[1])
+        out[:r, :c] = self.counts[:r, :c]
+        return out
+
+
+class CohortAnalytics:
+    """
+    Each attempt is one row in parallel NumPy columns (student, problem,
+    attempt, error type, hint level, concept gap, success, time). Rollups
+    per problem (error types, concept gaps, hint levels, attempts,
+    successes, students, submissions to first solve) are bumped on
+    insert, so dashboard reads are O(problems x categories) regardless of
+    how many attempts exist; ad hoc queries use vectorized passes over the
+    columns.
+
+    Attempts to solve count a student's submissions on that problem up to
+    and including their first success; the attempt column is the chat
+    turn, which also counts questions and submissions to other problems.
+    """
+    COLUMNS = (("student", np.int32), ("problem", np.int32), ("attempt", np.int32),
+               ("error", np.int32), ("hint_level", np.int8), ("gap", np.int32),
+               ("success", np.bool_), ("timestamp", np.float64))
+
+    def __init__(self, capacity: int = 4096):
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self._size = 0
+        self.students = _Interned()
+        self.problems = _Interned()
+        self.errors = _Interned(none_name="(none)")
+        self.concepts = _Interned(none_name="(none)")
+        self._errors_by_problem = _GrowingCounts()
+        self._gaps_by_problem = _GrowingCounts()
+        self._hints_by_problem = _GrowingCounts(cols=HINT_LEVELS)
+        self._attempts_by_problem = np.zeros(8, dtype=np.int64)
+        self._successes_by_problem = np.zeros(8, dtype=np.int64)
+        self._students_by_problem = np.zeros(8, dtype=np.int64)
+        self._solvers_by_problem = np.zeros(8, dtype=np.int64)
+        self._solve_submissions_by_problem = np.zeros(8, dtype=np.int64)
+        # (problem, student) -> submissions so far, or -n once solved on the n-th
+        self._submissions: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+        # Bumped on every insert; figure builders memoize on it
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(self, student_id: str, problem: str, attempt: int, error_signature: str = "",
+               hint_level: int = 0, concept_gap: str = "", success: bool = False,
+               timestamp: Optional[float] = None):
+        """Append one graded attempt and update the rollups"""
+        with self._lock:
+            row = {
+                "student": self.students.id(student_id),
+                "problem": self.problems.id(problem_label(problem)),
+                "attempt": attempt,
+                "error": self.errors.id(error_signature) if error_signature else 0,
+                "hint_level": hint_level,
+                "gap": self.concepts.id(concept_gap) if concept_gap else 0,
+                "success": success,
+                "timestamp": time.time() if timestamp is None else timestamp,
+            }
+            if self._size == len(self._columns["student"]):
+                for name, column in self._columns.items():
+                    self._columns[name] = np.concatenate([column, np.zeros_like(column)])
+            for name, value in row.items():
+                self._columns[name][self._size] = value
+            self._size += 1
+
+            p = row["problem"]
+            if p >= len(self._attempts_by_problem):
+                self._grow_problem_rollups()
+            self._attempts_by_problem[p] += 1
+            self._successes_by_problem[p] += bool(success)
+            pair = (p, row["student"])
+            submissions = self._submissions.get(pair, 0)
+            if submissions == 0:
+                self._students_by_problem[p] += 1
+            if submissions >= 0:
+                submissions += 1
+                if success:
+                    self._solvers_by_problem[p] += 1
+                    self._solve_submissions_by_problem[p] += submissions
+                    submissions = -submissions
+                self._submissions[pair] = submissions
+            if row["error"]:
+                self._errors_by_problem.add(p, row["error"])
+            if row["gap"]:
+                self._gaps_by_problem.add(p, row["gap"])
+            self._hints_by_problem.add(p, min(max(hint_level, 0), HINT_LEVELS - 1))
+            self.version += 1
+
+    def _grow_problem_rollups(self):
+        for name in ("_attempts_by_problem", "_successes_by_problem", "_students_by_problem",
+                     "_solvers_by_problem", "_solve_submissions_by_problem"):
+            rollup = getattr(self, name)
+            setattr(self, name, np.concatenate([rollup, np.zeros_like(rollup)]))
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def concept_gap_matrix(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """(problems, concepts, counts) of concept gaps; the "(none)" column is dropped"""
+        with self._lock:
+            counts = self._gaps_by_problem.view(len(self.problems), len(self.concepts))
+            return list(self.problems.names), self.concepts.names[1:], counts[:, 1:]
+
+    def error_matrix(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """(problems, error types, counts)"""
+        with self._lock:
+            counts = self._errors_by_problem.view(len(self.problems), len(self.errors))
+            return list(self.problems.names), self.errors.names[1:], counts[:, 1:]
+
+    def hint_level_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """(problems, counts per hint level 0-4)"""
+        with self._lock:
+            return list(self.problems.names), self._hints_by_problem.view(len(self.problems), HINT_LEVELS)
+
+    def problem_summary(self) -> List[Dict]:
+        """Attempts, students, success rate and mean attempts to solve, per problem"""
+        with self._lock:
+            n = len(self.problems)
+            attempts = self._attempts_by_problem[:n].copy()
+            successes = self._successes_by_problem[:n].copy()
+            students = self._students_by_problem[:n].copy()
+            solvers = self._solvers_by_problem[:n].copy()
+            solve_submissions = self._solve_submissions_by_problem[:n].copy()
+            names = list(self.problems.names)
+        return [
+            {
+                "problem": names[p],
+                "attempts": int(attempts[p]),
+                "students": int(students[p]),
+                "success_rate": float(successes[p] / attempts[p]) if attempts[p] else 0.0,
+                "mean_attempts_to_solve": float(solve_submissions[p] / solvers[p]) if solvers[p] else None
+            }
+            for p in range(n)
+        ]
+
+    def struggling_concepts(self, top_k: int = 5) -> List[Tuple[str, int]]:
+        """Concept gaps across all problems, most frequent first"""
+        _, concepts, counts = self.concept_gap_matrix()
+        totals = counts.sum(axis=0)
+        order = np.argsort(-totals, kind="stable")[:top_k]
+        return [(concepts[i], int(totals[i])) for i in order if totals[i]]
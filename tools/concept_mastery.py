@@ -0,0 +1,170 @@
+"""
+Concept Mastery Index
+Latest mastery per (student, concept) in a dense matrix for O(1) reads and
+cohort queries, plus a compact timestamped series per pair for trends.
+"""
+
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ConceptMasteryIndex:
+    """
+    Students and concepts are interned to row/column numbers. The latest
+    value of every pair lives in a float32 matrix (NaN = never tracked), so
+    a cohort query reads one column instead of scanning events. History
+    is kept as two array('d') buffers (timestamps, values) per pair,
+    trimmed to the last max_points values.
+
+    Readers take the same lock as track(): a name is interned before the
+    matrix grows to cover it, so an unlocked read could see the new id
+    with the old, smaller matrix.
+    """
+    def __init__(self, initial_students: int = 64, initial_concepts: int = 16,
+                 max_points: int = 256):
+        self.max_points = max_points
+        self._students: Dict[str, int] = {}
+        self._concepts: Dict[str, int] = {}
+        self._latest = np.full((initial_students, initial_concepts), np.nan, dtype=np.float32)
+        self._series: Dict[Tuple[int, int], Tuple[array, array]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _intern(names: Dict[str, int], name: str) -> int:
+        index = names.get(name)
+        if index is None:
+            index = names[name] = len(names)
+        return index
+
+    def _ensure_shape(self):
+        rows, cols = self._latest.shape
+        need_rows, need_cols = len(self._students), len(self._concepts)
+        if need_rows <= rows and need_cols <= cols:
+            return
+        grown = np.full((max(rows, 1) * 2 if need_rows > rows else rows,
+                         max(cols, 1) * 2 if need_cols > cols else cols), np.nan, dtype=np.float32)
+        grown[:rows, :cols] = self._latest
+        self._latest = grown
+
+    def track(self, student_id: str, concept: str, mastery: float, timestamp: Optional[float] = None):
+        """Record a mastery value (0.0 - 1.0) at timestamp (default: now)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            row = self._intern(self._students, student_id)
+            col = self._intern(self._concepts, concept)
+            self._ensure_shape()
+            self._latest[row, col] = mastery
+            series = self._series.get((row, col))
+            if series is None:
+                series = self._series[(row, col)] = (array("d"), array("d"))
+            series[0].append(timestamp)
+            series[1].append(mastery)
+            # Trim in chunks so appends stay amortized O(1)
+            if len(series[0]) >= 2 * self.max_points:
+                del series[0][:-self.max_points]
+                del series[1][:-self.max_points]
+
+    def latest(self, student_id: str, concept: str, default: float = 0.0) -> float:
+        with self._lock:
+            row = self._students.get(student_id)
+            col = self._concepts.get(concept)
+            if row is None or col is None:
+                return default
+            value = self._latest[row, col]
+        return default if np.isnan(value) else float(value)
+
+    def student(self, student_id: str) -> Dict[str, float]:
+        """Latest mastery of every concept tracked for a student"""
+        with self._lock:
+            row = self._students.get(student_id)
+            if row is None:
+                return {}
+            values = self._latest[row]
+            return {concept: float(values[col]) for concept, col in self._concepts.items()
+                    if not np.isnan(values[col])}
+
+    def series(self, student_id: str, concept: str,
+               since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) for a pair, optionally from since onwards"""
+        with self._lock:
+            key = (self._students.get(student_id), self._concepts.get(concept))
+            series = self._series.get(key)
+            if series is None:
+                return np.empty(0), np.empty(0)
+            timestamps = np.frombuffer(series[0], dtype=np.float64).copy()
+            values = np.frombuffer(series[1], dtype=np.float64).copy()
+        if since is not None:
+            start = int(np.searchsorted(timestamps, since))
+            timestamps, values = timestamps[start:], values[start:]
+        return timestamps, values
+
+    def student_series(self, student_id: str) -> Dict[str, Tuple[List[float], List[float]]]:
+        """Every concept series of a student, for snapshots"""
+        with self._lock:
+            row = self._students.get(student_id)
+            return {concept: (list(self._series[(row, col)][0]), list(self._series[(row, col)][1]))
+                    for concept, col in self._concepts.items() if (row, col) in self._series}
+
+    def restore_series(self, student_id: str, concept: str, timestamps, values):
+        """Replace a pair's series (and latest value) with saved points"""
+        if not len(values):
+            return
+        with self._lock:
+            row = self._intern(self._students, student_id)
+            col = self._intern(self._concepts, concept)
+            self._ensure_shape()
+            self._series[(row, col)] = (array("d", timestamps), array("d", values))
+            self._latest[row, col] = values[-1]
+
+    def trend(self, student_id: str, concept: str, since: Optional[float] = None) -> float:
+        """Mastery change per hour (least-squares slope); 0.0 with < 2 points"""
+        timestamps, values = self.series(student_id, concept, since)
+        if len(values) < 2 or timestamps[-1] == timestamps[0]:
+            return 0.0
+        slope = np.polyfit((timestamps - timestamps[0]) / 3600.0, values, 1)[0]
+        return float(slope)
+
+    def cohort(self, concept: str) -> Dict[str, float]:
+        """Latest mastery of concept for every student who has a value"""
+        with self._lock:
+            col = self._concepts.get(concept)
+            if col is None:
+                return {}
+            column = self._latest[:len(self._students), col].copy()
+            names = list(self._students)
+        tracked = np.flatnonzero(~np.isnan(column))
+        return {names[i]: float(column[i]) for i in tracked}
+
+    def cohort_mean(self, concept: str) -> Optional[float]:
+        with self._lock:
+            col = self._concepts.get(concept)
+            if col is None:
+                return None
+            column = self._latest[:len(self._students), col].copy()
+        if np.isnan(column).all():
+            return None
+        return float(np.nanmean(column))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            points = sum(len(timestamps) for timestamps, _ in self._series.values())
+            return {
+                "students": len(self._students),
+                "concepts": len(self._concepts),
+                "points": points,
+                "bytes": int(self._latest.nbytes) + points * 16
+            }
+
+    @property
+    def students(self) -> List[str]:
+        with self._lock:
+            return list(self._students)
+
+    @property
+    def concepts(self) -> List[str]:
+        with self._lock:
+            return list(self._concepts)
@@ -0,0 +1,91 @@
+"""
+Import-Time Report
+Measures a cold start in a fresh interpreter with `python -X importtime`:
+wall time, the slowest modules, and which heavy dependencies got loaded.
+
+    python -m tools.import_report                 # first page of app.py
+    python -m tools.import_report --budget 1.5    # exit 1 if slower
+    python -m tools.import_report --statement "import agents.orchestrator"
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Should only load when a model is called or a figure is drawn
+HEAVY_MODULES = ("google.generativeai", "plotly", "plotly.express", "networkx")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MARKER = "IMPORT_REPORT "
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print({marker!r} + json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_imports(statement: str = "import app", env: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Run statement in a fresh interpreter from the repo root.
+
+    Returns:
+        {"statement": str, "seconds": float, "heavy_loaded": [str],
+         "modules": [{"name": str, "self_us": int, "cumulative_us": int}]}
+    """
+    child_env = {**os.environ,
+                 # Keep the probe from touching on-disk session state
+                 "CODEMENTOR_MEMORY_DB": "", "CODEMENTOR_SNAPSHOT_DIR": ""}
+    child_env.update(env or {})
+    probe = _PROBE.format(statement=statement, marker=_MARKER, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=ROOT,
+                          env=child_env, capture_output=True, text=True, timeout=300)
+    results = [line[len(_MARKER):] for line in proc.stdout.splitlines() if line.startswith(_MARKER)]
+    if proc.returncode != 0 or not results:
+        raise RuntimeError(f"Import probe failed ({proc.returncode}): {proc.stderr[-2000:]}")
+    result = json.loads(results[-1])
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"name": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return {"statement": statement, "seconds": result["seconds"],
+            "heavy_loaded": result["loaded"], "modules": modules}
+
+
+def format_report(report: Dict, top: int = 15) -> str:
+    lines = [f"{report['statement']}: {report['seconds']:.3f}s",
+             "Heavy modules loaded: " + (", ".join(report["heavy_loaded"]) or "none"),
+             f"Slowest {top} imports (cumulative):"]
+    slowest: List[Dict] = sorted(report["modules"], key=lambda m: m["cumulative_us"], reverse=True)[:top]
+    for module in slowest:
+        lines.append(f"  {module['cumulative_us'] / 1e6:8.3f}s  {module['name']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--statement", default="import app",
+                        help="code to time (default: run app.py's first page in bare mode)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, help="fail if the statement takes longer (seconds)")
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args(argv)
+
+    report = measure_imports(args.statement)
+    print(json.dumps(report) if args.json else format_report(report, args.top))
+    if args.budget is not None and report["seconds"] > args.budget:
+        print(f"Over budget: {report['seconds']:.3f}s > {args.budget:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Background Job Queue
+Runs slow UI actions (code runs, reviews) on a bounded worker pool so the
+page stays responsive while they finish.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def job_key(*parts: str) -> str:
+    """Dedup key for a submission; identical parts give the same key"""
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class Job:
+    """One unit of background work and its outcome"""
+    kind: str
+    key: Optional[str] = None
+    session_id: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    result: Any = None
+    error: str = ""
+    # Partial results reported while the job runs (e.g. streamed review issues)
+    progress: List[Any] = field(default_factory=list)
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def report(self, item: Any):
+        self.progress.append(item)
+
+
+class JobQueue:
+    """
+    Per-process job queue. submit() returns at once with a Job that
+    callers poll by id; at most `workers` jobs run at a time.
+
+    A submission whose key matches a job still queued or running gets
+    that job back instead of starting duplicate work. Finished jobs are
+    kept (up to max_finished) so pollers can read their result.
+    """
+    def __init__(self, workers: int = 4, max_finished: int = 256):
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+        self._finished = OrderedDict()
+        self._stats = {"submitted": 0, "deduplicated": 0, "failed": 0}
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], key: Optional[str] = None,
+               session_id: Optional[str] = None) -> Job:
+        """Queue fn(job); its return value becomes job.result"""
+        with self._lock:
+            existing = self._in_flight.get(key) if key is not None else None
+            if existing is not None:
+                self._stats["deduplicated"] += 1
+                return existing
+            job = Job(kind=kind, key=key, session_id=session_id)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._in_flight[key] = job
+            self._stats["submitted"] += 1
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        job.status = RUNNING
+        try:
+            job.result = fn(job)
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {str(e)}"
+            job.status = FAILED
+        job.finished_at = time.time()
+        with self._lock:
+            if job.status == FAILED:
+                self._stats["failed"] += 1
+            if job.key is not None and self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            self._finished[job.id] = job
+            while len(self._finished) > self.max_finished:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
+        job._done.set()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self, session_id: Optional[str] = None) -> List[Job]:
+        """Jobs queued or running, optionally only one session's"""
+        with self._lock:
+            return [job for job in self._in_flight.values()
+                    if session_id is None or job.session_id == session_id]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until the job finishes (for tests and scripts)"""
+        job = self.get(job_id)
+        if job is not None:
+            job._done.wait(timeout)
+        return job
+
+    def stats(self) -> Dict:
+        with self._lock:
+            running = sum(job.status == RUNNING for job in self._jobs.values())
+            return {**self._stats, "queued": len(self._jobs) - len(self._finished) - running,
+                    "running": running, "finished": len(self._finished)}
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_shared_queue = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_job_queue() -> JobQueue:
+    """Process-wide queue; CODEMENTOR_JOB_WORKERS bounds concurrent jobs"""
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = JobQueue(workers=int(os.getenv("CODEMENTOR_JOB_WORKERS", "4") or 4))
+        return _shared_queue
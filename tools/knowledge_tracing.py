@@ -0,0 +1,155 @@
+"""
+Bayesian Knowledge Tracing
+Per-student, per-concept probability that a concept is known, updated from
+correct/incorrect evidence with NumPy over the whole cohort matrix.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class BKTParams:
+    """Standard BKT parameters for one concept"""
+    p_init: float = 0.2     # known before any practice
+    p_transit: float = 0.15  # learned after one practice opportunity
+    p_slip: float = 0.1     # wrong although known
+    p_guess: float = 0.2    # right although not known
+
+
+DEFAULT_PARAMS = BKTParams()
+
+
+class KnowledgeTracer:
+    """
+    P(known) for every (student, concept) in one float64 matrix. Updates
+    are applied as array operations; a batch touching the same pair more
+    than once is split into rounds so each pair's events stay in order.
+    Reads take the same lock as updates, so they never pair a newly
+    interned id with a matrix that has not grown to cover it.
+    """
+    def __init__(self, params: Dict[str, BKTParams] = None, initial_students: int = 64,
+                 initial_concepts: int = 16):
+        self._params = dict(params or {})
+        self._students: Dict[str, int] = {}
+        self._concepts: Dict[str, int] = {}
+        self._known = np.full((initial_students, initial_concepts), np.nan)
+        # Per-concept parameter vectors, aligned with matrix columns
+        self._p = {name: np.zeros(initial_concepts) for name in ("p_init", "p_transit", "p_slip", "p_guess")}
+        self._lock = threading.Lock()
+
+    def _student_index(self, student_id: str) -> int:
+        index = self._students.get(student_id)
+        if index is None:
+            index = self._students[student_id] = len(self._students)
+            if index >= self._known.shape[0]:
+                grown = np.full((self._known.shape[0] * 2, self._known.shape[1]), np.nan)
+                grown[:self._known.shape[0]] = self._known
+                self._known = grown
+        return index
+
+    def _concept_index(self, concept: str) -> int:
+        index = self._concepts.get(concept)
+        if index is None:
+            index = self._concepts[concept] = len(self._concepts)
+            if index >= self._known.shape[1]:
+                cols = self._known.shape[1] * 2
+                grown = np.full((self._known.shape[0], cols), np.nan)
+                grown[:, :self._known.shape[1]] = self._known
+                self._known = grown
+                for name, values in self._p.items():
+                    self._p[name] = np.concatenate([values, np.zeros(cols - len(values))])
+            params = self._params.get(concept, DEFAULT_PARAMS)
+            for name in self._p:
+                self._p[name][index] = getattr(params, name)
+        return index
+
+    def observe(self, student_id: str, concept: str, correct: bool) -> float:
+        """Apply one piece of evidence and return the updated P(known)"""
+        return self.observe_batch([(student_id, concept, correct)])[(student_id, concept)]
+
+    def observe_batch(self, events: Iterable[Tuple[str, str, bool]]) -> Dict[Tuple[str, str], float]:
+        """
+        Apply (student_id, concept, correct) events in order.
+        Returns the new P(known) of every pair touched.
+        """
+        with self._lock:
+            rows, cols, outcomes = [], [], []
+            for student_id, concept, correct in events:
+                rows.append(self._student_index(student_id))
+                cols.append(self._concept_index(concept))
+                outcomes.append(bool(correct))
+            if not rows:
+                return {}
+            rows, cols, outcomes = np.array(rows), np.array(cols), np.array(outcomes)
+            for round_mask in self._rounds(rows, cols):
+                self._update(rows[round_mask], cols[round_mask], outcomes[round_mask])
+            touched = {}
+            names = {index: name for name, index in self._students.items()}
+            concepts = {index: name for name, index in self._concepts.items()}
+            for row, col in set(zip(rows.tolist(), cols.tolist())):
+                touched[(names[row], concepts[col])] = float(self._known[row, col])
+            return touched
+
+    @staticmethod
+    def _rounds(rows: np.ndarray, cols: np.ndarray) -> List[np.ndarray]:
+        """Masks selecting the k-th event of each pair, for k = 0, 1, ..."""
+        pair = rows * (cols.max() + 1) + cols
+        order = np.argsort(pair, kind="stable")
+        sorted_pairs = pair[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_pairs)) + 1]
+        # Occurrence number of each event within its pair
+        occurrence = np.empty_like(order)
+        occurrence[order] = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return [occurrence == k for k in range(occurrence.max() + 1)]
+
+    def _update(self, rows: np.ndarray, cols: np.ndarray, correct: np.ndarray):
+        known = self._known[rows, cols]
+        known = np.where(np.isnan(known), self._p["p_init"][cols], known)
+        slip, guess, transit = self._p["p_slip"][cols], self._p["p_guess"][cols], self._p["p_transit"][cols]
+        posterior = np.where(
+            correct,
+            known * (1 - slip) / (known * (1 - slip) + (1 - known) * guess),
+            known * slip / (known * slip + (1 - known) * (1 - guess))
+        )
+        self._known[rows, cols] = posterior + (1 - posterior) * transit
+
+    def mastery(self, student_id: str, concept: str) -> float:
+        """P(known), or the concept's prior if there is no evidence yet"""
+        with self._lock:
+            row = self._students.get(student_id)
+            col = self._concepts.get(concept)
+            if row is not None and col is not None and not np.isnan(self._known[row, col]):
+                return float(self._known[row, col])
+        return self._params.get(concept, DEFAULT_PARAMS).p_init
+
+    def student_state(self, student_id: str) -> Dict[str, float]:
+        """P(known) of the concepts with evidence for a student, for snapshots"""
+        with self._lock:
+            row = self._students.get(student_id)
+            if row is None:
+                return {}
+            values = self._known[row]
+            return {concept: float(values[col]) for concept, col in self._concepts.items()
+                    if not np.isnan(values[col])}
+
+    def restore_student(self, student_id: str, state: Dict[str, float]):
+        """Load values produced by student_state"""
+        with self._lock:
+            row = self._student_index(student_id)
+            for concept, known in state.items():
+                self._known[row, self._concept_index(concept)] = known
+
+    def student_mastery(self, student_id: str, concepts: Iterable[str]) -> Dict[str, float]:
+        return {concept: self.mastery(student_id, concept) for concept in concepts}
+
+    def mastery_matrix(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """(students, concepts, P(known) matrix with priors for missing pairs)"""
+        with self._lock:
+            n, m = len(self._students), len(self._concepts)
+            known = self._known[:n, :m].copy()
+            known = np.where(np.isnan(known), self._p["p_init"][:m], known)
+            return list(self._students), list(self._concepts), known
@@ -2,7 +2,20 @@
 Student Learning Memory Management
 """
 
-from typing import List, Dict
+import atexit
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Dict, Mapping, Optional
+
+import numpy as np
+
+from tools.cohort_analytics import CohortAnalytics
+from tools.concept_mastery import ConceptMasteryIndex
+from tools.session_log import SQLiteSessionLog
+from tools.tiered_store import TieredStore, encode_json, decode_json
+from tools.vector_index import SessionVectorIndex, embed_session, error_signature
+from tools.telemetry import get_tracer
 
 
 class StudentMemoryManager:
@@ -10,36 +23,178 @@ class StudentMemoryManager:
     Manages student learning history using vector embeddings.
     Tracks concepts learned, common mistakes, progress over time.
     
-    For hackathon: Using simple in-memory storage.
-    Production: Would use Vertex AI Vector Search.
+    Sessions are kept per student and attempt. With a store_path they are
+    also appended to a SQLite session log off the request path, and a
+    student's history is read back only when first asked for.
+    Every session is embedded into a local vector index (saved next to
+    the log as store_path + ".vectors.npy") for similarity search. The
+    index is only saved on a clean exit, so on startup any logged session
+    it lacks (after a crash) is embedded again from the log.
+    
+    Graded attempts go to the log as well, and the cohort analytics are
+    rebuilt from it on startup.
+    
+    Loaded students live in a tiered store: at most max_hot_students in
+    memory, idle ones compressed to a cold tier on disk (store_path +
+    ".cold", or a temporary directory removed at exit), so memory stays
+    bounded however many students connect.
     """
-    def __init__(self, project_id: str = "demo", location: str = "us-central1"):
-        self.memory_store = {}
-        self.concept_history = []
+    def __init__(self, project_id: str = "demo", location: str = "us-central1",
+                 store_path: Optional[str] = None, max_hot_students: int = 256,
+                 hot_ttl: float = 900.0):
+        # student_id -> {attempt: session data}, for students loaded so far
+        if store_path:
+            cold_dir = f"{store_path}.cold"
+        else:
+            cold_dir = tempfile.mkdtemp(prefix="codementor-cold-")
+            atexit.register(shutil.rmtree, cold_dir, True)
+        self.memory_store = TieredStore(
+            max_hot=max_hot_students, ttl=hot_ttl,
+            cold_dir=cold_dir,
+            encode=self._encode_sessions, decode=self._decode_sessions
+        )
+        self.mastery = ConceptMasteryIndex()
+        # Class-wide attempt records for instructor dashboards
+        self.cohort = CohortAnalytics()
         self.session_count = 0
+        # student_id -> callable returning saved sessions, read on first access
+        self._deferred_loads: Dict[str, Callable[[], Dict[int, Mapping]]] = {}
+        self.log = SQLiteSessionLog(store_path) if store_path else None
+        # (student_id, attempt) -> error type, for re-embedding sessions
+        errors = {}
+        if self.log is not None:
+            for graded in self.log.graded_attempts():
+                self.cohort.record(*graded)
+                errors[graded[0], graded[2]] = graded[3]
+        self.index_path = f"{store_path}.vectors.npy" if store_path else None
+        if self.index_path and os.path.exists(self.index_path):
+            self.index = SessionVectorIndex.load(self.index_path)
+        else:
+            self.index = SessionVectorIndex()
+        if self.log is not None:
+            self._index_missing_sessions(errors)
+        if store_path:
+            atexit.register(self.close)
+        
+    def store_session(self, student_id: str, attempt: int, student_data: Mapping, error: str = ""):
+        """Store session data for long-term memory; error is the run's error message"""
+        with get_tracer().start_as_current_span("memory.store_session") as span:
+            span.set_attribute("session.key", f"{student_id}/{attempt}")
+            if student_id in self._deferred_loads:
+                self.get_student_sessions(student_id)
+
+            def add(sessions):
+                # Runs under the store lock, so a concurrent demotion
+                # cannot encode the sessions before this write lands
+                if sessions is not None:
+                    sessions[attempt] = student_data
+                    return sessions
+                return None if self.log is not None else {attempt: student_data}
+
+            self.memory_store.update(student_id, add)
+            # Students not loaded yet are only written to the log, so
+            # loading them later still sees their full history
+            if self.log is not None:
+                self.log.append(student_id, attempt, student_data)
+            self.index.add((student_id, attempt), embed_session(
+                student_data.get("current_problem", ""), student_data.get("student_code", ""), error
+            ))
+            self.session_count += 1
+    
+    def _index_missing_sessions(self, errors: Dict):
+        """Embed logged sessions the saved index lacks, then save it"""
+        indexed = set(self.index.keys)
+        missing: Dict[str, List[int]] = {}
+        for student_id, attempt in self.log.session_keys():
+            if (student_id, attempt) not in indexed:
+                missing.setdefault(student_id, []).append(attempt)
+        if not missing:
+            return
+        keys, vectors = [], []
+        for student_id, attempts in missing.items():
+            sessions = self.log.load_student(student_id)
+            for attempt in attempts:
+                data = sessions[attempt]
+                keys.append((student_id, attempt))
+                vectors.append(embed_session(data.get("current_problem", ""), data.get("student_code", ""),
+                                             errors.get((student_id, attempt), "")))
+        self.index.add_batch(keys, np.stack(vectors))
+        self.index.save(self.index_path)
+
+    def get_student_sessions(self, student_id: str) -> Dict[int, Mapping]:
+        """A student's sessions by attempt, loaded from the log on first use"""
+        sessions = self.memory_store.get(student_id)
+        if sessions is None:
+            sessions = {}
+            deferred = self._deferred_loads.pop(student_id, None)
+            if deferred is not None:
+                sessions = dict(deferred())
+            elif self.log is not None:
+                self.log.flush()
+                sessions = self.log.load_student(student_id)
+            self.memory_store.put(student_id, sessions)
+        return sessions
+    
+    def defer_student_load(self, student_id: str, load: Callable[[], Dict[int, Mapping]]):
+        """Supply a student's saved sessions, loaded only if they are needed"""
+        if student_id not in self.memory_store:
+            self._deferred_loads[student_id] = load
+    
+    @staticmethod
+    def _encode_sessions(sessions: Dict[int, Mapping]) -> bytes:
+        return encode_json(list(sessions.items()))
+    
+    @staticmethod
+    def _decode_sessions(data: bytes) -> Dict[int, Dict]:
+        return {attempt: session for attempt, session in decode_json(data)}
+    
+    def memory_stats(self) -> Dict:
+        """Per-tier entry counts, sizes and hit counts of the session memory"""
+        return {
+            "sessions": self.memory_store.stats(),
+            "vector_index": {"entries": len(self.index), "bytes": int(self.index.vectors.nbytes)},
+            "mastery": self.mastery.stats()
+        }
+    
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+        if self.index_path:
+            self.index.save(self.index_path)
         
-    def store_session(self, session_id: str, student_data: Dict):
-        """Store session data for long-term memory"""
-        self.memory_store[session_id] = student_data
-        self.session_count += 1
+    def retrieve_similar_sessions(self, current_problem: str, top_k: int = 3, code: str = "",
+                                  error: str = "", exclude_student: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve similar past learning sessions by cosine similarity of
+        problem text, code tokens and error type.
         
-    def retrieve_similar_sessions(self, current_problem: str, top_k: int = 3):
-        """Retrieve similar past learning sessions"""
-        # For demo: return mock data
-        # Production: embedding similarity search
-        return []
+        Returns:
+            [{"student_id": str, "attempt": int, "score": float}, ...]
+        """
+        skip = (lambda key: key[0] == exclude_student) if exclude_student is not None else None
+        matches = self.index.search(embed_session(current_problem, code, error), top_k, skip)
+        return [
+            {"student_id": student_id, "attempt": attempt, "score": score}
+            for (student_id, attempt), score in matches
+        ]
     
-    def track_concept_mastery(self, concept: str, mastery_level: float):
+    def record_attempt(self, student_id: str, problem: str, attempt: int, error: str = "",
+                       hint_level: int = 0, concept_gap: str = "", success: bool = False):
+        """Add a graded code attempt to the cohort analytics (and the log)"""
+        signature = error_signature(error)
+        self.cohort.record(student_id, problem, attempt, signature, hint_level, concept_gap, success)
+        if self.log is not None:
+            self.log.append_graded(student_id, problem, attempt, signature, hint_level, concept_gap, success)
+    
+    def track_concept_mastery(self, concept: str, mastery_level: float,
+                              student_id: str = "default", timestamp: Optional[float] = None):
         """Track student's understanding of specific concepts"""
-        self.concept_history.append({
-            "concept": concept,
-            "mastery": mastery_level,
-            "timestamp": "now"
-        })
+        self.mastery.track(student_id, concept, mastery_level, timestamp)
         
-    def get_concept_mastery(self, concept: str) -> float:
+    def get_concept_mastery(self, concept: str, student_id: str = "default") -> float:
         """Get current mastery level for a concept"""
-        relevant = [h for h in self.concept_history if h["concept"] == concept]
-        if not relevant:
-            return 0.0
-        return relevant[-1]["mastery"]
+        return self.mastery.latest(student_id, concept)
+    
+    def get_cohort_mastery(self, concept: str) -> Dict[str, float]:
+        """Latest mastery of concept for every student, by student_id"""
+        return self.mastery.cohort(concept)
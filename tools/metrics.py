@@ -0,0 +1,323 @@
+"""
+Pipeline Metrics
+In-process counters, gauges and latency histograms for the tutoring
+pipeline, exposed in the Prometheus text format over HTTP or as a file.
+
+Exposition is off unless configured; set either of
+    CODEMENTOR_METRICS_PORT=9464            (serves /metrics on localhost)
+    CODEMENTOR_METRICS_FILE=metrics.prom    (rewritten every few seconds)
+"""
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Seconds; model calls range from ~0.3s (flash) to tens of seconds (pro)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                           2.5, 5.0, 10.0, 20.0, 40.0, 60.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(self._samples())
+
+    def _samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}\n"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at export time"""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+        self._functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read the value from function whenever the gauge is exported"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            function = self._functions.get(key)
+            if function is None:
+                return self._values.get(key, 0)
+        return function()
+
+    def _samples(self):
+        with self._lock:
+            keys = sorted(set(self._values) | set(self._functions))
+        for key in keys:
+            value = self.value(**dict(zip(self.labelnames, key)))
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}\n"
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with an interpolated quantile estimate"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [per-bucket counts, sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate the q-quantile (e.g. 0.99) by interpolating within buckets"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if not series or not series[2]:
+                return None
+            counts, total = list(series[0]), series[2]
+        rank = q * total
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-2]
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, ([*s[0]], s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total_sum, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}\n"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total_sum)}\n"
+            yield f"{self.name}_count{labels} {count}\n"
+
+
+class MetricsRegistry:
+    """Named metrics plus text exposition"""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render_text(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+    def dump(self, path: str):
+        """Write the exposition atomically, for file-based scrapers"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_text())
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry and the tutoring pipeline's metrics
+registry = MetricsRegistry()
+
+AGENT_CALLS = registry.counter(
+    "codementor_agent_calls_total", "Model calls per agent", ("agent",))
+AGENT_FALLBACKS = registry.counter(
+    "codementor_agent_fallbacks_total", "Model calls answered with the canned fallback", ("agent",))
+AGENT_LATENCY = registry.histogram(
+    "codementor_agent_latency_seconds", "Model call latency per agent", ("agent",))
+TURNS = registry.counter(
+    "codementor_turns_total", "Tutoring turns by responding agent", ("agent_used",))
+TURN_LATENCY = registry.histogram(
+    "codementor_turn_latency_seconds", "End-to-end latency of process_student_input")
+SANDBOX_RUNS = registry.counter(
+    "codementor_sandbox_runs_total", "Sandbox executions by outcome (ok, error, timeout)", ("outcome",))
+SANDBOX_TIMEOUTS = registry.counter(
+    "codementor_sandbox_timeouts_total", "Sandbox executions stopped by the time limit")
+SANDBOX_LATENCY = registry.histogram(
+    "codementor_sandbox_latency_seconds", "Sandbox execution time")
+CACHE_LOOKUPS = registry.counter(
+    "codementor_cache_lookups_total", "Semantic cache lookups by result (hit, miss)", ("namespace", "result"))
+CACHE_HIT_RATIO = registry.gauge(
+    "codementor_cache_hit_ratio", "Semantic cache hits / lookups", ("namespace",))
+ACTIVE_SESSIONS = registry.gauge(
+    "codementor_active_sessions", "Student sessions held by the orchestrator")
+
+
+def record_cache_lookup(namespace: str, hit: bool):
+    CACHE_LOOKUPS.inc(namespace=namespace, result="hit" if hit else "miss")
+    hits = CACHE_LOOKUPS.value(namespace=namespace, result="hit")
+    misses = CACHE_LOOKUPS.value(namespace=namespace, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), namespace=namespace)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_file_dump(path: str, interval: float = 5.0) -> threading.Thread:
+    """Rewrite path with the current exposition every interval seconds"""
+    def loop():
+        while True:
+            registry.dump(path)
+            time.sleep(interval)
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+_exposition_started = False
+_exposition_lock = threading.Lock()
+
+
+def configure_metrics_exposition(port: Optional[int] = None, path: Optional[str] = None) -> bool:
+    """
+    Start the HTTP endpoint and/or file dump once per process, from the
+    arguments or CODEMENTOR_METRICS_PORT / CODEMENTOR_METRICS_FILE.
+    """
+    global _exposition_started
+    port = port or int(os.getenv("CODEMENTOR_METRICS_PORT", "0") or 0)
+    path = path or os.getenv("CODEMENTOR_METRICS_FILE", "")
+    with _exposition_lock:
+        if _exposition_started or not (port or path):
+            return _exposition_started
+        if port:
+            serve_metrics(port)
+        if path:
+            start_file_dump(path)
+        _exposition_started = True
+        return True
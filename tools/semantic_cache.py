@@ -0,0 +1,113 @@
+"""
+Semantic Result Cache
+Process-wide cache for reviews, hints and execution results keyed by
+structural code fingerprints, shared by every student on the server.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from tools.code_fingerprint import source_digest
+from tools.metrics import record_cache_lookup
+from tools.telemetry import get_tracer
+
+# Distinct raw sources remembered per entry for collision reporting
+_MAX_SOURCES_PER_ENTRY = 16
+
+
+class SemanticCache:
+    """
+    Thread-safe LRU cache partitioned by namespace ("review", "hint", "exec").
+
+    A lookup that is served to a different raw submission than the one that
+    filled the entry counts as a fingerprint collision - two structurally
+    equivalent programs sharing one result.
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _namespace_stats(self, namespace: str) -> Dict:
+        return self._stats.setdefault(
+            namespace, {"hits": 0, "misses": 0, "collisions": 0}
+        )
+
+    def get(self, namespace: str, key: Hashable, source: Optional[str] = None):
+        """Return a copy of the cached value, or None on a miss"""
+        with get_tracer().start_as_current_span("cache.lookup") as span:
+            span.set_attribute("cache.namespace", namespace)
+            value = self._lookup(namespace, key, source)
+            span.set_attribute("cache.hit", value is not None)
+        record_cache_lookup(namespace, value is not None)
+        return value
+
+    def _lookup(self, namespace: str, key: Hashable, source: Optional[str]):
+        full_key = (namespace, key)
+        with self._lock:
+            stats = self._namespace_stats(namespace)
+            if full_key not in self._entries:
+                stats["misses"] += 1
+                return None
+            self._entries.move_to_end(full_key)
+            stats["hits"] += 1
+            if source is not None:
+                sources = self._sources[full_key]
+                digest = source_digest(source)
+                if digest not in sources:
+                    stats["collisions"] += 1
+                    if len(sources) < _MAX_SOURCES_PER_ENTRY:
+                        sources.add(digest)
+            value = self._entries[full_key]
+        return copy.deepcopy(value)
+
+    def put(self, namespace: str, key: Hashable, value, source: Optional[str] = None):
+        """Store a copy of value"""
+        full_key = (namespace, key)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[full_key] = value
+            self._entries.move_to_end(full_key)
+            sources = self._sources.setdefault(full_key, set())
+            if source is not None and len(sources) < _MAX_SOURCES_PER_ENTRY:
+                sources.add(source_digest(source))
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._sources.pop(evicted, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sources.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict:
+        """
+        Hit/miss/collision counts per namespace plus totals.
+        collision_rate is the share of hits served to a different submission.
+        """
+        with self._lock:
+            per_namespace = {ns: dict(s) for ns, s in self._stats.items()}
+            entries = len(self._entries)
+        for s in per_namespace.values():
+            s["collision_rate"] = s["collisions"] / s["hits"] if s["hits"] else 0.0
+        hits = sum(s["hits"] for s in per_namespace.values())
+        misses = sum(s["misses"] for s in per_namespace.values())
+        collisions = sum(s["collisions"] for s in per_namespace.values())
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "collisions": collisions,
+            "collision_rate": collisions / hits if hits else 0.0,
+            "namespaces": per_namespace,
+        }
+
+
+# Shared by all orchestrators and agents in this process
+shared_cache = SemanticCache()
@@ -0,0 +1,190 @@
+"""
+Durable Session Log
+Append-only SQLite (WAL) store of tutoring sessions and graded attempts
+with write-behind batching, keyed by student and attempt.
+"""
+
+import atexit
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    created REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_student ON sessions (student_id, attempt);
+CREATE TABLE IF NOT EXISTS graded_attempts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    problem TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    hint_level INTEGER NOT NULL,
+    concept_gap TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+_INSERT_SESSION = "INSERT INTO sessions (student_id, attempt, created, data) VALUES (?, ?, ?, ?)"
+_INSERT_GRADED = ("INSERT INTO graded_attempts (student_id, problem, attempt, error, hint_level,"
+                  " concept_gap, success, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Queue markers: commit the current batch now / commit and stop
+_FLUSH = object()
+_STOP = None
+
+
+def _json_default(value):
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SQLiteSessionLog:
+    """
+    Sessions are only ever inserted; a student's later writes for the same
+    attempt shadow earlier ones on read. append() never touches the disk:
+    a writer thread commits queued rows in batches of up to batch_size, at
+    least every flush_interval seconds.
+    """
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="session-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL only risks the last batch on power loss, not corruption
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def append(self, student_id: str, attempt: int, data: Mapping):
+        """Queue a session record for the writer thread"""
+        if self._closed:
+            raise RuntimeError("session log is closed")
+        self._queue.put((_INSERT_SESSION, (student_id, attempt, time.time(),
+                                           json.dumps(data, default=_json_default))))
+
+    def append_graded(self, student_id: str, problem: str, attempt: int, error: str = "",
+                      hint_level: int = 0, concept_gap: str = "", success: bool = False,
+                      timestamp: Optional[float] = None):
+        """Queue a graded attempt (see CohortAnalytics.record) for the writer thread"""
+        if self._closed:
+            raise RuntimeError("session log is closed")
+        self._queue.put((_INSERT_GRADED, (student_id, problem, attempt, error, hint_level, concept_gap,
+                                          int(success), time.time() if timestamp is None else timestamp)))
+
+    def _write_loop(self):
+        connection = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            if item is _FLUSH:
+                self._queue.task_done()
+                continue
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _FLUSH:
+                    self._queue.task_done()
+                    break
+                if item is _STOP:
+                    # Commit what we have, then stop on the next pass
+                    self._queue.task_done()
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            try:
+                with connection:
+                    for statement, rows in itertools.groupby(batch, key=lambda item: item[0]):
+                        connection.executemany(statement, [params for _, params in rows])
+            except Exception as e:
+                print(f"Session log write failed ({len(batch)} records): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def flush(self):
+        """Block until every queued record is committed"""
+        if self._closed:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def load_student(self, student_id: str) -> Dict[int, Dict]:
+        """All stored sessions of one student, by attempt"""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT attempt, data FROM sessions WHERE student_id = ? ORDER BY seq",
+                (student_id,)
+            ).fetchall()
+        return {attempt: json.loads(data) for attempt, data in rows}
+
+    def graded_attempts(self) -> Iterator[Tuple]:
+        """
+        Every graded attempt in insertion order, as
+        (student_id, problem, attempt, error, hint_level, concept_gap, success, timestamp)
+        """
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT student_id, problem, attempt, error, hint_level, concept_gap, success, created"
+                " FROM graded_attempts ORDER BY seq"
+            ).fetchall()
+        for *fields, success, created in rows:
+            yield (*fields, bool(success), created)
+
+    def session_keys(self) -> List[Tuple[str, int]]:
+        """Distinct (student_id, attempt) pairs with a stored session"""
+        with self._read_lock:
+            rows = self._reader.execute("SELECT DISTINCT student_id, attempt FROM sessions").fetchall()
+        return [(student_id, attempt) for student_id, attempt in rows]
+
+    def students(self) -> List[str]:
+        with self._read_lock:
+            rows = self._reader.execute("SELECT DISTINCT student_id FROM sessions").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, student_id: Optional[str] = None) -> int:
+        query, args = "SELECT COUNT(*) FROM sessions", ()
+        if student_id is not None:
+            query, args = query + " WHERE student_id = ?", (student_id,)
+        with self._read_lock:
+            return self._reader.execute(query, args).fetchone()[0]
+
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
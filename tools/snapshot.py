@@ -0,0 +1,153 @@
+"""
+Session Snapshots
+Versioned binary container for a student's saved state. Each named
+section is compressed separately and only decoded when it is read.
+
+Layout (little-endian):
+    magic "CMSNAP" | u16 version | u16 section count
+    per section: u16 name length | name | u64 offset | u32 length
+    section payloads (zlib-compressed JSON)
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, List
+
+MAGIC = b"CMSNAP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<6sHH")
+_ENTRY = struct.Struct("<QI")
+
+
+class SnapshotFormatError(ValueError):
+    """File is not a snapshot, or was written by a newer format version"""
+
+
+def _json_default(value):
+    if hasattr(value, "items"):
+        return dict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_snapshot(path: str, sections: Dict[str, Any]):
+    """Write sections atomically to path"""
+    payloads = [
+        (name.encode("utf-8"), zlib.compress(
+            json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8"), 1
+        ))
+        for name, value in sections.items()
+    ]
+    table_size = sum(2 + len(name) + _ENTRY.size for name, _ in payloads)
+    offset = _HEADER.size + table_size
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(payloads))]
+    for name, payload in payloads:
+        parts.append(struct.pack("<H", len(name)) + name + _ENTRY.pack(offset, len(payload)))
+        offset += len(payload)
+    parts.extend(payload for _, payload in payloads)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp_path, path)
+
+
+class SnapshotWriter:
+    """
+    Writes snapshots on a background thread so saving stays off the
+    caller's path. Saves of a path that queue up before the writer gets
+    to it are coalesced: only the latest sections are written.
+    """
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, sections: Dict[str, Any]):
+        with self._cond:
+            self._pending[path] = sections
+            self._cond.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                sections = self._pending.pop(path)
+                self._busy = True
+            try:
+                write_snapshot(path, sections)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Could not write snapshot {path}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Block until every submitted snapshot is on disk"""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        """Write what is pending, then stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+class Snapshot:
+    """
+    Reads the header and section table up front; a section's bytes are
+    read and decoded on first access and then kept.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._decoded: Dict[str, Any] = {}
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise SnapshotFormatError(f"{path} is truncated")
+            magic, self.version, count = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise SnapshotFormatError(f"{path} is not a session snapshot")
+            if self.version > FORMAT_VERSION:
+                raise SnapshotFormatError(
+                    f"{path} uses snapshot format {self.version}; this build reads up to {FORMAT_VERSION}"
+                )
+            self._sections = {}
+            for _ in range(count):
+                (name_length,) = struct.unpack("<H", f.read(2))
+                name = f.read(name_length).decode("utf-8")
+                self._sections[name] = _ENTRY.unpack(f.read(_ENTRY.size))
+
+    @property
+    def sections(self) -> List[str]:
+        return list(self._sections)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def __getitem__(self, name: str):
+        if name not in self._decoded:
+            offset, length = self._sections[name]
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                payload = f.read(length)
+            self._decoded[name] = json.loads(zlib.decompress(payload))
+        return self._decoded[name]
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self._sections else default
@@ -0,0 +1,146 @@
+"""
+Tracing for the tutoring pipeline
+Thin layer over OpenTelemetry: one span per tutoring turn with child spans
+for sandbox runs, model calls, cache lookups and memory writes, exported
+locally to the console or a JSON-lines file.
+
+Tracing is off unless configure_tracing() is given an exporter or the
+CODEMENTOR_TRACE environment variable is set:
+    CODEMENTOR_TRACE=console
+    CODEMENTOR_TRACE=file:traces.jsonl
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+)
+
+from tools.metrics import AGENT_CALLS, AGENT_FALLBACKS, AGENT_LATENCY
+
+TRACER_NAME = "codementor"
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends each finished span as one JSON line to a local file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _exporter_for(spec: str) -> SpanExporter:
+    if spec == "console":
+        return ConsoleSpanExporter()
+    if spec.startswith("file:"):
+        return JsonLinesSpanExporter(spec[len("file:"):])
+    raise ValueError(f"Unknown trace exporter '{spec}' (use 'console' or 'file:<path>')")
+
+
+def configure_tracing(exporter: Optional[str] = None) -> bool:
+    """
+    Install a tracer provider with a local exporter. Safe to call more
+    than once; only the first call with an exporter takes effect.
+    Returns True if tracing is enabled.
+    """
+    global _configured
+    spec = exporter or os.getenv("CODEMENTOR_TRACE", "")
+    with _configure_lock:
+        if _configured or not spec:
+            return _configured
+        provider = TracerProvider(resource=Resource.create({"service.name": "codementor-ai"}))
+        provider.add_span_processor(BatchSpanProcessor(_exporter_for(spec)))
+        trace.set_tracer_provider(provider)
+        _configured = True
+        return True
+
+
+def get_tracer():
+    """Tracer for pipeline spans; a no-op tracer until tracing is configured"""
+    return trace.get_tracer(TRACER_NAME)
+
+
+class _MeteredSpan:
+    """Span proxy that remembers the fallback attribute for the metrics"""
+    def __init__(self, span):
+        self._span = span
+        self.fallback = False
+
+    def set_attribute(self, key, value):
+        if key == "fallback":
+            self.fallback = bool(value)
+        self._span.set_attribute(key, value)
+
+    def __getattr__(self, name):
+        return getattr(self._span, name)
+
+
+@contextmanager
+def model_call_span(agent: str, model: str, prompt: str, **attributes):
+    """
+    Span around one model call, also counted in the agent call, latency
+    and fallback metrics. Set span attribute "fallback" to True in the
+    caller's except branch when the canned fallback is used.
+    """
+    with get_tracer().start_as_current_span(f"agent.{agent}.generate") as span:
+        metered = _MeteredSpan(span)
+        metered.set_attribute("agent", agent)
+        metered.set_attribute("model", model)
+        metered.set_attribute("prompt.chars", len(prompt))
+        metered.set_attribute("fallback", False)
+        for key, value in attributes.items():
+            metered.set_attribute(key, value)
+        start = time.perf_counter()
+        try:
+            yield metered
+        finally:
+            AGENT_LATENCY.observe(time.perf_counter() - start, agent=agent)
+            AGENT_CALLS.inc(agent=agent)
+            if metered.fallback:
+                AGENT_FALLBACKS.inc(agent=agent)
+
+
+def current_context():
+    """Capture the active trace context to continue it on another thread"""
+    return otel_context.get_current()
+
+
+@contextmanager
+def attached_context(ctx):
+    """Make ctx (from current_context or extract) active for the block"""
+    token = otel_context.attach(ctx)
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def inject_trace_context() -> Dict[str, str]:
+    """W3C trace headers for the active span, to carry inside a message"""
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_trace_context(carrier: Optional[Dict[str, str]]):
+    return propagate.extract(carrier or {})
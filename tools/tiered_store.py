@@ -0,0 +1,182 @@
+"""
+Tiered Store
+Bounded hot tier of live objects with LRU/TTL eviction, spilling to a cold
+tier of compressed blobs (on disk when a directory is given) and
+transparently promoting them back on access.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def _json_default(value):
+    if hasattr(value, "items"):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes):
+    return json.loads(data.decode("utf-8"))
+
+
+class TieredStore:
+    """
+    Key -> value map with two tiers. At most max_hot values stay in memory,
+    and any value untouched for ttl seconds is demoted; demoted values are
+    encoded and zlib-compressed into the cold tier. Values must survive
+    encode/decode (JSON by default).
+
+    An on-disk cold tier is scratch space for this process, not a durable
+    store: blobs left by an earlier process are removed at startup.
+    """
+    def __init__(self, max_hot: int = 256, ttl: float = 900.0, cold_dir: Optional[str] = None,
+                 encode: Callable[[Any], bytes] = encode_json,
+                 decode: Callable[[bytes], Any] = decode_json,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_hot = max_hot
+        self.ttl = ttl
+        self.cold_dir = cold_dir
+        self.encode = encode
+        self.decode = decode
+        self._clock = clock
+        # key -> [value, last_access]
+        self._hot = OrderedDict()
+        # key -> compressed bytes, or compressed size when cold_dir is set
+        self._cold: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._stats = {"hot_hits": 0, "cold_hits": 0, "misses": 0, "demotions": 0}
+        if cold_dir:
+            os.makedirs(cold_dir, exist_ok=True)
+            for name in os.listdir(cold_dir):
+                if name.endswith(".z"):
+                    os.remove(os.path.join(cold_dir, name))
+
+    def _cold_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cold_dir, f"{digest}.z")
+
+    def _write_cold(self, key: str, value):
+        blob = zlib.compress(self.encode(value), 6)
+        if self.cold_dir:
+            path = self._cold_path(key)
+            with open(path, "wb") as f:
+                f.write(blob)
+            self._cold[key] = len(blob)
+        else:
+            self._cold[key] = blob
+
+    def _read_cold(self, key: str):
+        if self.cold_dir:
+            with open(self._cold_path(key), "rb") as f:
+                blob = f.read()
+            os.remove(self._cold_path(key))
+        else:
+            blob = self._cold[key]
+        del self._cold[key]
+        return self.decode(zlib.decompress(blob))
+
+    def _demote_expired(self, now: float):
+        while self._hot:
+            key, (value, last_access) = next(iter(self._hot.items()))
+            if len(self._hot) <= self.max_hot and now - last_access < self.ttl:
+                break
+            del self._hot[key]
+            self._write_cold(key, value)
+            self._stats["demotions"] += 1
+
+    def get(self, key: str, default=None):
+        """Value for key from either tier; cold values are promoted"""
+        now = self._clock()
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._hot.move_to_end(key)
+                self._stats["hot_hits"] += 1
+                value = entry[0]
+            elif key in self._cold:
+                value = self._read_cold(key)
+                self._hot[key] = [value, now]
+                self._stats["cold_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+                value = default
+            self._demote_expired(now)
+            return value
+
+    def update(self, key: str, fn: Callable[[Any], Any]):
+        """
+        Replace key's value with fn(current value, or None if absent),
+        atomically with respect to demotion; the value may be mutated in
+        place. If fn returns None the entry is left as it was (a missing
+        key stays missing). Returns fn's result.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                current = entry[0]
+                self._stats["hot_hits"] += 1
+            elif key in self._cold:
+                current = self._read_cold(key)
+                self._stats["cold_hits"] += 1
+            else:
+                current = None
+                self._stats["misses"] += 1
+            value = fn(current)
+            if value is not None:
+                self._hot[key] = [value, now]
+                self._hot.move_to_end(key)
+            elif current is not None and entry is None:
+                # Promoted for fn but not replaced: keep it
+                self._hot[key] = [current, now]
+            self._demote_expired(now)
+            return value
+
+    def put(self, key: str, value):
+        now = self._clock()
+        with self._lock:
+            if key in self._cold:
+                self._read_cold(key)
+            self._hot[key] = [value, now]
+            self._hot.move_to_end(key)
+            self._demote_expired(now)
+
+    def demote_idle(self) -> int:
+        """Move values idle for longer than ttl to the cold tier"""
+        with self._lock:
+            before = self._stats["demotions"]
+            self._demote_expired(self._clock())
+            return self._stats["demotions"] - before
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._hot or key in self._cold
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hot) + len(self._cold)
+
+    def stats(self) -> Dict:
+        """Entries, bytes and hit counts per tier"""
+        with self._lock:
+            cold_bytes = sum(v if isinstance(v, int) else len(v) for v in self._cold.values())
+            return {
+                "hot": {"entries": len(self._hot), "capacity": self.max_hot, "hits": self._stats["hot_hits"]},
+                "cold": {"entries": len(self._cold), "bytes": cold_bytes, "hits": self._stats["cold_hits"],
+                         "on_disk": bool(self.cold_dir)},
+                "misses": self._stats["misses"],
+                "demotions": self._stats["demotions"]
+            }
@@ -0,0 +1,176 @@
+"""
+Session Vector Index
+Deterministic offline embeddings of tutoring sessions and a NumPy index
+for top-k cosine search, persisted as a memory-mapped .npy file.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+
+# Relative weight of each feature group in the embedding
+PROBLEM_WEIGHT = 1.0
+CODE_WEIGHT = 1.0
+ERROR_WEIGHT = 2.0
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CODE_TOKEN = re.compile(r"[A-Za-z_]\w*|\d+|==|!=|<=|>=|//|\*\*|[^\s\w]")
+_ERROR_TYPE = re.compile(r"\b([A-Z]\w*(?:Error|Exception|Warning))\b")
+
+
+def _hashed(feature: str, dim: int) -> Tuple[int, float]:
+    """Bucket and sign of a feature (signed hashing trick)"""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+
+def _problem_features(text: str) -> List[str]:
+    features = []
+    for word in _WORD.findall(text.lower()):
+        padded = f"<{word}>"
+        features.extend("p:" + padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def _code_features(code: str) -> List[str]:
+    tokens = _CODE_TOKEN.findall(code)
+    return ["c:" + t for t in tokens] + ["c2:" + a + " " + b for a, b in zip(tokens, tokens[1:])]
+
+
+def error_signature(error: str) -> str:
+    """Exception type named in an error message, or "" """
+    match = _ERROR_TYPE.search(error or "")
+    return match.group(1) if match else ""
+
+
+def embed_session(problem: str, code: str = "", error: str = "", dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Unit-length float32 embedding from hashed n-grams of a session"""
+    vector = np.zeros(dim, dtype=np.float32)
+    signature = error_signature(error)
+    groups = (
+        (_problem_features(problem), PROBLEM_WEIGHT),
+        (_code_features(code), CODE_WEIGHT),
+        (["e:" + signature] if signature else [], ERROR_WEIGHT),
+    )
+    for features, weight in groups:
+        if not features:
+            continue
+        group = np.zeros(dim, dtype=np.float32)
+        for feature in features:
+            index, sign = _hashed(feature, dim)
+            group[index] += sign
+        # Normalize per group so long code doesn't drown out the problem text
+        group /= np.linalg.norm(group) or 1.0
+        vector += weight * group
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SessionVectorIndex:
+    """
+    Append-only matrix of unit vectors with parallel keys. Inserts are
+    amortized O(1) (capacity doubles); search is one matrix product.
+
+    A saved index is reopened memory-mapped and read-only; it is copied
+    into memory on the first insert after loading.
+
+    Safe to share between threads: inserts hold a lock, and searches read
+    a consistent prefix (rows below the size never change once written).
+    """
+    def __init__(self, dim: int = EMBEDDING_DIM, capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self.keys: List[Hashable] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    def _reserve(self, extra: int):
+        # Caller holds _lock
+        needed = self._size + extra
+        if needed <= self._vectors.shape[0] and self._vectors.flags.writeable:
+            return
+        capacity = max(needed, 2 * self._vectors.shape[0], 1024)
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def add(self, key: Hashable, vector: np.ndarray):
+        self.add_batch([key], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_batch(self, keys: Sequence[Hashable], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(keys), self.dim):
+            raise ValueError(f"expected {(len(keys), self.dim)} vectors, got {vectors.shape}")
+        with self._lock:
+            self._reserve(len(keys))
+            self._vectors[self._size:self._size + len(keys)] = vectors
+            self.keys.extend(keys)
+            self._size += len(keys)
+
+    def search(self, query: np.ndarray, top_k: int = 3,
+               skip: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """Keys of the top_k most similar vectors with their cosine scores"""
+        return self.search_batch(np.asarray(query)[None, :], top_k, skip)[0]
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 3,
+                     skip: Optional[Callable[[Hashable], bool]] = None) -> List[List[Tuple[Hashable, float]]]:
+        """search() for each row of queries, with a single matrix product"""
+        queries = np.asarray(queries, dtype=np.float32)
+        with self._lock:
+            size = self._size
+            vectors, keys = self._vectors[:size], self.keys[:size]
+        if not size:
+            return [[] for _ in range(len(queries))]
+        # Vectors are unit length, so dot products are cosine similarities
+        scores = queries @ vectors.T
+        if skip is not None:
+            mask = np.fromiter((skip(key) for key in keys), dtype=bool, count=size)
+            scores[:, mask] = -np.inf
+        k = min(top_k, size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([(keys[i], float(row[i])) for i in ranked if row[i] != -np.inf])
+        return results
+
+    def save(self, path: str):
+        """Write vectors to path (.npy) and keys to path + ".keys.json" """
+        with self._lock:
+            size = self._size
+            vectors, keys = self._vectors[:size], self.keys[:size]
+        tmp_path = f"{path}.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(size, self.dim))
+        out[:] = vectors
+        out.flush()
+        del out
+        with open(f"{path}.keys.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+        os.replace(tmp_path, path)
+        os.replace(f"{path}.keys.json.tmp", f"{path}.keys.json")
+
+    @classmethod
+    def load(cls, path: str) -> "SessionVectorIndex":
+        """Open a saved index without reading the vectors into memory"""
+        vectors = np.load(path, mmap_mode="r")
+        with open(f"{path}.keys.json", encoding="utf-8") as f:
+            keys = [tuple(key) if isinstance(key, list) else key for key in json.load(f)]
+        index = cls(dim=vectors.shape[1], capacity=0)
+        index._vectors = vectors
+        index._size = len(keys)
+        index.keys = keys
+        return index
@@ -0,0 +1,61 @@
+"""
+Chat History Rendering
+Windowed HTML for the conversation column: recent messages are shown in
+full, older ones are grouped into pages loaded on request.
+"""
+
+import functools
+from typing import Dict, List, Sequence, Tuple
+
+AGENT_NAMES = {
+    "socratic": "🤔 Socratic Mentor",
+    "hint": "💡 Hint Provider",
+    "reviewer": "✅ Code Reviewer",
+    "explainer": "📚 Concept Explainer"
+}
+
+# Most recent messages always rendered in full
+CHAT_WINDOW = 12
+# Older messages per page; pages are cut on event sequence numbers so a
+# page keeps the same messages (and cached HTML) as the session grows
+PAGE_SIZE = 20
+
+
+@functools.lru_cache(maxsize=4096)
+def message_html(agent: str, content: str) -> str:
+    """HTML card for one message, rendered once per (agent, content)"""
+    if agent == "student":
+        return f'<div class="student-msg"><strong>You:</strong> {content}</div>'
+    name = AGENT_NAMES.get(agent, "AI Mentor")
+    content_html = content.replace('\n', '<br>')
+    return f'<div class="agent-card {agent}"><strong>{name}:</strong><br>{content_html}</div>'
+
+
+@functools.lru_cache(maxsize=256)
+def _group_html(items: Tuple[Tuple[str, str], ...]) -> str:
+    return "\n".join(message_html(agent, content) for agent, content in items)
+
+
+def messages_html(messages: Sequence[Dict]) -> str:
+    """HTML for a run of messages, suitable for a single st.markdown call"""
+    return _group_html(tuple((msg.get("agent", "student"), msg["content"]) for msg in messages))
+
+
+def split_window(messages: Sequence[Dict], window: int = CHAT_WINDOW,
+                 page_size: int = PAGE_SIZE) -> Tuple[List[List[Dict]], List[Dict]]:
+    """
+    Split a transcript into (older pages, recent window). Pages are in
+    chronological order and grouped by each message's "seq" (its position
+    when it has none).
+    """
+    messages = list(messages)
+    cut = max(len(messages) - window, 0)
+    pages: List[List[Dict]] = []
+    page_number = None
+    for position, msg in enumerate(messages[:cut]):
+        number = (msg.get("seq", position + 1) - 1) // page_size
+        if number != page_number:
+            pages.append([])
+            page_number = number
+        pages[-1].append(msg)
+    return pages, messages[cut:]
@@ -0,0 +1,75 @@
+"""
+Cohort Charts
+Class-level heatmaps and summaries for the instructor dashboard
+"""
+
+from tools.cohort_analytics import CohortAnalytics, HINT_LEVELS
+from visualization.figure_cache import memoized_figure
+from visualization.learning_journey import THEME_COLORS, journey_template
+
+
+def _cohort_key(analytics: CohortAnalytics):
+    # Rollups only change on insert, so the version identifies the figure
+    return id(analytics), analytics.version
+
+
+def _heatmap(problems, columns, counts, colorscale: str, hover: str, empty_message: str):
+    import plotly.graph_objects as go
+    if not columns or not counts.any():
+        fig = go.Figure(layout=dict(template=journey_template(), height=200))
+        fig.add_annotation(text=empty_message, xref="paper", yref="paper", x=0.5, y=0.5,
+                           showarrow=False, font=dict(size=14, color=THEME_COLORS['text_secondary']))
+        return fig
+    fig = go.Figure(data=[go.Heatmap(
+        z=counts, x=columns, y=problems,
+        colorscale=colorscale,
+        hovertemplate=hover
+    )])
+    fig.update_layout(
+        template=journey_template(),
+        height=max(160, 40 * len(problems) + 80),
+        xaxis=dict(showticklabels=True, side="top"),
+        yaxis=dict(showticklabels=True, autorange="reversed"),
+        margin=dict(l=5, r=5, t=40, b=5)
+    )
+    return fig
+
+
+@memoized_figure(_cohort_key)
+def create_concept_gap_heatmap(analytics: CohortAnalytics):
+    """Concept gaps per problem across all students"""
+    problems, concepts, counts = analytics.concept_gap_matrix()
+    return _heatmap(problems, concepts, counts, "Purples",
+                    "<b>%{y}</b><br>%{x}: %{z} gaps<extra></extra>", "No concept gaps recorded yet")
+
+
+@memoized_figure(_cohort_key)
+def create_error_heatmap(analytics: CohortAnalytics):
+    """Error types per problem across all students"""
+    problems, errors, counts = analytics.error_matrix()
+    return _heatmap(problems, errors, counts, "Reds",
+                    "<b>%{y}</b><br>%{x}: %{z}<extra></extra>", "No errors recorded yet")
+
+
+@memoized_figure(_cohort_key)
+def create_hint_level_chart(analytics: CohortAnalytics):
+    """Share of attempts at each hint level, per problem (stacked bars)"""
+    problems, counts = analytics.hint_level_matrix()
+    totals = counts.sum(axis=1, keepdims=True)
+    shares = counts / totals.clip(min=1) * 100
+    labels = ["No hint"] + [f"Level {level}" for level in range(1, HINT_LEVELS)]
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[
+        go.Bar(name=label, y=problems, x=shares[:, level], orientation='h',
+               hovertemplate=f'<b>%{{y}}</b><br>{label}: %{{x:.0f}}%<extra></extra>')
+        for level, label in enumerate(labels)
+    ])
+    fig.update_layout(
+        template=journey_template(),
+        barmode="stack",
+        showlegend=True,
+        height=max(160, 40 * len(problems) + 80),
+        xaxis=dict(range=[0, 100], showticklabels=True),
+        yaxis=dict(showticklabels=True, autorange="reversed")
+    )
+    return fig
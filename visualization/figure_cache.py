@@ -0,0 +1,131 @@
+"""
+Figure Cache
+Memoizes sidebar figure builders on a digest of their inputs, keeping
+each figure's plotly JSON payload next to it, with a separate LRU per
+session so students never evict each other's figures.
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Scope of figures that do not belong to one session (cohort dashboards)
+SHARED_SCOPE = ""
+
+
+def input_digest(*parts: Hashable) -> str:
+    """Short digest of builder inputs (parts must have a stable repr)"""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """
+    scope -> LRU of digest -> (figure, payload). Each scope (a session id,
+    or SHARED_SCOPE) keeps at most max_entries figures; beyond max_scopes,
+    the scope used longest ago is dropped as a whole.
+
+    The payload is the figure's to_plotly_json() dict, produced once when
+    the figure is built. A cached plotly figure answers to_dict() and
+    to_plotly_json() from it, so st.plotly_chart renders the cached
+    payload instead of walking the figure again on every rerun. Cached
+    figures and payloads are shared and must be treated as read-only.
+    """
+    def __init__(self, max_entries: int = 8, max_scopes: int = 256):
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[str, OrderedDict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _entry(self, digest: str, build: Callable, scope: str) -> Tuple:
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is not None:
+                self._scopes.move_to_end(scope)
+                entry = entries.get(digest)
+                if entry is not None:
+                    entries.move_to_end(digest)
+                    self._stats["hits"] += 1
+                    return entry
+            self._stats["misses"] += 1
+        figure = build()
+        payload = None
+        if hasattr(figure, "to_plotly_json"):
+            payload = figure.to_plotly_json()
+            # Serializing the figure again returns the payload made above
+            figure.to_dict = figure.to_plotly_json = lambda: payload
+        entry = (figure, payload)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None:
+                entries = self._scopes[scope] = OrderedDict()
+            self._scopes.move_to_end(scope)
+            entries[digest] = entry
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        return entry
+
+    def figure(self, digest: str, build: Callable, scope: str = SHARED_SCOPE):
+        """Cached figure for digest, built on a miss"""
+        return self._entry(digest, build, scope)[0]
+
+    def payload(self, digest: str, build: Callable, scope: str = SHARED_SCOPE) -> Optional[Dict]:
+        """Cached to_plotly_json() payload of the figure for digest"""
+        return self._entry(digest, build, scope)[1]
+
+    def drop(self, scope: str):
+        """Forget every figure of one scope, e.g. when its session is reset"""
+        with self._lock:
+            self._scopes.pop(scope, None)
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {**self._stats, "scopes": len(self._scopes),
+                    "entries": sum(len(entries) for entries in self._scopes.values()),
+                    "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0}
+
+
+figure_cache = FigureCache()
+
+
+def memoized_figure(key: Callable[..., tuple]):
+    """
+    Memoize a figure builder. key maps the builder's arguments to the
+    small tuple that determines the figure; only that tuple is hashed.
+
+    The wrapped builder takes two extra keyword arguments: cache_scope
+    (the session id; SHARED_SCOPE by default) and cache_version, which
+    replaces key(...) when the caller already has a version number for
+    the inputs, such as a session's event sequence. .payload(...) takes
+    the same arguments and returns the cached JSON payload; .uncached is
+    the plain builder.
+    """
+    def decorate(builder):
+        def lookup(args, kwargs, cache_scope: str = SHARED_SCOPE,
+                   cache_version: Optional[Hashable] = None) -> Tuple:
+            parts = ("version", cache_version) if cache_version is not None else key(*args, **kwargs)
+            return figure_cache._entry(input_digest(builder.__name__, parts),
+                                       lambda: builder(*args, **kwargs), cache_scope)
+
+        @functools.wraps(builder)
+        def wrapper(*args, cache_scope: str = SHARED_SCOPE, cache_version: Optional[Hashable] = None,
+                    **kwargs):
+            return lookup(args, kwargs, cache_scope, cache_version)[0]
+
+        def payload(*args, cache_scope: str = SHARED_SCOPE, cache_version: Optional[Hashable] = None,
+                    **kwargs) -> Optional[Dict]:
+            return lookup(args, kwargs, cache_scope, cache_version)[1]
+
+        wrapper.payload = payload
+        wrapper.uncached = builder
+        return wrapper
+    return decorate
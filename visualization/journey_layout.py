@@ -0,0 +1,101 @@
+"""
+Incremental Journey Layout
+Keeps node positions of a session's learning-journey graph between
+renders and only places nodes that are new since the last render.
+"""
+
+import math
+from typing import TYPE_CHECKING, Dict, Hashable, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# Nearest placed nodes that repel a newly placed node
+NEIGHBOURHOOD = 8
+
+
+class JourneyLayout:
+    """
+    Position cache for one session's journey graph.
+
+    "spring" lays out the first render with nx.spring_layout, then places
+    each new node with a small spring layout over its neighbours and the
+    nearest existing nodes, all held fixed, so existing nodes never move
+    and per-render cost depends on the number of new nodes, not on the
+    size of the graph. "timeline" puts the attempt chain on a line in
+    "index" order and stacks concepts above the attempt they link to; it
+    is recomputed in linear time on each render.
+    """
+    MODES = ("spring", "timeline")
+
+    def __init__(self, mode: str = "spring", seed: int = 42):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown layout mode '{mode}' (use one of {self.MODES})")
+        self.mode = mode
+        self.seed = seed
+        self.positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    def positions_for(self, G: "nx.DiGraph") -> Dict[Hashable, Tuple[float, float]]:
+        """Positions for every node of G, placing only unseen nodes"""
+        # Forget nodes that left the graph (e.g. trimmed history)
+        for node in [n for n in self.positions if n not in G]:
+            del self.positions[node]
+        if self.mode == "timeline":
+            self.positions = self._timeline(G)
+            return self.positions
+        new_nodes = [n for n in G if n not in self.positions]
+        if new_nodes:
+            if not self.positions:
+                import networkx as nx
+                pos = nx.spring_layout(G, k=2, iterations=50, seed=self.seed)
+                self.positions.update((n, (float(x), float(y))) for n, (x, y) in pos.items())
+            else:
+                for node in new_nodes:
+                    self._place_spring(G, node)
+        return self.positions
+
+    def _place_spring(self, G: "nx.DiGraph", node: Hashable):
+        import networkx as nx
+        placed_neighbours = [n for n in nx.all_neighbors(G, node) if n in self.positions]
+        placed = list(self.positions)
+        coords = np.array([self.positions[n] for n in placed])
+        if placed_neighbours:
+            anchor = np.mean([self.positions[n] for n in placed_neighbours], axis=0)
+        else:
+            anchor = coords.mean(axis=0)
+        # Deterministic nudge so the node doesn't start on top of its anchor
+        angle = (len(placed) * 2.399963) % (2 * math.pi)
+        start = anchor + 0.3 * np.array([math.cos(angle), math.sin(angle)])
+
+        nearest = np.argsort(np.linalg.norm(coords - start, axis=1))[:NEIGHBOURHOOD]
+        fixed = set(placed_neighbours) | {placed[i] for i in nearest}
+        local = nx.Graph()
+        local.add_nodes_from(fixed)
+        local.add_node(node)
+        local.add_edges_from((node, n) for n in placed_neighbours)
+        initial = {n: self.positions[n] for n in fixed}
+        initial[node] = tuple(start)
+        # Spread comparable to the first full layout's spacing
+        spacing = float(np.median(np.linalg.norm(coords - coords.mean(axis=0), axis=1))) or 1.0
+        pos = nx.spring_layout(local, pos=initial, fixed=list(fixed), k=spacing / 2,
+                               iterations=30, seed=self.seed)
+        self.positions[node] = (float(pos[node][0]), float(pos[node][1]))
+
+    @staticmethod
+    def _timeline(G: "nx.DiGraph") -> Dict[Hashable, Tuple[float, float]]:
+        positions = {}
+        chain = [n for n, d in G.nodes(data=True) if d.get("type") != "concept"]
+        chain.sort(key=lambda n: G.nodes[n].get("index", 0))
+        for x, node in enumerate(chain):
+            positions[node] = (float(x), 0.0)
+        stacked: Dict[float, int] = {}
+        for node, data in G.nodes(data=True):
+            if data.get("type") != "concept":
+                continue
+            targets = [n for n in G.successors(node) if n in positions]
+            x = positions[targets[0]][0] if targets else float(len(chain))
+            positions[node] = (x, 1.0 + 0.6 * stacked.get(x, 0))
+            stacked[x] = stacked.get(x, 0) + 1
+        return positions
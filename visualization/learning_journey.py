@@ -3,9 +3,11 @@ Learning Journey Visualization
 Creates interactive graphs showing student progress
 """
 
-import plotly.graph_objects as go
-import networkx as nx
-from typing import List, Dict
+import functools
+from typing import List, Dict, Optional, Sequence
+
+from visualization.figure_cache import memoized_figure
+from visualization.journey_layout import JourneyLayout
 
 # Theme-compatible colors (work on both light and dark backgrounds)
 THEME_COLORS = {
@@ -19,166 +21,212 @@ THEME_COLORS = {
     'grid': 'rgba(100,100,100,0.1)'
 }
 
+AGENT_COLORS = {
+    "socratic": "#FF6B6B",
+    "hint": "#4ECDC4",
+    "reviewer": "#FFD93D",
+    "explainer": "#95E1D3"
+}
+
+
+# plotly and networkx are imported inside the builders: they are only
+# needed once a figure is drawn, not to start the app
 
-def create_learning_journey_graph(session_history: List[Dict], concepts_covered: List[str]):
+
+@functools.lru_cache(maxsize=None)
+def journey_template():
+    """
+    Shared styling for every sidebar figure; traces and layouts only carry
+    what differs, which keeps each serialized figure small
+    """
+    import plotly.graph_objects as go
+    return go.layout.Template(layout=go.Layout(
+        showlegend=False,
+        hovermode='closest',
+        plot_bgcolor=THEME_COLORS['background'],
+        paper_bgcolor=THEME_COLORS['background'],
+        font=dict(color=THEME_COLORS['text_primary'], family='Arial'),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, fixedrange=True),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, fixedrange=True),
+        margin=dict(l=5, r=5, t=5, b=5),
+        dragmode=False
+    ))
+
+# Histories longer than this collapse runs of attempts into range nodes
+COLLAPSE_THRESHOLD = 40
+# Attempts always drawn individually at the start and end of a long history
+KEEP_FIRST_ATTEMPTS = 3
+KEEP_RECENT_ATTEMPTS = 20
+
+
+def _empty_figure(message: str, height: int, font_size: int):
+    import plotly.graph_objects as go
+    fig = go.Figure(layout=dict(template=journey_template(), height=height))
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=font_size, color=THEME_COLORS['text_secondary'])
+    )
+    return fig
+
+
+def _journey_steps(attempt_numbers: List[int], anchors: set) -> List[tuple]:
+    """
+    Nodes along the attempt chain as (name, type, label, index). In long
+    histories, runs of attempts that are neither near the ends nor linked
+    to a concept become one "collapsed" node labelled with the range.
+    """
+    count = len(attempt_numbers)
+    keep = set(anchors)
+    if count > COLLAPSE_THRESHOLD:
+        keep.update(range(KEEP_FIRST_ATTEMPTS))
+        keep.update(range(count - KEEP_RECENT_ATTEMPTS, count))
+    else:
+        keep.update(range(count))
+    steps, run_start = [], None
+    for i, number in enumerate(attempt_numbers):
+        if i in keep:
+            if run_start is not None:
+                first, last = attempt_numbers[run_start], attempt_numbers[i - 1]
+                steps.append((f"Attempts {first}-{last}", "collapsed", f"{first}–{last}", run_start))
+                run_start = None
+            steps.append((f"Attempt {number}", "attempt", f"#{number}", i))
+        elif run_start is None:
+            run_start = i
+    return steps
+
+
+def _attempt_numbers(session_history) -> List[int]:
+    return [entry if isinstance(entry, int) else entry.get("attempt", i + 1)
+            for i, entry in enumerate(session_history)]
+
+
+def _journey_key(session_history, concepts_covered, layout=None):
+    # Only attempt numbers, concepts and the layout mode shape the figure
+    return tuple(_attempt_numbers(session_history)), tuple(concepts_covered), layout.mode if layout else None
+
+
+@memoized_figure(_journey_key)
+def create_learning_journey_graph(session_history: Sequence[Dict], concepts_covered: Sequence[str],
+                                  layout: Optional[JourneyLayout] = None):
     """
     Create interactive knowledge graph showing:
     - Student attempts (nodes)
     - Agent interventions (edges)
     - Concept mastery progression (colors)
+    
+    session_history holds history entries (dicts with "attempt") or plain
+    attempt numbers; nodes are labelled with each one's attempt number.
+    The app passes every attempt (SessionEventLog.attempt_numbers()), not
+    AgentContext.session_history, which keeps only the last
+    HISTORY_LIMIT turns and so would never reach COLLAPSE_THRESHOLD.
+    Pass the session's JourneyLayout
+    to keep node positions between reruns and only place new nodes.
+    
+    The figure has a fixed number of traces: all edges share one trace
+    (segments separated by None), and histories over COLLAPSE_THRESHOLD
+    attempts draw runs of middle attempts as single range nodes.
+    
+    Memoized on attempt numbers, concepts and layout mode, or on
+    cache_version when given (see memoized_figure); pass the session id
+    as cache_scope. The returned figure is shared and must not be modified.
     """
     
     if not session_history:
-        # Return empty figure with theme-compatible styling
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Start coding to see your learning journey!",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=16, color=THEME_COLORS['text_secondary'])
-        )
-        fig.update_layout(
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            plot_bgcolor=THEME_COLORS['background'],
-            paper_bgcolor=THEME_COLORS['background'],
-            height=300,
-            margin=dict(l=10, r=10, t=10, b=10)
-        )
-        return fig
+        return _empty_figure("Start coding to see your learning journey!", 300, 16)
     
-    # Create directed graph
-    G = nx.DiGraph()
+    import networkx as nx
+    import plotly.graph_objects as go
     
-    # Add nodes for each attempt
-    attempt_count = len(session_history)
-    for i in range(attempt_count):
-        G.add_node(f"Attempt {i+1}", 
-                   type="attempt",
-                   index=i)
+    attempt_numbers = _attempt_numbers(session_history)
+    attempt_count = len(attempt_numbers)
+    # Attempt index each concept links to (where it was learned)
+    concept_targets = [min(i + 1, attempt_count - 1) for i in range(len(concepts_covered))]
+    steps = _journey_steps(attempt_numbers, set(concept_targets))
+    step_by_index = {index: name for name, kind, _, index in steps if kind == "attempt"}
     
-    # Add nodes for concepts
+    # Create directed graph
+    G = nx.DiGraph()
+    for position, (name, kind, _, _) in enumerate(steps):
+        G.add_node(name, type=kind, index=position)
     for concept in concepts_covered:
         G.add_node(concept, type="concept")
+    for (name, *_), (next_name, *_) in zip(steps, steps[1:]):
+        G.add_edge(name, next_name)
+    for concept, target in zip(concepts_covered, concept_targets):
+        G.add_edge(concept, step_by_index[target])
+    
+    # Reuse the session's positions; a throwaway layout otherwise
+    pos = (layout or JourneyLayout()).positions_for(G)
     
-    # Add edges between attempts
-    for i in range(attempt_count - 1):
-        G.add_edge(f"Attempt {i+1}", f"Attempt {i+2}")
-    
-    # Link concepts to attempts where they were learned
-    for i, concept in enumerate(concepts_covered):
-        attempt_num = min(i + 2, attempt_count)
-        if attempt_num > 0:
-            G.add_edge(concept, f"Attempt {attempt_num}")
-    
-    # Create layout with fixed seed for consistency
-    pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
-    
-    # Separate node types
-    attempt_nodes = [n for n, d in G.nodes(data=True) if d.get('type') == 'attempt']
-    concept_nodes = [n for n, d in G.nodes(data=True) if d.get('type') == 'concept']
-    
-    # Create edge traces with theme-compatible colors
-    edge_traces = []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_traces.append(
-            go.Scatter(
-                x=[x0, x1, None],
-                y=[y0, y1, None],
-                mode='lines',
-                line=dict(width=2, color=THEME_COLORS['edge']),
-                hoverinfo='none',
-                showlegend=False
-            )
+    # Every edge in one trace, segments separated by None
+    edge_x, edge_y = [], []
+    for u, v in G.edges():
+        edge_x += [pos[u][0], pos[v][0], None]
+        edge_y += [pos[u][1], pos[v][1], None]
+    edge_trace = go.Scatter(
+        x=edge_x, y=edge_y,
+        mode='lines',
+        line=dict(width=2, color=THEME_COLORS['edge']),
+        hoverinfo='none'
+    )
+    
+    def node_trace(nodes, labels, **style):
+        return go.Scatter(
+            x=[round(pos[n][0], 4) for n in nodes],
+            y=[round(pos[n][1], 4) for n in nodes],
+            mode='markers+text',
+            text=labels,
+            **style
         )
     
-    # Attempt nodes trace with theme-compatible styling
-    attempt_x = [pos[n][0] for n in attempt_nodes]
-    attempt_y = [pos[n][1] for n in attempt_nodes]
-    attempt_trace = go.Scatter(
-        x=attempt_x, y=attempt_y,
-        mode='markers+text',
-        marker=dict(
-            size=35, 
-            color=THEME_COLORS['attempt_node'],
-            line=dict(width=2, color=THEME_COLORS['node_border'])
-        ),
-        text=[f"#{i+1}" for i in range(len(attempt_nodes))],
+    attempts = [(name, label) for name, kind, label, _ in steps if kind == "attempt"]
+    collapsed = [(name, label) for name, kind, label, _ in steps if kind == "collapsed"]
+    attempt_trace = node_trace(
+        [name for name, _ in attempts], [label for _, label in attempts],
+        marker=dict(size=35, color=THEME_COLORS['attempt_node'],
+                    line=dict(width=2, color=THEME_COLORS['node_border'])),
         textposition="middle center",
         textfont=dict(size=11, color='white', family='Arial Black'),
-        name="Attempts",
         hovertemplate='<b>Attempt %{text}</b><extra></extra>'
     )
-    
-    # Concept nodes trace with theme-compatible styling
-    concept_x = [pos[n][0] for n in concept_nodes]
-    concept_y = [pos[n][1] for n in concept_nodes]
-    concept_trace = go.Scatter(
-        x=concept_x, y=concept_y,
-        mode='markers+text',
-        marker=dict(
-            size=45, 
-            color=THEME_COLORS['concept_node'],
-            line=dict(width=2, color=THEME_COLORS['node_border']),
-            symbol='star'
-        ),
-        text=concept_nodes,
+    collapsed_trace = node_trace(
+        [name for name, _ in collapsed], [label for _, label in collapsed],
+        marker=dict(size=28, color=THEME_COLORS['background'], symbol='circle-dot',
+                    line=dict(width=2, color=THEME_COLORS['attempt_node'])),
         textposition="bottom center",
-        textfont=dict(size=11, color=THEME_COLORS['text_primary'], family='Arial'),
-        name="Concepts",
+        textfont=dict(size=10, color=THEME_COLORS['text_secondary']),
+        hovertemplate='<b>Attempts %{text}</b><extra></extra>'
+    )
+    concept_trace = node_trace(
+        list(concepts_covered), list(concepts_covered),
+        marker=dict(size=45, color=THEME_COLORS['concept_node'], symbol='star',
+                    line=dict(width=2, color=THEME_COLORS['node_border'])),
+        textposition="bottom center",
+        textfont=dict(size=11),
         hovertemplate='<b>Concept: %{text}</b><extra></extra>'
     )
     
-    # Create figure with theme-compatible layout
-    fig = go.Figure(
-        data=edge_traces + [attempt_trace, concept_trace],
-        layout=go.Layout(
-            showlegend=False,  # Cleaner look for sidebar
-            hovermode='closest',
-            plot_bgcolor=THEME_COLORS['background'],
-            paper_bgcolor=THEME_COLORS['background'],
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, fixedrange=True),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, fixedrange=True),
-            height=280,
-            margin=dict(l=5, r=5, t=5, b=5),
-            dragmode=False  # Disable drag for cleaner UX
-        )
+    return go.Figure(
+        data=[edge_trace, collapsed_trace, attempt_trace, concept_trace],
+        layout=dict(template=journey_template(), height=280)
     )
-    
-    return fig
 
 
-def create_concept_mastery_chart(concepts: List[str], attempt_count: int):
+@memoized_figure(lambda mastery: tuple((c, round(v * 100)) for c, v in mastery.items()))
+def create_concept_mastery_chart(mastery: Dict[str, float]):
     """
     Create horizontal bar chart showing concept mastery levels
+    (estimated probability each concept is known, 0.0 - 1.0)
+    Memoized on the displayed percentages.
     """
-    if not concepts:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Concepts will appear here as you learn",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=13, color=THEME_COLORS['text_secondary'])
-        )
-        fig.update_layout(
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            plot_bgcolor=THEME_COLORS['background'],
-            paper_bgcolor=THEME_COLORS['background'],
-            height=150,
-            margin=dict(l=5, r=5, t=5, b=5)
-        )
-        return fig
+    if not mastery:
+        return _empty_figure("Concepts will appear here as you learn", 150, 13)
+    
+    import plotly.graph_objects as go
     
-    # Calculate mock mastery levels (would be real in production)
-    mastery_levels = {}
-    for i, concept in enumerate(concepts):
-        # Simulate increasing mastery with attempts
-        base_mastery = 30
-        progress = min(70, attempt_count * 15)
-        mastery_levels[concept] = base_mastery + progress
+    mastery_levels = {concept: round(value * 100) for concept, value in mastery.items()}
     
     fig = go.Figure(data=[
         go.Bar(
@@ -198,21 +246,40 @@ def create_concept_mastery_chart(concepts: List[str], attempt_count: int):
     ])
     
     fig.update_layout(
-        xaxis=dict(
-            range=[0, 100], 
-            showgrid=False,
-            showticklabels=False,
-            fixedrange=True
-        ),
-        yaxis=dict(
-            tickfont=dict(color=THEME_COLORS['text_primary'], size=11),
-            fixedrange=True
-        ),
-        height=max(len(concepts) * 40 + 40, 100),
-        margin=dict(l=5, r=5, t=5, b=5),
-        plot_bgcolor=THEME_COLORS['background'],
-        paper_bgcolor=THEME_COLORS['background'],
+        template=journey_template(),
+        xaxis=dict(range=[0, 100]),
+        yaxis=dict(showticklabels=True, tickfont=dict(size=11)),
+        height=max(len(mastery_levels) * 40 + 40, 100),
         bargap=0.3
     )
     
     return fig
+
+
+@memoized_figure(lambda agent_counts: tuple(agent_counts.items()))
+def create_agent_activity_chart(agent_counts: Dict[str, int]):
+    """
+    Bar chart of how often each agent responded.
+    Memoized on the counts.
+    """
+    import plotly.graph_objects as go
+    agents = list(agent_counts)
+    fig = go.Figure(data=[
+        go.Bar(
+            x=agents,
+            y=list(agent_counts.values()),
+            marker=dict(color=[AGENT_COLORS.get(agent, THEME_COLORS['attempt_node']) for agent in agents]),
+            textposition='outside',
+            textfont=dict(color=THEME_COLORS['text_primary'], size=10),
+            hovertemplate='<b>%{x}</b><br>Count: %{y}<extra></extra>'
+        )
+    ])
+    fig.update_layout(
+        template=journey_template(),
+        height=180,
+        margin=dict(l=0, r=0, t=10, b=0),
+        xaxis=dict(showticklabels=True, tickfont=dict(size=10)),
+        yaxis=dict(showticklabels=True, tickfont=dict(size=10)),
+        bargap=0.3
+    )
+    return fig